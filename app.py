@@ -1,40 +1,83 @@
-import asyncio, time, pandas as pd, streamlit as st
-from graph import workflow, wallet, display_graph_dot
+"""
+Дашборд (только чтение): снимки, которые публикует engine.py.
+
+Торговли здесь нет — скрипт опрашивает engine_state раз в POLL секунд и
+перерисовывается только при новом снимке.  Сколько бы вкладок ни было
+открыто, цикл движка их не ждёт.
+"""
+import os, time, pandas as pd, streamlit as st
+from engine_state import StateReader
+from ringbuf import TieredSeries, lttb
+
+POLL   = float(os.getenv("UI_POLL", "2"))    # сек между опросами
+STALE  = 180                                 # сек без снимков → предупреждение
+POINTS = 600                                 # точек на линию графика (LTTB)
 
 st.set_page_config(page_title="Crypto Multi-Agent", layout="wide")
 
-equity_curve: list[tuple[float, float]] = []
+if "reader" not in st.session_state:         # своё read-only соединение на вкладку
+    st.session_state.reader = StateReader()
+    st.session_state.equity = {}             # strategy → TieredSeries, дочитывается
+    st.session_state.eq_ts  = 0.0
+reader: StateReader = st.session_state.reader
 placeholder = st.empty()
 
-async def one_cycle():
-    result  = await workflow.ainvoke({})
-    prices  = result["prices"]
-    equity  = result["equity"]
-    events  = result["events"]
 
-    equity_curve.append((time.time(), equity))
+def _equity_frame() -> pd.DataFrame:
+    """Первый раз — уровни из engine_state, дальше новые сырые точки → буферы;
+    на график — не больше POINTS точек на стратегию."""
+    series, since = st.session_state.equity, st.session_state.eq_ts
+    for ts, name, eq in (reader.equity_since(since) if since else reader.equity_view()):
+        series.setdefault(name, TieredSeries()).append(ts, eq)
+        st.session_state.eq_ts = ts
+    frames = [pd.DataFrame(lttb(s.view(), POINTS), columns=["ts", "equity"]).assign(strategy=name)
+              for name, s in series.items()]
+    df = pd.concat(frames) if frames else pd.DataFrame(columns=["ts", "equity", "strategy"])
+    return df.assign(ts=pd.to_datetime(df["ts"], unit="s"))
+
+
+def render(snap: dict, stale: bool):
+    prices  = snap["prices"]
+    wallet  = snap["wallet"]
+    events  = snap["events"]
+    cycle, stats = snap["cycle"], snap["stats"]
 
     with placeholder.container():
+        if stale:
+            st.warning(f"Нет новых снимков от движка {time.time() - snap['ts']:.0f} с "
+                       f"(последний — {time.strftime('%H:%M:%S', time.localtime(snap['ts']))})")
         col1, col2, col3 = st.columns([1.4, 1.4, 1])
 
         # --- баланс ---
         with col1:
             st.subheader("Баланс / Equity")
-            st.write(f"Кэш: {wallet.cash:,.2f} USDT")
-            st.write("Позиции:", wallet.positions)
-            st.metric("Нереализованный P&L", f"{wallet.unrealized_pnl(prices):,.2f} USDT")
-            st.metric("Реализованный P&L",   f"{wallet.realized:,.2f} USDT")
-            st.line_chart(pd.DataFrame(equity_curve, columns=["ts", "equity"]).set_index("ts"))
+            st.write(f"Кэш: {wallet['cash']:,.2f} USDT")
+            st.write("Позиции:", wallet["positions"])
+            st.metric("Нереализованный P&L", f"{wallet['unrealized']:,.2f} USDT")
+            st.metric("Реализованный P&L",   f"{wallet['realized']:,.2f} USDT")
+            st.line_chart(_equity_frame(), x="ts", y="equity", color="strategy")
+            if len(snap["strategies"]) > 1:                 # A/B стратегий на одном снимке
+                st.dataframe(pd.DataFrame(snap["strategies"]).set_index("strategy"))
 
         # --- сделки ---
         with col2:
             st.subheader("Логи")
-            for ts, msg in reversed(wallet.history[-25:]):
+            for ts, msg in reversed(wallet["history"]):
                 st.text(f"{time.strftime('%H:%M:%S', time.localtime(ts))}  {msg}")
 
         # --- процессы ---
         with col3:
             st.subheader("Процессы")
+            if cycle:
+                st.caption(f"Цикл: {', '.join(cycle['reasons'])} · lag {cycle['lag']:.2f}s "
+                           f"(p95 {stats['lag_p95']:.2f}s) · decide {cycle['decide']:.1f}s · "
+                           f"слито {stats['coalesced']}, предзагрузок {stats['prefetched']}")
+            st.caption("Цены: " + ", ".join(f"{s} {p:,.2f}" for s, p in prices.items()))
+            if snap.get("timings"):                          # куда ушло время цикла
+                with st.expander("⏱ Время цикла", expanded=False):
+                    st.dataframe(pd.DataFrame.from_dict(snap["timings"], orient="index")
+                                 .rename(columns={"n": "вызовов", "s": "сек"})
+                                 .sort_values("сек", ascending=False))
             for ev in events:
                 st.markdown(f"- **{ev['ts']}** — {ev['msg']}")
             with st.expander("💬 Рассуждения", expanded=False):
@@ -43,14 +86,20 @@ async def one_cycle():
                         st.markdown(f"*{ev['msg']}*")
                         st.json(ev["extra"], expanded=False)
 
-        with st.expander("🗺️ Граф узлов", expanded=False):
-            st.graphviz_chart(display_graph_dot())
+        if snap.get("graph"):
+            with st.expander("🗺️ Граф узлов", expanded=False):
+                st.graphviz_chart(snap["graph"])
 
-async def main():
-    while True:
-        await one_cycle()
-        await asyncio.sleep(45)
 
-if "loop_started" not in st.session_state:
-    st.session_state.loop_started = True
-    asyncio.run(main())
+seen = None                                  # (seq, stale) последней отрисовки
+while True:
+    latest = reader.latest()
+    if latest is None:
+        placeholder.info("Движок ещё не опубликовал состояние — запущен ли engine.py?")
+    else:
+        seq, snap = latest
+        key = (seq, time.time() - snap["ts"] > STALE)
+        if key != seen:
+            seen = key
+            render(snap, key[1])
+    time.sleep(POLL)
@@ -0,0 +1,185 @@
+"""
+Потоковый конвейер статей для rss_listener.
+
+    entries ─► fetch (async, лимит глобально и на хост)
+            ─► extract (readability + BeautifulSoup в пуле процессов)
+            ─► sink (LLM-классификация и короткая запись в БД — у вызывающего)
+
+Стадии связаны ограниченными asyncio-очередями: статья уходит дальше,
+как только готова, медленный хост держит только свой слот, а разбор HTML
+не занимает event-loop.  По каждой стадии считаются обработанные,
+ошибки, занятое время, пропускная способность и глубина входной очереди
+(текущая и максимальная) — см. Pipeline.report().
+"""
+import asyncio, logging, time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlsplit
+
+import aiohttp
+from bs4 import BeautifulSoup
+from readability import Document
+
+logger = logging.getLogger(__name__)
+
+FETCH_CONCURRENCY   = 16
+PER_HOST            = 4
+FETCH_TIMEOUT       = 10
+EXTRACT_WORKERS     = 2         # процессов readability
+SINK_CONCURRENCY    = 4
+QUEUE_SIZE          = 32        # между стадиями
+MIN_PARAGRAPH       = 50
+USER_AGENT          = "Mozilla/5.0"
+
+
+# ---------- извлечение текста (в процессе пула) ----------------------------
+def extract_article(html: str | None, summary_html: str) -> str:
+    """Абзацы > MIN_PARAGRAPH символов из readability; иначе — чистый summary."""
+    text = BeautifulSoup(summary_html or "", "html.parser").get_text(strip=True)
+    if not html:
+        return text
+    try:
+        soup = BeautifulSoup(Document(html).summary(), "html.parser")
+    except Exception:
+        return text
+    paras = [t for p in soup.find_all("p") if len(t := p.get_text(strip=True)) > MIN_PARAGRAPH]
+    return "\n".join(paras) if paras else text
+
+
+@dataclass
+class Article:
+    feed_url: str
+    entry:    Any
+    html:     str | None = None
+    text:     str = ""
+
+
+@dataclass
+class StageStats:
+    done:     int = 0
+    errors:   int = 0
+    busy:     float = 0.0                    # сумма времени обработки
+    depth:    int = 0                        # входная очередь сейчас
+    max_depth: int = 0
+    started:  float = field(default_factory=time.monotonic)
+
+    def row(self, name: str) -> str:
+        wall = max(time.monotonic() - self.started, 1e-9)
+        avg  = self.busy / self.done * 1e3 if self.done else 0.0
+        return (f"{name:>8}: {self.done:4d} ok {self.errors:3d} err  "
+                f"{self.done / wall:7.1f}/s  avg {avg:7.1f} ms  "
+                f"queue {self.depth} (max {self.max_depth})")
+
+
+class Pipeline:
+    def __init__(self, sink: Callable[[Article], Awaitable[None]], *,
+                 fetch_concurrency: int = FETCH_CONCURRENCY, per_host: int = PER_HOST,
+                 extract_workers: int = EXTRACT_WORKERS, sink_concurrency: int = SINK_CONCURRENCY):
+        self.sink = sink
+        self.fetch_concurrency, self.per_host = fetch_concurrency, per_host
+        self.extract_workers, self.sink_concurrency = extract_workers, sink_concurrency
+        self.stats = {s: StageStats() for s in ("fetch", "extract", "sink")}
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._pool:    ProcessPoolExecutor | None = None
+        self._session: aiohttp.ClientSession | None = None
+
+    # ---------- ресурсы ---------------------------------------------------
+    def _ensure(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.extract_workers, mp_context=get_context("spawn"))
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"User-Agent": USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=self.fetch_concurrency,
+                                               limit_per_host=self.per_host,
+                                               keepalive_timeout=30))
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ---------- стадии ----------------------------------------------------
+    async def _fetch(self, a: Article) -> Article:
+        host = urlsplit(a.entry.link).netloc
+        sem  = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with sem:
+            try:
+                async with self._session.get(a.entry.link) as r:
+                    r.raise_for_status()
+                    a.html = await r.text(errors="replace")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as ex:
+                logger.debug("Fetch article failed %s: %s", a.entry.link, ex)
+                raise
+        return a
+
+    async def _extract(self, a: Article) -> Article:
+        loop = asyncio.get_running_loop()
+        a.text = await loop.run_in_executor(self._pool, extract_article,
+                                            a.html, a.entry.get("summary", ""))
+        a.html = None                                  # дальше не нужен
+        return a
+
+    async def _worker(self, name: str, fn, q_in: asyncio.Queue, q_out: asyncio.Queue | None,
+                      keep_on_error: bool) -> None:
+        st = self.stats[name]
+        while (a := await q_in.get()) is not None:
+            st.depth = q_in.qsize()
+            t0 = time.monotonic()
+            try:
+                a = await fn(a)
+            except Exception as ex:
+                st.errors += 1
+                if not keep_on_error:
+                    logger.warning("pipeline %s failed: %s", name, ex)
+                    continue
+            else:
+                st.done += 1
+            finally:
+                st.busy += time.monotonic() - t0
+            if q_out is not None:
+                await q_out.put(a)
+                s2 = self.stats[_NEXT[name]]
+                s2.depth = q_out.qsize(); s2.max_depth = max(s2.max_depth, s2.depth)
+        st.depth = q_in.qsize()
+
+    # ---------- запуск ----------------------------------------------------
+    async def run(self, items: list[tuple[str, Any]]) -> dict[str, StageStats]:
+        """items — (feed_url, entry); возвращается, когда всё прошло через sink."""
+        if not items:
+            return self.stats
+        self._ensure()
+        self.stats = {s: StageStats() for s in self.stats}       # метрики — за прогон
+        q_fetch, q_extract, q_sink = (asyncio.Queue(QUEUE_SIZE) for _ in range(3))
+        stages = [
+            # статья без html (не скачалась) всё равно идёт дальше — с summary
+            ("fetch",   self._fetch,   q_fetch,   q_extract, self.fetch_concurrency, True),
+            ("extract", self._extract, q_extract, q_sink,    self.extract_workers,   True),
+            ("sink",    self.sink,     q_sink,    None,      self.sink_concurrency,  False),
+        ]
+        groups = [[asyncio.create_task(self._worker(n, fn, qi, qo, keep)) for _ in range(k)]
+                  for n, fn, qi, qo, k, keep in stages]
+
+        async def feed():
+            for feed_url, entry in items:
+                await q_fetch.put(Article(feed_url, entry))
+                st = self.stats["fetch"]
+                st.depth = q_fetch.qsize(); st.max_depth = max(st.max_depth, st.depth)
+        await feed()
+        # закрываем стадии по очереди: sentinel на каждого воркера
+        for (_, _, q_in, _, k, _), tasks in zip(stages, groups):
+            for _ in range(k):
+                await q_in.put(None)
+            await asyncio.gather(*tasks)
+        return self.stats
+
+    def report(self) -> str:
+        return "\n".join(st.row(n) for n, st in self.stats.items())
+
+
+_NEXT = {"fetch": "extract", "extract": "sink"}
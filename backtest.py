@@ -0,0 +1,541 @@
+"""
+Офлайн-бэктест правил fuse_and_trade + Wallet.
+
+Сигналы считаются массивами сразу по всей истории (символы × бары):
+    • техника  — indicators.indicator_matrix / score_matrix
+    • новости  — лучшая по confidence запись за окно WINDOW_HOURS,
+                 как в news_agent, развёрнутая на сетку баров
+    • fused    — W_TECH·tech + W_NEWS·news (или чистая техника)
+Сделки — правила Wallet/fuse_and_trade/drawdown_cut (часы кошелька —
+время бара) в _Book: та же арифметика на списках по номеру актива,
+сделки совпадают с Wallet бит в бит (bench_backtest --check).  Python
+идёт только по барам и активам, где сделка возможна:
+    • вход     — маска по времени: сигнал, актив вне cooldown, SELL —
+                 только по открытой позиции (остальные Wallet отбросил бы);
+    • выход    — отрезок без сигналов с открытыми позициями не проходится
+                 по бару: первый бар TP/SL/таймаута вне cooldown или
+                 просадки выше dd_trigger ищется массивами (_first_exit).
+Кривая equity восстанавливается векторно по точкам изменения портфеля.
+
+verify — записанный день через run(): кошелёк к началу дня из trades,
+свечи дня и news_llm_cache; сделки и realized P&L сверяются с trades.
+
+    python backtest.py fetch  --pairs BTC/USDT ETH/USDT --days 30 --out data/market_5m.npz
+    python backtest.py run    --data data/market_5m.npz [--news]
+    python backtest.py verify --day 2026-10-17 [--data day.npz] [--pairs BTC ETH]
+"""
+from __future__ import annotations
+
+import argparse, asyncio, logging, time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from indicators import IndicatorEngine, indicator_matrix, score_matrix, WEIGHTS, SMA_SLOW
+from decision_agent import _SENT_MAP, W_TECH, W_NEWS, THRESHOLD
+from wallet import Wallet, RiskParams, FEE_MAP
+
+logger = logging.getLogger(__name__)
+
+TF           = "5m"
+WINDOW_HOURS = 6                 # как news_agent.WINDOW_HOURS
+EXIT_CHUNK   = 512               # баров на один векторный поиск выхода
+EPS          = 1e-9              # запас сравнений: лишний бар безвреден, пропуск — нет
+
+
+# ───────────────────────── данные ─────────────────────────────────────────
+@dataclass
+class MarketData:
+    ts:     np.ndarray           # (T,) миллисекунды, открытие бара
+    assets: List[str]            # базовые активы ("BTC", …)
+    close:  np.ndarray           # (N, T)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, ts=self.ts, close=self.close,
+                            assets=np.array(self.assets))
+
+    @classmethod
+    def load(cls, path: str) -> "MarketData":
+        z = np.load(path)
+        return cls(z["ts"], [str(a) for a in z["assets"]], z["close"])
+
+
+async def fetch_market(pairs: List[str], since_ms: int, until_ms: int,
+                       tf: str = TF) -> MarketData:
+    """История OHLCV через общий шлюз; ряды выравниваются на общую сетку."""
+    from exchange import get_exchange
+    ex = get_exchange()
+    step = ex.parse_timeframe(tf) * 1000
+    grid = np.arange(since_ms - since_ms % step, until_ms, step, dtype=np.int64)
+    close = np.full((len(pairs), len(grid)), np.nan)
+    for i, pair in enumerate(pairs):
+        cur = since_ms
+        while cur < until_ms:
+            rows = await ex.fetch_ohlcv(pair, timeframe=tf, since=cur, limit=1000)
+            if not rows:
+                break
+            r = np.asarray(rows, dtype=np.float64)
+            idx = ((r[:, 0] - grid[0]) // step).astype(np.int64)
+            ok = (idx >= 0) & (idx < len(grid))
+            close[i, idx[ok]] = r[ok, 4]
+            cur = int(r[-1, 0]) + step
+        logger.info("history %s: %d bars", pair, int(np.isfinite(close[i]).sum()))
+    return MarketData(grid, [p.split("/")[0] for p in pairs], _ffill(close))
+
+
+def load_news_rows(since: datetime, until: datetime) -> list[tuple]:
+    """(ts_ms, asset, sentiment, confidence) из news_llm_cache."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from database import sync_engine
+    from models import NewsLLMCache
+    q = (select(NewsLLMCache.created_at, NewsLLMCache.asset,
+                NewsLLMCache.sentiment, NewsLLMCache.confidence)
+         .where(NewsLLMCache.created_at >= since - timedelta(hours=WINDOW_HOURS))
+         .where(NewsLLMCache.created_at < until))
+    with Session(sync_engine) as s:
+        return [(int(ts.timestamp() * 1000), a, snt, conf)
+                for ts, a, snt, conf in s.execute(q)]
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    """Forward-fill пропусков по времени (ведущие NaN остаются: такой ряд
+    не получит индикаторов и не торгуется — берите пары с полной историей)."""
+    idx = np.where(np.isfinite(x), np.arange(x.shape[1]), -1)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    out = x[np.arange(x.shape[0])[:, None], np.maximum(idx, 0)]
+    out[idx < 0] = np.nan
+    return out
+
+
+# ───────────────────────── подготовка ─────────────────────────────────────
+@dataclass
+class Prepared:
+    market:   MarketData
+    ind:      Dict[str, np.ndarray]     # indicator_matrix(close)
+    news_has: np.ndarray                # (N, T) bool — есть новость в окне
+    news_val: np.ndarray                # (N, T) sign(sentiment)·confidence
+
+
+def news_matrix(market: MarketData, rows, window_h: float = WINDOW_HOURS):
+    """Для каждого бара — запись с max(confidence) за последние window_h."""
+    n, t = market.close.shape
+    has, val = np.zeros((n, t), bool), np.zeros((n, t))
+    conf = np.full((n, t), -np.inf)
+    col = {a: i for i, a in enumerate(market.assets)}
+    win = int(window_h * 3600 * 1000)
+    for ts, asset, sent, c in sorted(rows, key=lambda r: r[3]):
+        i = col.get(asset)
+        if i is None:
+            continue
+        # бар видит новость, если created_at ∈ [bar_ts − window, bar_ts]
+        lo = np.searchsorted(market.ts, ts, side="left")
+        hi = np.searchsorted(market.ts, ts + win, side="right")
+        sl = slice(lo, hi)
+        upd = c > conf[i, sl]                  # строго больше — как news_agent
+        conf[i, sl] = np.where(upd, c, conf[i, sl])
+        val[i, sl]  = np.where(upd, _SENT_MAP.get((sent or "").lower(), 0) * c, val[i, sl])
+        has[i, sl]  = True
+    return has, val
+
+
+def prepare(market: MarketData, news_rows=(), window_h: float = WINDOW_HOURS) -> Prepared:
+    has, val = news_matrix(market, news_rows, window_h)
+    return Prepared(market, indicator_matrix(market.close), has, val)
+
+
+# ───────────────────────── прогон ─────────────────────────────────────────
+@dataclass
+class BacktestConfig:
+    w_tech:    float = W_TECH
+    w_news:    float = W_NEWS
+    threshold: float = THRESHOLD
+    weights:   Dict[str, float] = field(default_factory=lambda: dict(WEIGHTS))
+    risk:      RiskParams = field(default_factory=RiskParams)
+    cash:      float = 10_000.0
+    dd_cut:    bool  = True             # drawdown_cut, как в decide_llm
+    warmup:    int   = SMA_SLOW         # баров без торговли в начале
+
+
+@dataclass
+class BacktestResult:
+    equity:   np.ndarray
+    trades:   List[dict]
+    realized: float
+    fees:     float
+
+    @property
+    def ret(self) -> float:
+        return float(self.equity[-1] / self.equity[0] - 1)
+
+    @property
+    def max_dd(self) -> float:
+        peak = np.maximum.accumulate(self.equity)
+        return float(np.max(1 - self.equity / peak))
+
+    def summary(self) -> dict:
+        return {"return": round(self.ret, 6), "max_dd": round(self.max_dd, 6),
+                "trades": len(self.trades), "realized": round(self.realized, 2),
+                "fees": round(self.fees, 2), "equity": round(float(self.equity[-1]), 2)}
+
+
+class _SimWallet(Wallet):
+    """Wallet без записи в БД: сделки копятся в памяти."""
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.trades: List[dict] = []
+
+    def _store(self, **kw):
+        self.trades.append(kw)
+
+
+class _Book:
+    """
+    Кошелёк прогона на списках по номеру актива: та же арифметика, что
+    Wallet.buy / sell / should_exit, fuse_and_trade и drawdown_cut, в том
+    же порядке операций с float (сделки совпадают с Wallet бит в бит —
+    bench_backtest --check), но без dict цен, dataclass-позиций, uuid и лога.
+    pos — номер актива → [qty, entry_price, opened_ts], порядок вставки как
+    у Wallet.positions (от него зависят суммы equity и сортировка DD).
+    """
+    def __init__(self, assets: List[str], risk: RiskParams, cash: float):
+        self.assets, self.r = assets, risk
+        self.cash, self.realized, self.now = cash, 0.0, 0.0
+        self.pos: Dict[int, list] = {}
+        self.last_op = [0.0] * len(assets)
+        self.fee = [FEE_MAP.get(a, 0.001) for a in assets]
+        self.cooldown = risk.cooldown_min * 60
+        self.trades: List[dict] = []
+
+    @classmethod
+    def of(cls, w: Wallet, assets: List[str]) -> "_Book":
+        """Стартовое состояние из кошелька (позиции вне assets не переносятся)."""
+        b = cls(assets, w.risk, w.cash)
+        col = {a: i for i, a in enumerate(assets)}
+        b.pos = {col[s]: [p.qty, p.entry_price, p.opened_ts]
+                 for s, p in w.positions.items() if s in col}
+        for s, ts in w.last_op.items():
+            if s in col:
+                b.last_op[col[s]] = ts
+        return b
+
+    def cooling(self, i: int) -> bool:
+        return (self.now - self.last_op[i]) < self.cooldown
+
+    def equity(self, px) -> float:
+        return self.cash + sum(q[0] * px[i] for i, q in self.pos.items())
+
+    def unrealized(self, px) -> float:
+        return sum((px[i] - q[1]) * q[0] for i, q in self.pos.items())
+
+    def _trade(self, i, side, qty, price, fee, pnl) -> None:
+        self.last_op[i] = self.now
+        self.trades.append(dict(ts=datetime.utcfromtimestamp(self.now), symbol=self.assets[i],
+                                side=side, qty=qty, price=price, fee=fee, realized_pnl=pnl))
+
+    def buy(self, i: int, price: float, px, pct: float = 0.05) -> None:
+        if self.cooling(i): return
+        r = self.r
+        pct = min(pct, r.size_pct_limit)
+        fee_pct = self.fee[i]
+        alloc = max(self.cash * pct, r.min_ticket)
+        if alloc > self.cash or price <= 0: return
+        qty = alloc / (price * (1 + fee_pct + r.slippage))
+        p = self.pos.get(i)
+        cur_val = (p[0] if p else 0) * price
+        if (cur_val + qty*price) > self.equity(px) * r.max_pos_share: return
+        cost = qty * price * (1 + fee_pct + r.slippage)
+        self.cash -= cost
+        if p:
+            new_qty = p[0] + qty
+            p[0], p[1] = new_qty, (p[0]*p[1] + qty*price) / new_qty
+        else:
+            self.pos[i] = [qty, price, self.now]
+        self._trade(i, "BUY", qty, price, cost - qty*price, 0.0)
+
+    def sell(self, i: int, price: float, pct: float = 1.0) -> None:
+        if self.cooling(i): return
+        p = self.pos.get(i)
+        if not p: return
+        fee_pct = self.fee[i]
+        qty = p[0] * pct
+        proceeds = qty * price * (1 - fee_pct - self.r.slippage)
+        pnl = proceeds - qty * p[1]
+        self.realized += pnl
+        self.cash += proceeds
+        if pct >= 0.999: del self.pos[i]
+        else:            p[0] -= qty
+        self._trade(i, "SELL", qty, price, qty*price*fee_pct, pnl)
+
+    def should_exit(self, i: int, price: float) -> bool:
+        if self.cooling(i): return False
+        p = self.pos[i]
+        delta = (price - p[1]) / p[1]
+        if delta >= self.r.tp or delta <= -self.r.sl:
+            return True
+        return (self.now - p[2]) >= self.r.max_hold_min * 60
+
+    def drawdown_cut(self, px) -> None:
+        r = self.r
+        drawdn = max(0, -self.unrealized(px) / self.equity(px))
+        if drawdn > r.dd_trigger:
+            for i, _ in sorted(self.pos.items(), key=lambda kv: (px[kv[0]] - kv[1][1]) / kv[1][1]):
+                self.sell(i, px[i], pct=0.5)
+                drawdn = max(0, -self.unrealized(px) / self.equity(px))
+                if drawdn <= r.dd_stop:
+                    break
+
+
+def _first_exit(b: _Book, close: np.ndarray, ts: np.ndarray,
+                lo: int, hi: int, dd_cut: bool) -> int:
+    """
+    Первый бар в [lo, hi) без сигналов, где кошелёк может торговать:
+    TP/SL/таймаут позиции вне cooldown (should_exit) или просадка выше
+    dd_trigger (drawdown_cut); нет такого — hi.  Сравнения с запасом EPS.
+    """
+    r, rows = b.r, list(b.pos)
+    pos   = np.array([b.pos[i] for i in rows])                       # (P, 3)
+    qty, entry, opened = pos[:, :1], pos[:, 1:2], pos[:, 2:3]
+    freed = np.array([b.last_op[i] for i in rows])[:, None] + b.cooldown
+    for a in range(lo, hi, EXIT_CHUNK):
+        c  = min(hi, a + EXIT_CHUNK)
+        tt = ts[a:c]
+        px = close[rows, a:c]                                        # (P, L)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = (px - entry) / entry
+            hit = (tt >= freed - EPS) & ((delta >= r.tp - EPS) | (delta <= -r.sl + EPS)
+                                         | (tt - opened >= r.max_hold_min * 60 - EPS))
+            hit = hit.any(axis=0) | ~np.isfinite(px).all(axis=0)
+            if dd_cut:
+                dd = -((px - entry) * qty).sum(axis=0) / (b.cash + (qty * px).sum(axis=0))
+                hit |= dd > r.dd_trigger - EPS
+        if hit.any():
+            return a + int(np.argmax(hit))
+    return hi
+
+
+def run(p: Prepared, cfg: BacktestConfig | None = None,
+        start: Wallet | None = None) -> BacktestResult:
+    """
+    Прогон по истории.  Сигналы, маски входа и поиск выходов — массивы
+    по времени; Python-цикл идёт только по барам, где кошелёк может
+    сделать сделку, и только по активам, которые могут в неё попасть.
+    start — состояние кошелька на начало (verify: кошелёк к началу дня).
+    """
+    cfg = cfg or BacktestConfig()
+    m = p.market
+    n, t_len = m.close.shape
+    score, _ = score_matrix(p.ind, cfg.weights)
+    tech  = np.round(score, 4)                       # как "score" в tech_signals
+    fused = np.where(p.news_has, cfg.w_tech * tech + cfg.w_news * p.news_val, tech)
+    with np.errstate(invalid="ignore"):
+        signal = np.isfinite(m.close) & (np.abs(fused) >= cfg.threshold)
+    signal[:, :cfg.warmup] = False
+    buy = fused >= cfg.threshold
+    # следующий бар с сигналом для каждого t (t_len — сигналов больше нет)
+    act = np.flatnonzero(signal.any(axis=0))
+    nxt = np.r_[act, t_len][np.searchsorted(act, np.arange(t_len + 1))]
+
+    b = _Book.of(start, m.assets) if start is not None else _Book(m.assets, cfg.risk, cfg.cash)
+    close, ts = m.close, m.ts / 1000.0
+    col = {a: i for i, a in enumerate(m.assets)}
+    last_op = np.array(b.last_op)                    # b.last_op массивом — для маски входа
+    held = np.zeros(n, bool)                         # открытые позиции
+    held[list(b.pos)] = True
+    # точки изменения портфеля: (бар, cash, {актив: qty})
+    marks: list[tuple[int, float, dict]] = [(0, b.cash, {i: q[0] for i, q in b.pos.items()})]
+
+    t = nxt[0] if not b.pos else min(nxt[0], cfg.warmup)
+    while t < t_len:
+        if nxt[t] != t:                              # бар без сигналов: только выходы
+            t = _first_exit(b, close, ts, t, nxt[t], cfg.dd_cut) if b.pos else nxt[t]
+            if t >= t_len:
+                break
+        b.now = float(ts[t])
+        # вне cooldown и (BUY или SELL по позиции) — иначе Wallet ничего не сделает
+        idx = np.flatnonzero(signal[:, t] & (ts[t] - last_op >= b.cooldown)
+                             & (buy[:, t] | held)).tolist()
+        px = close[:, t].tolist()
+        before = len(b.trades)
+        # fuse_and_trade: авто-выходы, затем сигналы по порядку активов
+        for i in list(b.pos):
+            if b.should_exit(i, px[i]):
+                b.sell(i, px[i])
+        for i in idx:
+            if buy[i, t]: b.buy(i, px[i], px)
+            else:         b.sell(i, px[i])
+        if cfg.dd_cut and b.pos:
+            b.drawdown_cut(px)
+        if len(b.trades) != before:
+            marks.append((t, b.cash, {i: q[0] for i, q in b.pos.items()}))
+            for tr in b.trades[before:]:
+                last_op[col[tr["symbol"]]] = b.now
+            held[:] = False
+            held[list(b.pos)] = True
+        t += 1
+
+    # equity(t) = cash(t) + Σ qty(t)·close(t) — векторно по точкам изменений
+    at   = np.array([mk[0] for mk in marks])
+    cash = np.array([mk[1] for mk in marks])
+    qty  = np.zeros((n, len(marks)))
+    for k, (_, _, pos) in enumerate(marks):
+        for i, q in pos.items():
+            qty[i, k] = q
+    state = np.searchsorted(at, np.arange(t_len), side="right") - 1
+    equity = cash[state] + np.nansum(qty[:, state] * close, axis=0)
+    fees = sum(tr["fee"] for tr in b.trades)
+    return BacktestResult(equity, b.trades, b.realized, fees)
+
+
+# ───────────────────────── сверка с живым кошельком ───────────────────────
+def window_indicators(close: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """
+    indicator_matrix, как их видит живой tech_agent: по окну последних
+    window свечей (IndicatorEngine(window=…)), а не по всей истории —
+    EMA/RSI от начала окна зависят.  Для verify (дни, а не месяцы).
+    """
+    out = {k: np.full(close.shape, np.nan) for k in ("sma", "ema", "mac", "rsi", "bb")}
+    for i, row in enumerate(close):
+        eng = IndicatorEngine(window=window)
+        for t, x in enumerate(row):
+            if np.isfinite(x):
+                for k, v in zip(out, eng.raw(x)):
+                    out[k][i, t] = v
+                eng.update(x)
+    return out
+
+
+def _load_trades(until: datetime) -> list[dict]:
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from database import sync_engine
+    from models import Trade
+    with Session(sync_engine) as s:
+        q = select(Trade).where(Trade.ts < until).order_by(Trade.ts)
+        return [dict(ts=r.ts, symbol=r.symbol, side=r.side, qty=r.qty, price=r.price,
+                     fee=r.fee, realized_pnl=r.realized_pnl) for r in s.scalars(q)]
+
+
+def match_trades(live: List[dict], sim: List[dict], tol_s: float) -> dict:
+    """Пары (актив, сторона, |Δts| ≤ tol_s) жадно по времени; остальное — расхождения."""
+    left, pairs, sim_only = list(live), [], []
+    for tr in sim:
+        hit = next((k for k, lv in enumerate(left)
+                    if lv["symbol"] == tr["symbol"] and lv["side"] == tr["side"]
+                    and abs((lv["ts"] - tr["ts"]).total_seconds()) <= tol_s), None)
+        if hit is None:
+            sim_only.append(tr)
+        else:
+            pairs.append((left.pop(hit), tr))
+    return {"matched": pairs, "live_only": left, "sim_only": sim_only}
+
+
+def verify(day: datetime, md: MarketData | None = None, pairs: List[str] | None = None,
+           cfg: BacktestConfig | None = None, news: bool = True) -> dict:
+    """
+    Записанный день через run(): кошелёк к началу дня — сделки из trades
+    через Wallet.apply_trade (как при восстановлении движка), свечи —
+    md или история с биржи (день + прогрев CANDLES), новости —
+    news_llm_cache; индикаторы — по окну CANDLES, как у tech_agent.
+    Сделки дня сверяются с trades (match_trades), realized P&L — суммой.
+    """
+    from tech_agent import CANDLES
+    cfg = cfg or BacktestConfig()
+    until = day + timedelta(days=1)
+    rows = _load_trades(until)
+    start = Wallet(cash=cfg.cash, risk=cfg.risk)
+    for r in rows:
+        if r["ts"] < day:
+            start.apply_trade(r)
+    live = [r for r in rows if r["ts"] >= day]
+    if md is None:
+        syms = pairs or sorted({r["symbol"] for r in live} | set(start.positions))
+        step = 300_000
+        since = int(day.replace(tzinfo=timezone.utc).timestamp() * 1000) - CANDLES * step
+        async def go():
+            from exchange import close_exchange
+            try:
+                return await fetch_market([f"{s}/USDT" for s in syms], since,
+                                          int(until.replace(tzinfo=timezone.utc).timestamp() * 1000))
+            finally:
+                await close_exchange()
+        md = asyncio.run(go())
+    t0, t1 = np.searchsorted(md.ts, [day.replace(tzinfo=timezone.utc).timestamp() * 1000,
+                                     until.replace(tzinfo=timezone.utc).timestamp() * 1000])
+    md = MarketData(md.ts[:t1], md.assets, md.close[:, :t1])   # дальше дня не симулируем
+    news_rows = load_news_rows(day, until) if news else []
+    has, val = news_matrix(md, news_rows)
+    p = Prepared(md, window_indicators(md.close, CANDLES), has, val)
+    res = run(p, replace(cfg, warmup=int(t0)), start=start)
+    sim = [tr for tr in res.trades if tr["ts"] >= day]
+    out = match_trades(live, sim, tol_s=(md.ts[1] - md.ts[0]) / 1000 if len(md.ts) > 1 else 300)
+    out.update(live=len(live), sim=len(sim),
+               realized_live=sum(r["realized_pnl"] for r in live),
+               realized_sim=sum(tr["realized_pnl"] for tr in sim))
+    return out
+
+
+# ───────────────────────── CLI ─────────────────────────────────────────────
+def _main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    f = sub.add_parser("fetch")
+    f.add_argument("--pairs", nargs="+", required=True)
+    f.add_argument("--days", type=float, default=30)
+    f.add_argument("--out", default="data/market_5m.npz")
+    r = sub.add_parser("run")
+    r.add_argument("--data", required=True)
+    r.add_argument("--news", action="store_true", help="подмешать news_llm_cache")
+    r.add_argument("--threshold", type=float, default=THRESHOLD)
+    r.add_argument("--w-tech", type=float, default=W_TECH)
+    r.add_argument("--w-news", type=float, default=W_NEWS)
+    v = sub.add_parser("verify")
+    v.add_argument("--day", required=True, help="YYYY-MM-DD (UTC)")
+    v.add_argument("--data", help="MarketData .npz (день + прогрев); иначе — с биржи")
+    v.add_argument("--pairs", nargs="+", help="активы (BTC …); по умолчанию — из trades")
+    v.add_argument("--no-news", action="store_true")
+    a = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if a.cmd == "fetch":
+        import os
+        from exchange import close_exchange
+        async def go():
+            try:
+                until = int(time.time() * 1000)
+                return await fetch_market(a.pairs, until - int(a.days * 86_400_000), until)
+            finally:
+                await close_exchange()
+        md = asyncio.run(go())
+        os.makedirs(os.path.dirname(a.out) or ".", exist_ok=True)
+        md.save(a.out)
+        print(f"saved {md.close.shape} → {a.out}")
+
+    elif a.cmd == "run":
+        md = MarketData.load(a.data)
+        rows = []
+        if a.news:
+            rows = load_news_rows(datetime.utcfromtimestamp(md.ts[0] / 1000),
+                                  datetime.utcfromtimestamp(md.ts[-1] / 1000))
+        t0 = time.perf_counter()
+        res = run(prepare(md, rows), BacktestConfig(w_tech=a.w_tech, w_news=a.w_news,
+                                                    threshold=a.threshold))
+        print(res.summary(), f"{time.perf_counter() - t0:.2f}s")
+
+    else:
+        day = datetime.strptime(a.day, "%Y-%m-%d")
+        md = MarketData.load(a.data) if a.data else None
+        v = verify(day, md, a.pairs, news=not a.no_news)
+        print(f"{a.day}: trades live={v['live']} backtest={v['sim']} matched={len(v['matched'])}; "
+              f"realized live={v['realized_live']:.4f} backtest={v['realized_sim']:.4f} "
+              f"diff={v['realized_sim'] - v['realized_live']:+.6f}")
+        for tag in ("live_only", "sim_only"):
+            for tr in v[tag]:
+                print(f"  {tag:9} {tr['ts']:%H:%M:%S} {tr['side']:4} {tr['symbol']} "
+                      f"{tr['qty']:.6f} @ {tr['price']:.4f}")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,90 @@
+"""
+Конвейер статей (article_pipeline) против прежнего save_post «по одной».
+
+    python -m bench.bench_articles [--n 80] [--hosts 4] [--latency 0.15] [--llm 0.3]
+
+Офлайн: --hosts локальных aiohttp-серверов отдают одну и ту же сгенерированную
+статью (≈40 абзацев) с задержкой --latency; sink имитирует LLM-вызов
+(--llm сек, asyncio.sleep) без БД.
+    legacy   — requests.get + readability + BeautifulSoup + LLM последовательно
+    pipeline — fetch/extract/sink со стадиями и метриками
+"""
+import argparse, asyncio, random, time
+from types import SimpleNamespace
+
+import requests
+from aiohttp import web
+
+from article_pipeline import Pipeline, extract_article
+
+_WORDS = "bitcoin ether market liquidity funding rate etf flows miners halving " \
+         "volatility traders exchange reserves stablecoin yield regulators".split()
+
+def canned_html(paras: int = 40, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    body = "".join(f"<p>{' '.join(rng.choices(_WORDS, k=rng.randint(12, 40)))}.</p>"
+                   for _ in range(paras))
+    nav = "".join(f"<li><a href='/x{i}'>link {i}</a></li>" for i in range(60))
+    return (f"<html><head><title>news</title></head><body><nav><ul>{nav}</ul></nav>"
+            f"<article><h1>Headline</h1>{body}</article><footer>(c)</footer></body></html>")
+
+
+async def _hosts(k: int, latency: float, html: str):
+    async def page(_):
+        await asyncio.sleep(latency)
+        return web.Response(text=html, content_type="text/html")
+    runners, bases = [], []
+    for _ in range(k):
+        app = web.Application(); app.router.add_get("/{n}", page)
+        r = web.AppRunner(app); await r.setup()
+        site = web.TCPSite(r, "127.0.0.1", 0); await site.start()
+        runners.append(r); bases.append(f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}")
+    return runners, bases
+
+
+def _legacy(entries, llm: float) -> int:
+    done = 0
+    for e in entries:
+        html = requests.get(e.link, timeout=10).text
+        text = extract_article(html, e.summary)
+        time.sleep(llm)
+        done += bool(text)
+    return done
+
+
+async def main(n: int, hosts: int, latency: float, llm: float) -> None:
+    html = canned_html()
+    runners, bases = await _hosts(hosts, latency, html)
+    entries = [SimpleNamespace(link=f"{bases[i % hosts]}/{i}", summary="<b>short</b>",
+                               get=lambda k, d=None: "<b>short</b>") for i in range(n)]
+    t0 = time.perf_counter()
+    legacy_n = await asyncio.get_running_loop().run_in_executor(None, _legacy, entries, llm)
+    t_legacy = time.perf_counter() - t0
+
+    out = []
+    async def sink(a):
+        await asyncio.sleep(llm)
+        out.append(len(a.text))
+    p = Pipeline(sink)
+    p._ensure()
+    await asyncio.get_running_loop().run_in_executor(p._pool, extract_article, html, "")  # прогрев пула
+    t0 = time.perf_counter()
+    await p.run([("bench", e) for e in entries])
+    t_pipe = time.perf_counter() - t0
+    print(p.report())
+    print(f"{n} articles / {hosts} hosts: legacy {t_legacy:.2f}s ({legacy_n} ok), "
+          f"pipeline {t_pipe:.2f}s ({len(out)} ok, x{t_legacy / t_pipe:.1f}); "
+          f"same extracted text: {len(set(out)) == 1}")
+    await p.close()
+    for r in runners:
+        await r.cleanup()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=80)
+    ap.add_argument("--hosts", type=int, default=4)
+    ap.add_argument("--latency", type=float, default=0.15)
+    ap.add_argument("--llm", type=float, default=0.3)
+    a = ap.parse_args()
+    asyncio.run(main(a.n, a.hosts, a.latency, a.llm))
@@ -0,0 +1,54 @@
+"""
+Пакетная классификация (news_classifier) против «одна статья — один запрос».
+
+    python -m bench.bench_classifier [--n 120] [--latency 0.4] [--limit 4]
+
+Офлайн против bench.fake_llm, который держит не больше --limit
+одновременных запросов (лишние — 429) и портит каждый 25-й элемент.
+Сравниваются запросы на статью, 429-ответы и время на всю порцию.
+"""
+import argparse, asyncio, random, time
+
+import llm_client
+from llm_client import llm
+from news_classifier import BatchClassifier
+from bench.fake_llm import FakeLLMServer
+
+_WORDS = "bitcoin etf inflows miners hashrate ether staking regulators sec " \
+         "stablecoin liquidity funding shorts longs halving treasury".split()
+
+
+async def _run(srv: FakeLLMServer, texts: list[str], max_items: int) -> tuple[float, dict]:
+    stored = []
+    async def on_batch(pairs):
+        stored.extend(pairs)
+    clf = BatchClassifier(on_batch, window=0.2, max_items=max_items)
+    srv.requests = srv.rejected = 0
+    t0 = time.perf_counter()
+    res = await asyncio.gather(*(clf.submit(t, i) for i, t in enumerate(texts)))
+    dt = time.perf_counter() - t0
+    bad = sum(r[0]["reason"] == "parse_error" for r in res)
+    assert sorted(p for p, _ in stored) == list(range(len(texts)))
+    return dt, {**clf.stats, "http": srv.requests, "429": srv.rejected, "parse_error": bad}
+
+
+async def main(n: int, latency: float, limit: int) -> None:
+    rng = random.Random(1)
+    texts = [" ".join(rng.choices(_WORDS, k=rng.randint(150, 450))) for _ in range(n)]
+    srv = FakeLLMServer(latency=latency, max_concurrent=limit, malformed_every=25)
+    llm.url = await srv.start()
+    llm_client.BACKOFF_BASE = 0.5
+    for name, k in (("single", 1), ("batched", 12)):
+        dt, st = await _run(srv, texts, k)
+        print(f"{name:>8}: {dt:6.2f}s  {st['requests'] / n:.2f} LLM req/article  "
+              f"{n / dt:6.1f} articles/s  {st}")
+    await llm.close(); await srv.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=120)
+    ap.add_argument("--latency", type=float, default=0.4)
+    ap.add_argument("--limit", type=int, default=4)
+    a = ap.parse_args()
+    asyncio.run(main(a.n, a.latency, a.limit))
@@ -0,0 +1,253 @@
+"""
+Офлайн end-to-end бенчмарк: цикл графа и его части на локальных заменах.
+
+    python -m bench.bench_e2e [--sizes 8 50 200] [--cycles 30] [--ex-latency 0.02]
+                              [--llm-latency 0.3] [--dsn sqlite+aiosqlite:///…]
+                              [--only graph tech …] [--compare [FILE]] [--no-save]
+
+Биржа — bench.fake_exchange (universe = размер, ex-latency на вызов), LLM —
+bench.fake_llm, БД — SQLite-файл (aiosqlite из requirements.txt) или любой Postgres
+(--dsn postgresql+asyncpg://…), ticker-поток выключен (PRICE_STREAM=0).
+Каждый размер вселенной — отдельный процесс (--worker): чистые кэши
+модулей и честный пиковый RSS.  Компоненты:
+    graph  — workflow.ainvoke({}) целиком (после прогрева)
+    tech   — tech_agent.tech_signals()
+    news   — news_agent.news_signals() по засеянному news_llm_cache
+    ingest — rss_listener.write_batch пачками по --batch статей
+    wallet — Wallet.buy / sell по всей вселенной (без журнала)
+Для каждого: p50/p95/p99 (мс), ops/s, аллокации (tracemalloc, отдельный
+короткий прогон: пик и удержанное, КБ на операцию), пиковый RSS
+процесса; для graph — ещё средние по metrics (узлы, биржа, БД, LLM).
+
+Результат — bench/results/<commit>.json (+ "-dirty" при незакоммиченных
+изменениях); --compare сравнивает с указанным файлом или с последним
+другим результатом и помечает ухудшение больше REGRESSION.
+"""
+import argparse, asyncio, glob, json, os, platform, resource, subprocess, sys
+import tempfile, time, tracemalloc, uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+RESULTS    = os.path.join(os.path.dirname(__file__), "results")
+COMPONENTS = ("graph", "tech", "news", "ingest", "wallet")
+REGRESSION = 0.10            # +10 % к латентности / −10 % к ops/s
+ALLOC_REPS = 5
+
+
+def _pct(xs: list[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * q))] if xs else 0.0
+
+
+def _rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss      # Linux: КБ
+
+
+async def _measure(fn, reps: int, per: int = 1) -> dict:
+    """reps вызовов fn (каждый — per операций): латентность, затем аллокации."""
+    lat, t0 = [], time.perf_counter()
+    for _ in range(reps):
+        t = time.perf_counter()
+        await fn()
+        lat.append((time.perf_counter() - t) * 1000)
+    wall = time.perf_counter() - t0
+    n = min(reps, ALLOC_REPS)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(n):
+        await fn()
+    cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ops = reps * per
+    return {"n": ops, "p50_ms": round(_pct(lat, 0.5) / per, 3),
+            "p95_ms": round(_pct(lat, 0.95) / per, 3), "p99_ms": round(_pct(lat, 0.99) / per, 3),
+            "ops_s": round(ops / wall, 2) if wall else 0.0,
+            "alloc_peak_kb": round((peak - base) / 1024 / per, 2),
+            "retained_kb": round((cur - base) / 1024 / (n * per), 3),
+            "rss_kb": _rss_kb()}
+
+
+# ---------- worker: один размер вселенной ---------------------------------
+def _seed_news(size: int, per_asset: int = 5) -> None:
+    from database import sync_engine
+    from news_store import post_row, cache_row, insert_posts, insert_cache
+    d, posts, cache = sync_engine.dialect.name, [], []
+    for i in range(size * per_asset):
+        e = SimpleNamespace(link=f"https://bench.local/{uuid.uuid4()}", title=f"story {i}",
+                            get=lambda k, dflt=None: dflt)
+        p = post_row("bench", e, "body")
+        posts.append(p)
+        cache.append(cache_row(p, "txt", {"asset": f"A{i % size:04d}", "sentiment": "bullish",
+                                         "confidence": 0.3 + (i % 7) / 10, "reason": "bench"}))
+    with sync_engine.begin() as conn:
+        conn.execute(insert_posts(d), posts)
+        conn.execute(insert_cache(d), cache)
+
+
+async def worker(a) -> dict:
+    import logging
+    from bench.fake_exchange import FakeExchange
+    from bench.fake_llm import FakeLLMServer
+    import data_feed, metrics
+    from llm_client import llm
+    import rss_listener
+    logging.getLogger().setLevel(logging.WARNING)
+
+    fake = FakeExchange(universe=a.worker, latency=a.ex_latency).install()
+    data_feed.MAX_PAIRS, data_feed._pairs_cache = a.worker, None
+    srv = FakeLLMServer(latency=a.llm_latency)
+    llm.url = await srv.start()
+    await rss_listener.init_db()
+    _seed_news(a.worker)
+
+    only, out, skipped = set(a.only or COMPONENTS), {}, {}
+    try:
+        if {"graph", "tech"} & only:
+            try:
+                from graph import workflow
+                from tech_agent import tech_signals
+            except ImportError as ex:                   # pandas_ta и т.п. — не в этом окружении
+                skipped["graph"] = skipped["tech"] = str(ex)
+            else:
+                if "graph" in only:
+                    await workflow.ainvoke({})           # прогрев: markets, свечи, пул
+                    metrics._hist.clear()
+                    out["graph"] = await _measure(lambda: workflow.ainvoke({}), a.cycles)
+                    out["graph"]["calls_ms"] = {
+                        f"{name}:{','.join(str(v) for _, v in lb)}": round(h.sum / h.count * 1000, 3)
+                        for (name, lb), h in sorted(metrics._hist.items()) if h.count}
+                    out["graph"]["llm_requests"] = srv.requests
+                if "tech" in only:
+                    await tech_signals()
+                    out["tech"] = await _measure(tech_signals, a.cycles)
+        if "news" in only:
+            from news_agent import news_signals
+            out["news"] = await _measure(news_signals, a.cycles * 2)
+        if "ingest" in only:
+            from news_store import post_row
+            def batch():
+                res = []
+                for i in range(a.batch):
+                    e = SimpleNamespace(link=f"https://bench.local/{uuid.uuid4()}", title=f"t {i}",
+                                        get=lambda k, dflt=None: dflt)
+                    p = post_row("bench", e, "body " * 50)
+                    res.append(((p, "txt", str(p["post_id"])),
+                                [{"asset": "BTC", "sentiment": "bullish", "confidence": 0.6,
+                                  "reason": "bench"}]))
+                return res
+            out["ingest"] = await _measure(lambda: rss_listener.write_batch(batch()),
+                                           a.cycles, per=a.batch)
+        if "wallet" in only:
+            from wallet import Wallet, RiskParams
+            w = Wallet(cash=1e9, risk=RiskParams(cooldown_min=0, max_pos_share=1.0))
+            prices = {s.split("/")[0]: fake._price(i) for i, s in enumerate(fake.symbols)}
+            async def ops():
+                for sym, px in prices.items():
+                    w.buy(sym, px, 0.001, prices=prices)
+                    w.sell(sym, px * 1.001)
+            out["wallet"] = await _measure(ops, a.cycles, per=2 * len(prices))
+    finally:
+        await srv.stop()
+        await llm.close()
+    return {"universe": a.worker, "components": out, "skipped": skipped,
+            "exchange_calls": dict(fake.calls), "peak_rss_kb": _rss_kb()}
+
+
+# ---------- driver --------------------------------------------------------
+def _commit() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "*.py"]).returncode != 0
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "nogit"
+
+
+def _run_size(size: int, a, tmp: str) -> dict:
+    dsn = a.dsn or f"sqlite+aiosqlite:///{tmp}/bench_{size}.db"
+    env = {**os.environ, "POSTGRES_DSN": dsn, "PRICE_STREAM": "0"}
+    cmd = [sys.executable, "-m", "bench.bench_e2e", "--worker", str(size),
+           "--cycles", str(a.cycles), "--batch", str(a.batch),
+           "--ex-latency", str(a.ex_latency), "--llm-latency", str(a.llm_latency)]
+    if a.only:
+        cmd += ["--only", *a.only]
+    p = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if p.returncode != 0:
+        sys.stderr.write(p.stderr[-3000:])
+        raise SystemExit(f"worker {size} failed ({p.returncode})")
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+
+def _report(res: dict) -> None:
+    print(f"{'universe':>8} {'component':<8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'ops/s':>9} {'alloc KB':>9} {'kept KB':>8} {'RSS MB':>7}")
+    for r in res["runs"]:
+        for name, m in r["components"].items():
+            print(f"{r['universe']:>8} {name:<8} {m['p50_ms']:>9.3f} {m['p95_ms']:>9.3f} "
+                  f"{m['p99_ms']:>9.3f} {m['ops_s']:>9.1f} {m['alloc_peak_kb']:>9.2f} "
+                  f"{m['retained_kb']:>8.3f} {m['rss_kb'] / 1024:>7.1f}")
+        for name, why in r["skipped"].items():
+            print(f"{r['universe']:>8} {name:<8} skipped: {why}")
+
+
+def _compare(res: dict, path: str) -> None:
+    with open(path) as f:
+        old = json.load(f)
+    prev = {(r["universe"], c): m for r in old["runs"] for c, m in r["components"].items()}
+    print(f"\nvs {old['commit']} ({os.path.basename(path)}):")
+    for r in res["runs"]:
+        for c, m in r["components"].items():
+            o = prev.get((r["universe"], c))
+            if not o:
+                continue
+            d50 = m["p50_ms"] / o["p50_ms"] - 1 if o["p50_ms"] else 0.0
+            d95 = m["p95_ms"] / o["p95_ms"] - 1 if o["p95_ms"] else 0.0
+            dops = m["ops_s"] / o["ops_s"] - 1 if o["ops_s"] else 0.0
+            bad = d50 > REGRESSION or d95 > REGRESSION or dops < -REGRESSION
+            print(f"{'!' if bad else ' '} {r['universe']:>6} {c:<8} p50 {d50:+7.1%}  "
+                  f"p95 {d95:+7.1%}  ops/s {dops:+7.1%}")
+
+
+def main(a) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [_run_size(n, a, tmp) for n in a.sizes]
+    res = {"commit": _commit(), "date": datetime.utcnow().isoformat(timespec="seconds"),
+           "python": platform.python_version(), "dsn": (a.dsn or "sqlite").split(":")[0],
+           "args": {k: getattr(a, k) for k in ("sizes", "cycles", "batch", "ex_latency",
+                                               "llm_latency")},
+           "runs": runs}
+    _report(res)
+    path = None
+    if not a.no_save:
+        os.makedirs(RESULTS, exist_ok=True)
+        path = os.path.join(RESULTS, f"{res['commit']}.json")
+        with open(path, "w") as f:
+            json.dump(res, f, indent=1)
+        print(f"\nsaved → {os.path.relpath(path)}")
+    if a.compare is not None:
+        base = a.compare or next((p for p in sorted(glob.glob(os.path.join(RESULTS, "*.json")),
+                                                    key=os.path.getmtime, reverse=True)
+                                  if p != path), None)
+        if base:
+            _compare(res, base)
+        else:
+            print("nothing to compare with")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[8, 50, 200])
+    ap.add_argument("--cycles", type=int, default=30)
+    ap.add_argument("--batch", type=int, default=50)
+    ap.add_argument("--ex-latency", type=float, default=0.02)
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--dsn", default=None)
+    ap.add_argument("--only", nargs="+", choices=COMPONENTS)
+    ap.add_argument("--compare", nargs="?", const="", default=None)
+    ap.add_argument("--no-save", action="store_true")
+    ap.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.worker:
+        print(json.dumps(asyncio.run(worker(a))))
+    else:
+        main(a)
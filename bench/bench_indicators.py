@@ -0,0 +1,163 @@
+"""
+IndicatorEngine: сверка с pandas_ta и стоимость одного обновления.
+
+    python -m bench.bench_indicators [--candles 2000] [--check-every 25]
+                                     [--reference-only] [--record]
+
+1) reference — движок на скользящем окне CANDLES (как в tech_agent)
+   против записанных эталонных значений REF_FILE: сырые индикаторы с
+   допуском RTOL и строка reason точно.  pandas_ta не нужен — работает
+   везде; --record перезаписывает эталон через tech_agent._indicator_values.
+2) parity — живая сверка engine.peek(close) с tech_agent._indicators(df)
+   (полный пересчёт pandas_ta) на растущей истории и на скользящем окне.
+   Без pandas_ta сверка невозможна — код 2 (--reference-only — пропустить).
+3) timing — мкс на update()/peek() против одного полного пересчёта
+   pandas_ta на окне CANDLES.
+Расхождение в 1) или 2) — код 1.
+"""
+import argparse, json, math, os, sys, time
+import numpy as np, pandas as pd
+
+from indicators import IndicatorEngine, combine
+from ringbuf import RingBuffer
+
+REF_FILE = os.path.join(os.path.dirname(__file__), "indicators_ref.json")
+REF_CANDLES, REF_SEED, REF_WINDOW = 400, 11, 120
+RTOL = 1e-7
+
+
+def _series(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+
+
+def _frame(buf: RingBuffer) -> pd.DataFrame:
+    return pd.DataFrame(buf.view(), columns=["ts", "open", "high", "low", "close", "volume"])
+
+
+def _windows(close: np.ndarray, window: int):
+    """(i, buf, engine): свеча i формируется, закрытые 0..i−1 уже в движке."""
+    buf, eng = RingBuffer(window, 6), IndicatorEngine(window=window)
+    for i, x in enumerate(close):
+        buf.append([i * 300_000, x, x, x, x, 1.0])
+        yield i, buf, eng
+        eng.update(x, i * 300_000)
+
+
+# ---------- 1) эталон -------------------------------------------------------
+def record(path: str = REF_FILE) -> None:
+    from tech_agent import _indicator_values
+    close = _series(REF_CANDLES, REF_SEED)
+    points = [{"i": i, "raw": [float(v) for v in _indicator_values(_frame(buf))]}
+              for i, buf, _ in _windows(close, REF_WINDOW) if i >= 80]
+    with open(path, "w") as f:
+        json.dump({"seed": REF_SEED, "candles": REF_CANDLES, "window": REF_WINDOW,
+                   "points": points}, f, indent=0)
+    print(f"recorded {len(points)} points → {path}")
+
+
+def _close(a: float, b: float) -> bool:
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=RTOL, abs_tol=1e-12)
+
+
+def reference(path: str = REF_FILE) -> int:
+    with open(path) as f:
+        ref = json.load(f)
+    want = {p["i"]: p["raw"] for p in ref["points"]}
+    close, bad = _series(ref["candles"], ref["seed"]), 0
+    for i, _, eng in _windows(close, ref["window"]):
+        if i not in want:
+            continue
+        got = eng.raw(close[i])
+        if not all(map(_close, got, want[i])) or combine(*got) != combine(*want[i]):
+            bad += 1
+            print(f"  reference mismatch @{i}: want={want[i]} engine={list(got)}")
+    return bad
+
+
+# ---------- 2) живая сверка с pandas_ta ------------------------------------
+def parity(close: np.ndarray, every: int) -> int:
+    from tech_agent import _indicators
+    eng, bad = IndicatorEngine(), 0
+    for i, x in enumerate(close):
+        if i >= 80 and i % every == 0:
+            want = _indicators(pd.DataFrame({"close": close[:i + 1]}))
+            got  = eng.peek(x)
+            if want != got:
+                bad += 1
+                print(f"  mismatch @{i}: pandas_ta={want} engine={got}")
+        eng.update(x)
+    return bad
+
+
+def sliding(close: np.ndarray, every: int) -> int:
+    """Окно последних CANDLES свечей, последняя — незакрытая (как в _fetch)."""
+    from tech_agent import _indicators, CANDLES
+    bad = 0
+    for i, buf, eng in _windows(close, CANDLES):
+        if i >= 80 and i % every == 0:
+            want, got = _indicators(_frame(buf)), eng.peek(close[i])
+            if want != got:
+                bad += 1
+                print(f"  window mismatch @{i}: pandas_ta={want} engine={got}")
+    return bad
+
+
+# ---------- 3) время ---------------------------------------------------------
+def timing(close: np.ndarray, window: int) -> None:
+    eng = IndicatorEngine(window=window)
+    t0 = time.perf_counter()
+    for x in close:
+        eng.update(x)
+    upd = (time.perf_counter() - t0) / len(close) * 1e6
+
+    t0 = time.perf_counter()
+    for x in close[:1000]:
+        eng.peek(x)
+    pk = (time.perf_counter() - t0) / min(len(close), 1000) * 1e6
+    print(f"engine.update : {upd:8.2f} µs/candle")
+    print(f"engine.peek   : {pk:8.2f} µs/call")
+
+    try:
+        from tech_agent import _indicators
+    except ImportError as e:
+        print(f"pandas_ta full recompute: skipped ({e})")
+        return
+    df = pd.DataFrame({"close": close[-window:]})
+    reps = 50
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        _indicators(df)
+    full = (time.perf_counter() - t0) / reps * 1e6
+    print(f"pandas_ta     : {full:8.2f} µs/call (окно {window})  → x{full / pk:.0f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candles", type=int, default=2000)
+    ap.add_argument("--check-every", type=int, default=25)
+    ap.add_argument("--window", type=int, default=120)
+    ap.add_argument("--reference-only", action="store_true")
+    ap.add_argument("--record", action="store_true")
+    a = ap.parse_args()
+    if a.record:
+        record()
+        sys.exit(0)
+    close = _series(a.candles)
+
+    timing(close, a.window)
+    rbad = reference()
+    print(f"reference: {'OK' if not rbad else f'{rbad} mismatches'}")
+    if a.reference_only:
+        sys.exit(1 if rbad else 0)
+    try:
+        bad  = parity(close, a.check_every)
+        wbad = sliding(close, a.check_every)
+    except ImportError as e:
+        print(f"parity: cannot run ({e})")
+        sys.exit(2)
+    print(f"parity: {'OK' if not bad else f'{bad} mismatches'}")
+    print(f"parity (window): {'OK' if not wbad else f'{wbad} mismatches'}")
+    sys.exit(1 if rbad or bad or wbad else 0)
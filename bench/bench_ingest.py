@@ -0,0 +1,82 @@
+"""
+Round-trip'ы записи новостей за проход: по-статейно (прежний process_feed)
+против set-based news_store.
+
+    python -m bench.bench_ingest [--entries 80] [--new 10] [--db sqlite:////tmp/ingest.db]
+
+SQLite-замена Postgres (или любой sync DSN).  Проход: `entries` записей
+из лент, из них `new` ещё не в rss_posts.  Считаются SQL-запросы к БД
+(before_cursor_execute; executemany = один round-trip) и время.
+    legacy    — SELECT по post_id на запись, затем add + flush поста и кэша
+    set-based — один SELECT по всем id + INSERT … ON CONFLICT DO NOTHING
+                пачкой в rss_posts и news_llm_cache
+"""
+import argparse, os, time
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import RssPost, NewsLLMCache
+from news_store import post_uid, post_row, cache_row, select_known, insert_posts, insert_cache
+
+_BEST = {"asset": "BTC", "sentiment": "bullish", "confidence": 0.7, "reason": "bench"}
+
+
+def _entries(n: int, start: int = 0):
+    return [SimpleNamespace(link=f"https://news.example/{i}", title=f"title {i}",
+                            get=lambda k, d=None: d) for i in range(start, start + n)]
+
+
+def legacy(eng, entries) -> None:
+    with Session(eng) as s:
+        for e in entries:
+            with s.begin():
+                if s.scalar(select(RssPost.post_id).where(RssPost.post_id == post_uid(e.link))):
+                    continue
+                post = RssPost(**post_row("bench", e, "body"))
+                s.add(post); s.flush()
+                s.add(NewsLLMCache(**{k: v for k, v in cache_row(post_row("bench", e, "body"),
+                                                                   "txt", _BEST).items()}))
+                s.flush()
+
+
+def set_based(eng, entries) -> None:
+    d = eng.dialect.name
+    by_uid = {post_uid(e.link): e for e in entries}
+    with eng.begin() as conn:
+        known = set(conn.execute(select_known(list(by_uid), d)).scalars())
+        posts = [post_row("bench", e, "body") for uid, e in by_uid.items() if uid not in known]
+        if posts:
+            new = set(conn.execute(insert_posts(d), posts).scalars())
+            conn.execute(insert_cache(d), [cache_row(p, "txt", _BEST)
+                                           for p in posts if p["post_id"] in new])
+
+
+def main(n: int, fresh: int, dsn: str) -> None:
+    for name, fn in (("legacy", legacy), ("set-based", set_based)):
+        if dsn.startswith("sqlite:///") and os.path.exists(dsn[10:]):
+            os.remove(dsn[10:])
+        eng = create_engine(dsn)
+        Base.metadata.drop_all(eng, tables=[NewsLLMCache.__table__, RssPost.__table__])
+        Base.metadata.create_all(eng, tables=[RssPost.__table__, NewsLLMCache.__table__])
+        set_based(eng, _entries(n - fresh))                    # уже сохранённые
+        trips = [0]
+        event.listen(eng, "before_cursor_execute", lambda *a: trips.__setitem__(0, trips[0] + 1))
+        t0 = time.perf_counter()
+        fn(eng, _entries(n))
+        dt, rt = time.perf_counter() - t0, trips[0]
+        with eng.connect() as c:
+            cnt = c.execute(select(func.count()).select_from(NewsLLMCache)).scalar()
+        print(f"{name:>9}: {rt:4d} round-trips, {dt * 1e3:7.1f} ms, cache rows {cnt}")
+        eng.dispose()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=80)
+    ap.add_argument("--new", type=int, default=10)
+    ap.add_argument("--db", default="sqlite:////tmp/ingest.db")
+    a = ap.parse_args()
+    main(a.entries, a.new, a.db)
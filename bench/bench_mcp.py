@@ -0,0 +1,88 @@
+"""
+Латентность mcp_client против прежнего блокирующего requests.post.
+
+    python -m bench.bench_mcp [--n 50] [--delay 0.002]
+
+На локальном bench.fake_mcp (SQLite, `delay` — задержка сервера):
+    legacy       — requests.post на каждый запрос (новое соединение)
+    pooled       — await query() по очереди через keep-alive пул
+    concurrent   — n запросов через asyncio.gather
+    batch        — n запросов одним /mcp/v1/batch
+    discovery    — 2 «зависших» кандидата + живой: последовательный
+                   OPTIONS-опрос против параллельного
+"""
+import argparse, asyncio, time
+import requests
+
+from mcp_client import MCPClient, PROBE_TIMEOUT, bind
+from bench.fake_mcp import FakeMCPServer
+
+
+async def _hang_server():
+    """Принимает TCP и молчит — кандидат, который съедает весь таймаут."""
+    srv = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    return srv, f"http://127.0.0.1:{srv.sockets[0].getsockname()[1]}"
+
+
+def _legacy(base: str, sqls: list[str]) -> None:
+    for sql in sqls:
+        r = requests.post(base + "/mcp/v1/query", json={"query": sql}, timeout=10)
+        r.raise_for_status()
+
+def _legacy_discover(cands: list[str]) -> str:
+    for url in cands:
+        try:
+            if requests.options(url + "/mcp", timeout=PROBE_TIMEOUT).status_code < 500:
+                return url
+        except requests.RequestException:
+            pass
+    raise RuntimeError
+
+
+async def main(n: int, delay: float) -> None:
+    srv = FakeMCPServer(delay=delay)
+    base = await srv.start()
+    srv._run("CREATE TABLE trades (symbol TEXT, ts TEXT, qty REAL)")
+    srv._run("INSERT INTO trades VALUES ('BTC', '2024-01-01', 1.0), ('ETH', '2024-01-02', 2.0)")
+    stmts = [("SELECT * FROM trades WHERE symbol = :s AND qty > :q", {"s": "BTC", "q": i / n})
+             for i in range(n)]
+    c = MCPClient([base])
+    sqls = [bind(*s) for s in stmts]
+
+    loop = asyncio.get_running_loop()
+    t0 = time.perf_counter(); await loop.run_in_executor(None, _legacy, base, sqls)
+    res = {"legacy": time.perf_counter() - t0}
+
+    await c.discover()
+    t0 = time.perf_counter()
+    for s in stmts:
+        await c.query(*s)
+    res["pooled"] = time.perf_counter() - t0
+    t0 = time.perf_counter(); await asyncio.gather(*(c.query(*s) for s in stmts))
+    res["concurrent"] = time.perf_counter() - t0
+    t0 = time.perf_counter(); out = await c.batch(stmts)
+    res["batch"] = time.perf_counter() - t0
+    assert len(out) == n and out[0]["rows"][0]["symbol"] == "BTC"
+
+    for name, sec in res.items():
+        print(f"{name:>10}: {sec * 1e3:8.1f} ms total, {sec / n * 1e3:6.2f} ms/query"
+              f"  (x{res['legacy'] / sec:.1f})")
+    await c.close()
+
+    h1, u1 = await _hang_server(); h2, u2 = await _hang_server()
+    cands = [u1, u2, base]
+    t0 = time.perf_counter(); await loop.run_in_executor(None, _legacy_discover, cands)
+    t1 = time.perf_counter(); d = MCPClient(cands); await d.discover(); t2 = time.perf_counter()
+    print(f" discovery: serial {t1 - t0:.2f}s, parallel {t2 - t1:.2f}s → {d.base == base}")
+    await d.close()
+    for h in (h1, h2):
+        h.close()
+    await srv.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50)
+    ap.add_argument("--delay", type=float, default=0.002)
+    a = ap.parse_args()
+    asyncio.run(main(a.n, a.delay))
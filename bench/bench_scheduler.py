@@ -0,0 +1,99 @@
+"""
+Задержка реакции на событие: прежний цикл «collect → decide → sleep 45 с»
+против scheduler.CycleScheduler.
+
+    python -m bench.bench_scheduler [--events 40] [--scale 0.02]
+
+Время сжато в 1/scale раз: collect 1.5 с, decide (LLM) 6 с, интервал 45 с,
+свеча — 300 с.  События (новость / движение цены) приходят пуассоновским
+потоком, в среднем раз в 20 с.  Для каждого события считается, через
+сколько стартует decide на данных, собранных после него (lag), — в
+секундах «реального» времени.
+"""
+import argparse, asyncio, random, time
+
+import scheduler
+from scheduler import CycleScheduler, _pct
+
+COLLECT, DECIDE, INTERVAL, CANDLE, MEAN_GAP = 1.5, 6.0, 45.0, 300.0, 20.0
+
+
+def _report(name: str, lags: list[float], cycles: int, scale: float) -> None:
+    lags = [x / scale for x in lags]
+    print(f"{name:>9}: {cycles:3d} cycles  lag p50 {_pct(lags, 0.5):6.1f}s  "
+          f"p95 {_pct(lags, 0.95):6.1f}s  max {max(lags):6.1f}s")
+
+
+async def _events(times: list[float], fire) -> None:
+    t0 = time.monotonic()
+    for t in times:
+        await asyncio.sleep(max(0.0, t0 + t - time.monotonic()))
+        fire(t0 + t)
+
+
+async def legacy(times: list[float], scale: float) -> tuple[list[float], int]:
+    arrived, lags, cycles = [], [], 0
+    async def loop():
+        nonlocal cycles
+        while True:
+            t_col = time.monotonic()
+            await asyncio.sleep(COLLECT * scale)
+            now = time.monotonic()
+            lags.extend(now - t for t in arrived if t <= t_col)
+            arrived[:] = [t for t in arrived if t > t_col]
+            cycles += 1
+            await asyncio.sleep(DECIDE * scale)
+            await asyncio.sleep(INTERVAL * scale)
+    task = asyncio.create_task(loop())
+    await _events(times, arrived.append)
+    while arrived:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    return lags, cycles
+
+
+async def event_driven(times: list[float], scale: float) -> tuple[list[float], int]:
+    arrived, lags = [], []
+    async def collect():
+        t_col = time.monotonic()
+        await asyncio.sleep(COLLECT * scale)
+        return {"prices": {}, "t_col": t_col}
+    async def decide(state):
+        now = time.monotonic()
+        lags.extend(now - t for t in arrived if t <= state["t_col"])
+        arrived[:] = [t for t in arrived if t > state["t_col"]]
+        await asyncio.sleep(DECIDE * scale)
+        return {}
+    async def on_cycle(*_):
+        pass
+    scheduler.REFRESH_AFTER = 1e9
+    sched = CycleScheduler(collect, decide, on_cycle, candle=CANDLE * scale,
+                           max_interval=INTERVAL * scale, min_gap=0.5 * scale)
+    def fire(t):
+        arrived.append(t); sched.trigger("news")
+    task = asyncio.create_task(sched.run())
+    await _events(times, fire)
+    while arrived:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    print(f"{'':>9}  scheduler: {sched.stats()}")
+    return lags, sched.counts["cycles"]
+
+
+async def main(n: int, scale: float) -> None:
+    rng, t, times = random.Random(7), 0.0, []
+    for _ in range(n):
+        t += rng.expovariate(1 / MEAN_GAP) * scale
+        times.append(t)
+    for name, fn in (("legacy", legacy), ("scheduler", event_driven)):
+        lags, cycles = await fn(times, scale)
+        _report(name, lags, cycles, scale)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=40)
+    ap.add_argument("--scale", type=float, default=0.02)
+    a = ap.parse_args()
+    asyncio.run(main(a.events, a.scale))
@@ -0,0 +1,63 @@
+"""
+Пакетный скоринг (indicators.score_batch) против по-символьного пути.
+
+    python -m bench.bench_tech_batch [--sizes 8 100 500] [--candles 120]
+
+Для каждого размера вселенной:
+    per-asset pandas_ta — tech_agent._indicators(df) на каждый символ
+                          (исходный путь tech_signals; если pandas_ta есть)
+    per-asset engine    — IndicatorEngine.peek() по прогретому состоянию
+    batch               — одна матрица (символы × свечи)
+и число расхождений batch против pandas_ta по (score, reason).
+"""
+import argparse, time
+import numpy as np, pandas as pd
+
+from indicators import IndicatorEngine, score_batch
+
+
+def _closes(n: int, t: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.003, (n, t)), axis=1))
+
+
+def _ms(fn, reps: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        out = fn()
+    return (time.perf_counter() - t0) / reps * 1e3, out
+
+
+def run(n: int, t: int) -> None:
+    closes = _closes(n, t)
+    reps = max(1, 200 // n)
+
+    batch_ms, batch = _ms(lambda: score_batch(closes), reps)
+
+    engines = []
+    for row in closes:
+        e = IndicatorEngine()
+        for x in row[:-1]:
+            e.update(x)
+        engines.append(e)
+    eng_ms, _ = _ms(lambda: [e.peek(r[-1]) for e, r in zip(engines, closes)], reps)
+
+    line = f"{n:>5} symbols | batch {batch_ms:8.2f} ms | engine {eng_ms:8.2f} ms"
+    try:
+        from tech_agent import _indicators
+    except ImportError:
+        print(line + " | pandas_ta: n/a")
+        return
+    frames = [pd.DataFrame({"close": r}) for r in closes]
+    pta_ms, ref = _ms(lambda: [_indicators(df) for df in frames], 1)
+    bad = sum(a != b for a, b in zip(ref, batch))
+    print(line + f" | pandas_ta {pta_ms:8.2f} ms (x{pta_ms / batch_ms:.0f}) | mismatches {bad}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[8, 100, 500])
+    ap.add_argument("--candles", type=int, default=120)
+    a = ap.parse_args()
+    for n in a.sizes:
+        run(n, a.candles)
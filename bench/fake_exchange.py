@@ -0,0 +1,90 @@
+"""
+Локальная замена ccxt-клиента Binance для офлайн-бенчмарков.
+
+Тот же async-интерфейс, что используют exchange / data_feed / tech_agent:
+load_markets, fetch_tickers, fetch_ticker, fetch_ohlcv, parse_timeframe,
+milliseconds, close.  universe — число пар X/USDT (все проходят фильтр
+объёма data_feed), latency — задержка каждого «сетевого» вызова.  Цены и
+свечи детерминированы (seed, номер пары, номер бара); каждый
+fetch_tickers сдвигает цены на шаг случайного блуждания.  calls —
+счётчик вызовов по методам.
+
+    fake = FakeExchange(universe=200, latency=0.02)
+    fake.install()            # exchange.get_exchange() → fake
+"""
+import asyncio, math, time
+from collections import Counter
+
+import numpy as np
+
+_BASES = ["BTC", "ETH", "SOL", "BNB", "XRP", "DOGE", "ADA", "AVAX"]
+
+
+class FakeExchange:
+    def __init__(self, universe: int = 50, latency: float = 0.02, seed: int = 1):
+        self.latency = latency
+        bases = _BASES[:universe] + [f"A{i:04d}" for i in range(max(0, universe - len(_BASES)))]
+        self.symbols = [f"{b}/USDT" for b in bases]
+        self._idx    = {s: i for i, s in enumerate(self.symbols)}
+        self._rng    = np.random.default_rng(seed)
+        self._base   = 10 ** self._rng.uniform(-1, 4, universe)       # 0.1 … 10 000
+        self._walk   = np.zeros(universe)
+        self.markets: dict = {}
+        self.calls   = Counter()
+
+    async def _net(self, name: str) -> None:
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _price(self, i: int) -> float:
+        return float(self._base[i] * math.exp(self._walk[i]))
+
+    def _ticker(self, s: str) -> dict:
+        i = self._idx[s]
+        return {"symbol": s, "last": self._price(i), "quoteVolume": 1e10 / (1 + i)}
+
+    # ---------- ccxt API --------------------------------------------------
+    async def load_markets(self, reload: bool = False) -> dict:
+        await self._net("load_markets")
+        self.markets = {s: {"symbol": s, "active": True} for s in self.symbols}
+        return self.markets
+
+    async def fetch_tickers(self, symbols=None) -> dict:
+        await self._net("fetch_tickers")
+        self._walk += self._rng.normal(0, 0.002, len(self._walk))
+        return {s: self._ticker(s) for s in (symbols or self.symbols) if s in self._idx}
+
+    async def fetch_ticker(self, symbol: str) -> dict:
+        await self._net("fetch_ticker")
+        return self._ticker(symbol)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = "5m", since=None,
+                          limit: int = 120) -> list[list[float]]:
+        await self._net("fetch_ohlcv")
+        step = self.parse_timeframe(timeframe) * 1000
+        last = self.milliseconds() // step                   # текущий (незакрытый) бар
+        first = max(since // step, last - limit + 1) if since else last - limit + 1
+        n = np.arange(first, last + 1, dtype=np.float64)
+        k = self._idx.get(symbol, 0)
+        close = self._price(k) * np.exp(0.01 * np.sin(n * 0.07 + k) + 0.004 * np.sin(n * 0.53 + 2 * k))
+        open_ = np.r_[close[0], close[:-1]]
+        return [[int(t * step), o, max(o, c) * 1.001, min(o, c) * 0.999, c, 1000.0]
+                for t, o, c in zip(n, open_, close)]
+
+    def parse_timeframe(self, tf: str) -> int:
+        return int(tf[:-1]) * {"m": 60, "h": 3600, "d": 86400}[tf[-1]]
+
+    def milliseconds(self) -> int:
+        return int(time.time() * 1000)
+
+    async def close(self) -> None:
+        pass
+
+    # ---------- подмена -----------------------------------------------------
+    def install(self) -> "FakeExchange":
+        """exchange.get_exchange() в любом event-loop отдаёт этот объект."""
+        import exchange
+        exchange._build = lambda loop: self
+        exchange._client = exchange._loop = None
+        return self
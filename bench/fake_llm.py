@@ -0,0 +1,95 @@
+"""
+Локальная замена OpenRouter chat/completions для офлайн-проверок llm_client.
+
+Отвечает через `latency` секунд; ответ — JSON в формате, который ждёт
+запрос (приказы для decide_llm, sentiment для rss_listener; для пачки
+news_classifier — объект по id «### aN», malformed_every = N портит
+каждый N-й элемент).  max_concurrent > 0 отдаёт 429,
+если одновременных запросов больше; rate_limit_every = N — каждый N-й
+запрос получает 429 с Retry-After.  Счётчики: requests, rejected,
+peak (максимум одновременных).
+
+    python -m bench.fake_llm --port 8790 --latency 0.3
+    LLM_BASE_URL=http://127.0.0.1:8790/api/v1/chat/completions python rss_listener.py
+"""
+import argparse, asyncio, json, re
+from aiohttp import web
+
+_ORDERS = [{"asset": "BTC", "action": "HOLD", "size_pct": 0.0, "reason": "fake llm hold signal"}]
+_NEWS   = [{"asset": "BTC", "sentiment": "neutral", "confidence": 0.5, "reason": "fake llm"}]
+
+
+class FakeLLMServer:
+    def __init__(self, latency: float = 0.05, max_concurrent: int = 0,
+                 rate_limit_every: int = 0, retry_after: float | None = None,
+                 malformed_every: int = 0):
+        self.latency, self.max_concurrent = latency, max_concurrent
+        self.malformed_every, self.items = malformed_every, 0
+        self.rate_limit_every, self.retry_after = rate_limit_every, retry_after
+        self.requests = self.rejected = self.peak = 0
+        self._inflight = 0
+        self._runner: web.AppRunner | None = None
+
+    def _reject(self) -> web.Response:
+        self.rejected += 1
+        hdr = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+        return web.json_response({"error": {"code": 429}}, status=429, headers=hdr)
+
+    async def _chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            return self._reject()
+        if self.max_concurrent and self._inflight >= self.max_concurrent:
+            return self._reject()
+        self._inflight += 1
+        self.peak = max(self.peak, self._inflight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self._inflight -= 1
+        system = body["messages"][0]["content"]
+        ids = re.findall(r"^### (\S+)", body["messages"][-1]["content"], re.M)
+        answer = _ORDERS if "трейдер" in system else _NEWS
+        if ids:
+            answer = {}
+            for i in ids:
+                self.items += 1
+                bad = self.malformed_every and self.items % self.malformed_every == 0
+                answer[i] = [{**_NEWS[0], "confidence": "high"}] if bad else _NEWS
+        words = sum(len(m["content"].split()) for m in body["messages"])
+        return web.json_response({
+            "choices": [{"message": {"role": "assistant",
+                                     "content": json.dumps(answer, ensure_ascii=False)}}],
+            "usage": {"prompt_tokens": words, "completion_tokens": 20},
+        })
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Поднимает сервер и возвращает URL chat/completions (port=0 — свободный порт)."""
+        app = web.Application()
+        app.router.add_post("/api/v1/chat/completions", self._chat)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/api/v1/chat/completions"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def _main(args):
+    srv = FakeLLMServer(args.latency, args.max_concurrent, args.rate_limit_every)
+    print("fake LLM on", await srv.start(args.host, args.port))
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8790)
+    ap.add_argument("--latency", type=float, default=0.3)
+    ap.add_argument("--max-concurrent", type=int, default=0)
+    ap.add_argument("--rate-limit-every", type=int, default=0)
+    asyncio.run(_main(ap.parse_args()))
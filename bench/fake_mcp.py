@@ -0,0 +1,80 @@
+"""
+Локальная замена MCP-Alchemy для офлайн-проверок mcp_client.
+
+Тот же HTTP-контракт, что у сервера в docker-compose (OPTIONS /mcp,
+POST /mcp/v1/query → {"rows"}, /mcp/v1/execute → {"rowcount"}) плюс
+/mcp/v1/batch → {"results"}; SQL выполняется на SQLite через SQLAlchemy.
+delay — искусственная задержка на каждый запрос (имитация сети/БД),
+batch=False — сервер без batch-эндпоинта (проверка fallback).
+
+    python -m bench.fake_mcp --port 3333 --delay 0.005
+    MCP_SERVER_URL=http://127.0.0.1:3333 python ...
+"""
+import argparse, asyncio, json
+from aiohttp import web
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+
+class FakeMCPServer:
+    def __init__(self, db_url: str = "sqlite://", delay: float = 0.0, batch: bool = True):
+        self.engine = create_engine(db_url, poolclass=StaticPool,
+                                    connect_args={"check_same_thread": False})
+        self.delay, self.batch = delay, batch
+        self.requests = 0
+        self._runner: web.AppRunner | None = None
+
+    def _run(self, sql: str) -> dict:
+        with self.engine.begin() as conn:
+            res = conn.execute(text(sql))
+            if res.returns_rows:
+                return {"rows": [dict(r._mapping) for r in res]}
+            return {"rowcount": res.rowcount}
+
+    async def _handle(self, request: web.Request, many: bool) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        try:
+            if many:
+                out = {"results": [self._run(q) for q in body["queries"]]}
+            else:
+                out = self._run(body["query"])
+        except Exception as ex:
+            return web.json_response({"detail": str(ex)}, status=400)
+        return web.json_response(out, dumps=lambda o: json.dumps(o, default=str))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Поднимает сервер и возвращает base-URL (port=0 — свободный порт)."""
+        app = web.Application()
+        app.router.add_route("OPTIONS", "/mcp", lambda r: web.Response())
+        app.router.add_post("/mcp/v1/query",   lambda r: self._handle(r, False))
+        app.router.add_post("/mcp/v1/execute", lambda r: self._handle(r, False))
+        if self.batch:
+            app.router.add_post("/mcp/v1/batch", lambda r: self._handle(r, True))
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def _main(args):
+    srv = FakeMCPServer(args.db, args.delay, not args.no_batch)
+    print("fake MCP-Alchemy on", await srv.start(args.host, args.port))
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=3333)
+    ap.add_argument("--db", default="sqlite://")
+    ap.add_argument("--delay", type=float, default=0.0)
+    ap.add_argument("--no-batch", action="store_true")
+    asyncio.run(_main(ap.parse_args()))
@@ -0,0 +1,91 @@
+"""
+Локальная замена websocket-потока Binance для офлайн-проверок price_stream.
+
+Понимает SUBSCRIBE/UNSUBSCRIBE на <sym>@miniTicker и раз в `interval`
+секунд шлёт 24hrMiniTicker по каждой подписанной паре (случайное
+блуждание цены).  drop_every > 0 рвёт соединение каждые N секунд —
+так проверяется переподключение и повторная подписка.
+
+    python -m bench.fake_ticker_ws --port 8765
+    PRICE_STREAM_URL=ws://localhost:8765/ws streamlit run app.py
+"""
+import argparse, asyncio, json, random, time
+from aiohttp import web, WSMsgType
+
+
+class FakeTickerServer:
+    def __init__(self, interval: float = 0.2, drop_every: float = 0.0,
+                 base_price: float = 100.0):
+        self.interval, self.drop_every = interval, drop_every
+        self.base_price = base_price
+        self.prices: dict[str, float] = {}
+        self.connections = 0
+        self._runner: web.AppRunner | None = None
+
+    def _tick(self, sym: str) -> dict:
+        px = self.prices.get(sym, self.base_price)
+        px *= 1 + random.uniform(-0.001, 0.001)
+        self.prices[sym] = px
+        return {"e": "24hrMiniTicker", "E": int(time.time() * 1000),
+                "s": sym, "c": f"{px:.8f}"}
+
+    async def _ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        subs: set[str] = set()
+        started = time.monotonic()
+
+        async def pump():
+            while not ws.closed:
+                for sym in list(subs):
+                    await ws.send_str(json.dumps(self._tick(sym)))
+                if self.drop_every and time.monotonic() - started > self.drop_every:
+                    await ws.close()
+                    return
+                await asyncio.sleep(self.interval)
+
+        task = asyncio.create_task(pump())
+        try:
+            async for m in ws:
+                if m.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(m.data)
+                streams = {p.split("@")[0].upper() for p in req.get("params", [])}
+                if req.get("method") == "SUBSCRIBE":
+                    subs |= streams
+                elif req.get("method") == "UNSUBSCRIBE":
+                    subs -= streams
+                await ws.send_str(json.dumps({"result": None, "id": req.get("id")}))
+        finally:
+            task.cancel()
+        return ws
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Поднимает сервер и возвращает ws-URL (port=0 — свободный порт)."""
+        app = web.Application()
+        app.router.add_get("/ws", self._ws)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{port}/ws"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def _main(args):
+    srv = FakeTickerServer(args.interval, args.drop_every)
+    print("fake ticker stream on", await srv.start(args.host, args.port))
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--interval", type=float, default=0.2)
+    ap.add_argument("--drop-every", type=float, default=0.0)
+    asyncio.run(_main(ap.parse_args()))
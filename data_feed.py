@@ -3,7 +3,9 @@
 пары, которых нет на Binance -> больше нет лавины ошибок в логе.
 """
 import asyncio, heapq, logging, time
-import ccxt.async_support as ccxt
+from exchange import get_exchange, markets
+from metrics import timer
+from price_stream import ticker_stream, STREAM_ENABLED
 
 logger = logging.getLogger(__name__)
 
@@ -12,39 +14,13 @@ VOL_MIN   = 50_000_000
 MAX_PAIRS = 8
 TTL_PAIRS = 3600
 
-# ---------- helpers -------------------------------------------------------
-def _make_client():
-    """Создает и возвращает асинхронный клиент CCXT Binance."""
-    return ccxt.binance({
-        "enableRateLimit": True,
-        "timeout": 15000, # Увеличим таймаут на всякий случай
-        # Если нужны API ключи, их можно передать здесь из переменных окружения
-        # 'apiKey': os.getenv('BINANCE_API_KEY'),
-        # 'secret': os.getenv('BINANCE_SECRET_KEY'),
-    })
-
-async def _load_markets():
-    # Используем _make_client для создания клиента
-    async with _make_client() as c:
-        return await c.load_markets()
-
-_markets_cache: tuple[dict, float] | None = None
-
-async def _markets():
-    global _markets_cache
-    now = time.time()
-    if not _markets_cache or now - _markets_cache[1] > 900:
-        _markets_cache = (await _load_markets(), now)
-    return _markets_cache[0]
-
 # ---------- TOP PAIRS -----------------------------------------------------
 _pairs_cache: tuple[list[str], float] | None = None
 
 async def _calc_pairs() -> list[str]:
-    mkts = await _markets()
-    # Используем _make_client для создания клиента
-    async with _make_client() as c:
-        tickers = await c.fetch_tickers()
+    mkts = await markets()          # общий кэш шлюза exchange
+    with timer("exchange_seconds", call="fetch_tickers"):
+        tickers = await get_exchange().fetch_tickers()
     pool=[]
     for sym,t in tickers.items():
         if not sym.endswith("/USDT") or sym not in mkts: continue
@@ -65,15 +41,31 @@ async def ensure_pairs()->list[str]:
 # ---------- PRICES --------------------------------------------------------
 async def _safe_price(pair):
     try:
-        # Используем _make_client для создания клиента
-        async with _make_client() as c:
-            t=await c.fetch_ticker(pair)
-            return pair.split("/")[0], t["last"] or 0.0
+        with timer("exchange_seconds", call="fetch_ticker"):
+            t=await get_exchange().fetch_ticker(pair)
+        return pair.split("/")[0], t["last"] or 0.0
     except Exception as e:
         logger.debug("ticker %s err: %s", pair, e)
         return pair.split("/")[0], None
 
+async def _rest_prices(pairs)->dict[str,float]:
+    """Один батч-запрос fetch_tickers(symbols); при ошибке — поштучно."""
+    try:
+        with timer("exchange_seconds", call="fetch_tickers"):
+            tickers=await get_exchange().fetch_tickers(pairs)
+        return {s.split("/")[0]: t["last"] or 0.0
+                for s,t in tickers.items() if s in pairs}
+    except Exception as e:
+        logger.debug("tickers batch err: %s", e)
+    res=await asyncio.gather(*[asyncio.create_task(_safe_price(p)) for p in pairs])
+    return {b:p for b,p in res if p is not None}
+
 async def get_last_prices()->dict[str,float]:
     pairs=await ensure_pairs()
-    res=await asyncio.gather(*[asyncio.create_task(_safe_price(p)) for p in pairs])
-    return {b:p for b,p in res if p is not None}
\ No newline at end of file
+    if not STREAM_ENABLED:
+        return await _rest_prices(pairs)
+    await ticker_stream.ensure(pairs)
+    fresh,stale=ticker_stream.split(pairs)       # таблица в памяти, без сети
+    if stale:                                    # поток отстал/ещё не прогрелся
+        fresh.update(await _rest_prices(stale))
+    return fresh
@@ -30,6 +30,7 @@ AsyncSession = AsyncSessionLocal
 # ─── синхронный (psycopg) ───────────────────────────────────────────────
 sync_engine_dsn = (
     DB_DSN.replace("postgresql+asyncpg", "postgresql+psycopg")
+          .replace("sqlite+aiosqlite", "sqlite")          # офлайн-бенчмарки
           .replace("localhost", "postgres")
 )
 sync_engine = create_engine(sync_engine_dsn, echo=False)
@@ -14,7 +14,11 @@ _SENT_MAP = {
 def fuse_and_trade(news_sig: List[Dict],
                    tech_sig: List[Dict],
                    wallet,
-                   prices: Dict[str, float]) -> List[str]:
+                   prices: Dict[str, float],
+                   *,
+                   w_tech: float = W_TECH,
+                   w_news: float = W_NEWS,
+                   threshold: float = THRESHOLD) -> List[str]:
 
     # агрегируем новости по активу
     n_map: Dict[str, List[float]] = {}
@@ -44,19 +48,38 @@ def fuse_and_trade(news_sig: List[Dict],
 
         if a in n_map:
             s_news = sum(n_map[a]) / len(n_map[a])
-            w_news, w_tech = W_NEWS, W_TECH
+            wn, wt = w_news, w_tech
         else:
             s_news = 0.0                     # нет новости → чистая техника
-            w_news, w_tech = 0.0, 1.0
+            wn, wt = 0.0, 1.0
 
-        score = w_tech * s_tech + w_news * s_news
+        score = wt * s_tech + wn * s_news
 
-        if score >= THRESHOLD:
+        if score >= threshold:
             wallet.buy(a, prices[a], pct=0.05, prices=prices)
             reasons.append(f"{a}: score {score:+.2f} → BUY")
-        elif score <= -THRESHOLD:
+        elif score <= -threshold:
             wallet.sell(a, prices[a])
             reasons.append(f"{a}: score {score:+.2f} → SELL")
         else:
             reasons.append(f"{a}: score {score:+.2f} → HOLD")
     return reasons
+
+
+def drawdown_cut(wallet, prices: Dict[str, float]) -> List[str]:
+    """Режем худшие позиции по 50 %, пока просадка не уйдёт ниже dd_stop."""
+    reasons: List[str] = []
+    equity = wallet.total_equity(prices)
+    drawdn = max(0, -wallet.unrealized_pnl(prices) / equity)
+    if drawdn > wallet.risk.dd_trigger:
+        losers = sorted(wallet.positions.items(),
+                        key=lambda kv: (prices.get(kv[0], 0)-kv[1].entry_price)/kv[1].entry_price)
+        for sym, _ in losers:
+            if sym in prices:
+                wallet.sell(sym, prices[sym], pct=0.5)
+                reasons.append(f"{sym}: cut DD {drawdn:.2%}")
+                equity = wallet.total_equity(prices)
+                drawdn = max(0, -wallet.unrealized_pnl(prices) / equity)
+                if drawdn <= wallet.risk.dd_stop:
+                    break
+    return reasons
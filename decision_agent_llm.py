@@ -4,37 +4,37 @@ LLM-узел графа:
     • робастный парсер (_safe_load_orders) – режет markdown, лишние \n
     • fallback-rule включается только после всех попыток
     • Key-synonyms нормализуются («size», «SIZE_PCT», action в любом регистре)
+    • кэш решений: тот же квантованный «отпечаток» входов цикла (тех-score,
+      новости, открытые позиции, cooldown'ы — без цен) в пределах TTL и
+      допустимого дрейфа цен → приказы берутся из кэша без вызова LLM
+    • ядро decide_for() работает с любым кошельком / кэшем / вызовом LLM —
+      на нём стратегии portfolio; decide_llm — узел графа для глобального wallet
 """
 
-import os, re, json, asyncio, logging, traceback, requests
+import re, json, time, asyncio, hashlib, logging, traceback
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List
 
-from wallet import wallet, DD_TRIGGER, DD_STOP, SIZE_PCT_LIMIT, COOLDOWN_MIN
-from decision_agent import fuse_and_trade
+from wallet import wallet, COOLDOWN_MIN
+from decision_agent import fuse_and_trade, drawdown_cut
+from llm_client     import llm
 
 logger = logging.getLogger(__name__)
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL    = "google/gemini-2.5-pro-preview"
-BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEADLINE = 45                         # сек на вызов, включая 429-паузы
 MAX_ATTEMPTS = 2                      # ← попробуем LLM два раза
 
+CACHE_TTL    = 300                    # сек жизни решения
+CACHE_SIZE   = 64                     # отпечатков в LRU
+PRICE_DRIFT  = 0.005                  # макс. |Δp/p| по активам приказов
+SCORE_STEP   = 0.1                    # квант тех-score
+CONF_STEP    = 0.2                    # квант confidence новостей
 
-# ───────────────────────── HTTP  ──────────────────────────────────────────
-def _http_llm(messages: List[Dict]) -> str:
-    pay = {"model": MODEL, "temperature": .15, "messages": messages}
-    hdr = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type":  "application/json",
-        "HTTP-Referer":  "http://localhost",
-        "X-Title":       "crypto-multi-agent-mvp",
-    }
-    r = requests.post(BASE_URL, json=pay, headers=hdr, timeout=45)
-    r.raise_for_status()
-    return r.json()["choices"][0]["message"]["content"]
 
-async def _call_llm(prompt: str) -> str:
+# ───────────────────────── LLM  ───────────────────────────────────────────
+async def _call_llm(prompt: str, model: str = MODEL, temperature: float = .15) -> str:
     SYSTEM = (
         "Ты внутридневной крипто-трейдер. Верни *ТОЛЬКО* JSON-массив приказов\n"
         "[{\"asset\":\"BTC\",\"action\":\"BUY|SELL|HOLD\",\"size_pct\":0.03,"
@@ -46,8 +46,7 @@ async def _call_llm(prompt: str) -> str:
     )
     msg = [{"role": "system", "content": SYSTEM},
            {"role": "user",   "content": prompt}]
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _http_llm, msg)
+    return await llm.chat(msg, model=model, temperature=temperature, deadline=DEADLINE)
 
 
 # ───────────────────────── robust JSON parse ──────────────────────────────
@@ -71,25 +70,97 @@ def _safe_load_orders(raw: str) -> list[dict]:
         return []
 
 
-# ─────────────────────── LangGraph-node ───────────────────────────────────
-async def decide_llm(state: Dict) -> Dict:
-    prices, tech, news = state["prices"], state["tech"], state["news"]
-
+# ───────────────────────── кэш решений ────────────────────────────────────
+def _fingerprint(tech: list[dict], news: list[dict], wallet) -> str:
+    """Канонический квантованный ключ входов цикла (цены не входят)."""
+    assets = {t["asset"] for t in tech} | {n["asset"] for n in news} | set(wallet.positions)
+    key = {
+        "tech": sorted((t["asset"], round(t["score"] / SCORE_STEP)) for t in tech),
+        "news": sorted((n["asset"], n["sentiment"], round(n["confidence"] / CONF_STEP))
+                       for n in news),
+        "pos":  sorted(wallet.positions),
+        "cd":   sorted(a for a in assets if wallet.in_cooldown(a)),
+    }
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+class DecisionCache:
+    """LRU + TTL; попадание только если цены активов приказов не уплыли."""
+    def __init__(self, size: int = CACHE_SIZE, ttl: float = CACHE_TTL,
+                 drift: float = PRICE_DRIFT, clock=time.time):
+        self.size, self.ttl, self.drift, self.clock = size, ttl, drift, clock
+        self._d: OrderedDict[str, tuple[float, list[dict], dict]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "drifted": 0}
+
+    def get(self, key: str, prices: Dict[str, float]) -> list[dict] | None:
+        ent = self._d.get(key)
+        if ent is None:
+            self.stats["misses"] += 1
+            return None
+        ts, orders, px0 = ent
+        if self.clock() - ts > self.ttl:
+            del self._d[key]
+            self.stats["expired"] += 1
+            return None
+        for a, p0 in px0.items():
+            p = prices.get(a)
+            if p is None or abs(p / p0 - 1) > self.drift:
+                self.stats["drifted"] += 1
+                return None
+        self._d.move_to_end(key)
+        self.stats["hits"] += 1
+        return orders
+
+    def put(self, key: str, orders: list[dict], prices: Dict[str, float]) -> None:
+        syms = {(o.get("asset") or "").upper() for o in orders}
+        self._d[key] = (self.clock(), orders, {a: prices[a] for a in syms if prices.get(a)})
+        self._d.move_to_end(key)
+        while len(self._d) > self.size:
+            self._d.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = sum(self.stats.values())
+        return self.stats["hits"] / total if total else 0.0
+
+
+decision_cache = DecisionCache()
+
+
+# ─────────────────────── ядро решения ─────────────────────────────────────
+def build_prompt(prices, tech, news) -> str:
     txt  = ["Текущие цены:"] + [f"{a}:{p}" for a, p in prices.items()]
     txt += ["\nТех-сигналы:"] + [f"{t['asset']} {t['score']:+.2f}" for t in tech]
     txt += ["\nНовости:"]    + [f"{n['asset']} {n['sentiment']} {n['confidence']:.2f}" for n in news]
-    prompt = "\n".join(txt)[:4000]
+    return "\n".join(txt)[:4000]
+
+
+async def decide_for(state: Dict, w, *, cache: DecisionCache | None = None,
+                     ask=_call_llm, use_llm: bool = True, **fuse_kw) -> tuple[list[str], str]:
+    """
+    Решение цикла для кошелька w: приказы LLM (или кэша) → исполнение,
+    иначе rule-based fuse_and_trade(**fuse_kw).  ask(prompt) — вызов LLM
+    (portfolio подставляет общий на цикл).  Возвращает (reasons, tag).
+    """
+    cache = decision_cache if cache is None else cache
+    prices, tech, news = state["prices"], state["tech"], state["news"]
+    prompt = build_prompt(prices, tech, news)
 
-    orders: list[dict] = []
-    reason_tag = "LLM decision"
+    reason_tag = "LLM decision" if use_llm else "rule-based"
+    fp     = _fingerprint(tech, news, w)
+    orders = (cache.get(fp, prices) or []) if use_llm else []
+    if orders:
+        reason_tag = f"LLM decision (cached, hit-rate {cache.hit_rate:.0%})"
+    attempts = 0 if orders or not use_llm else MAX_ATTEMPTS
 
-    # ----------- 1-2 попытки LLM ------------------------------------------
-    for attempt in range(1, MAX_ATTEMPTS + 1):
+    # ----------- 1-2 попытки LLM (если нет в кэше) ------------------------
+    for attempt in range(1, attempts + 1):
         try:
-            raw = await _call_llm(prompt)
+            raw = await ask(prompt)
             logger.debug("RAW LLM RESPONSE (try %d):\n%s", attempt, raw)
             orders = _safe_load_orders(raw)
             if orders:
+                cache.put(fp, orders, prices)
                 break                                 # успех
             raise ValueError("empty/invalid JSON")
         except Exception as ex:
@@ -103,57 +174,50 @@ async def decide_llm(state: Dict) -> Dict:
     # ----------- если orders пустой → fallback ----------------------------
     reasons: list[str] = []
     if not orders:
-        reasons = fuse_and_trade(news, tech, wallet, prices)
-        return _out(state, reasons, tag=reason_tag)
+        return fuse_and_trade(news, tech, w, prices, **fuse_kw), reason_tag
 
     # ----------- нормализация и исполнение приказов -----------------------
     for o in orders:
         sym = (o.get("asset") or "").upper()
         act = (o.get("action") or "HOLD").upper()
         pct = o.get("size_pct") or o.get("size") or 0
-        pct = min(float(pct), SIZE_PCT_LIMIT)
+        pct = min(float(pct), w.risk.size_pct_limit)
         rsn = o.get("reason", "")
         px  = prices.get(sym)
 
-        if px is None or wallet.in_cooldown(sym):
+        if px is None or w.in_cooldown(sym):
             continue
 
         if act == "BUY" and pct > 0:
-            wallet.buy(sym, px, pct=pct, prices=prices)
+            w.buy(sym, px, pct=pct, prices=prices)
             reasons.append(f"{sym}: BUY {pct*100:.1f}% — {rsn}")
         elif act == "SELL":
-            wallet.sell(sym, px)
+            w.sell(sym, px)
             reasons.append(f"{sym}: SELL — {rsn}")
         else:
             reasons.append(f"{sym}: HOLD — {rsn}")
 
     # ----------- авто-exit + draw-down (без изменений) --------------------
-    for sym in list(wallet.positions):
-        if (px := prices.get(sym)) and wallet.should_exit(sym, px):
-            wallet.sell(sym, px); reasons.append(f"{sym}: auto-exit")
-
-    equity = wallet.total_equity(prices)
-    drawdn = max(0, -wallet.unrealized_pnl(prices) / equity)
-    if drawdn > DD_TRIGGER:
-        losers = sorted(wallet.positions.items(),
-                        key=lambda kv: (prices.get(kv[0], 0)-kv[1].entry_price)/kv[1].entry_price)
-        for sym, _ in losers:
-            if sym in prices:
-                wallet.sell(sym, prices[sym], pct=0.5)
-                reasons.append(f"{sym}: cut DD {drawdn:.2%}")
-                equity = wallet.total_equity(prices)
-                drawdn = max(0, -wallet.unrealized_pnl(prices) / equity)
-                if drawdn <= DD_STOP:
-                    break
-
-    return _out(state, reasons, tag=reason_tag)
+    for sym in list(w.positions):
+        if (px := prices.get(sym)) and w.should_exit(sym, px):
+            w.sell(sym, px); reasons.append(f"{sym}: auto-exit")
+
+    reasons += drawdown_cut(w, prices)
+    return reasons, reason_tag
+
+
+# ─────────────────────── LangGraph-node ───────────────────────────────────
+async def decide_llm(state: Dict) -> Dict:
+    reasons, tag = await decide_for(state, wallet)
+    return _out(state, reasons, tag=tag)
 
 
 # ───────────────────────── helper ─────────────────────────────────────────
-def _out(state, reasons, *, tag):
+def _out(state, reasons, *, tag, w=None):
+    w = wallet if w is None else w
     return {
-        "wallet": wallet,
-        "equity": wallet.total_equity(state["prices"]),
+        "wallet": w,
+        "equity": w.total_equity(state["prices"]),
         "events": [{
             "ts": datetime.utcnow().strftime("%H:%M:%S"),
             "msg": tag,
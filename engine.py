@@ -0,0 +1,81 @@
+"""
+Торговый движок без UI: python -u engine.py
+
+Стратегии, события и циклы — как раньше жили в app.py (Portfolio +
+CycleScheduler), но в отдельном процессе: перерисовки и вкладки
+Streamlit на торговлю не влияют.  После каждого цикла — снимок состояния
+в engine_state (SQLite), дашборд app.py только читает его.
+Задержки узлов и внешних вызовов — GET :METRICS_PORT/metrics (Prometheus).
+"""
+import asyncio, logging, signal
+
+from graph import collect, display_graph_dot
+from data_feed import get_last_prices
+from scheduler import CycleScheduler
+from exchange import close_exchange
+from price_stream import ticker_stream
+from journal import trade_journal
+from portfolio import Portfolio
+from llm_client import llm
+from news_signal import signal_store
+from engine_state import StatePublisher, snapshot_payload
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    portfolio = Portfolio()               # стратегии из STRATEGIES_FILE (по умолчанию — main)
+    await portfolio.restore()             # снапшоты + сделки после них
+    await signal_store.start()            # LISTEN news_signal → сигналы в памяти
+    publisher = StatePublisher()
+    graph_dot = display_graph_dot()
+    try:
+        exporter = await metrics.serve()
+    except OSError as ex:                     # порт занят — торгуем без /metrics
+        logger.warning("metrics endpoint disabled: %s", ex)
+        exporter = None
+
+    async def on_cycle(result, info):
+        metrics.observe("cycle_seconds", info["age"], stage="data_age")
+        metrics.observe("cycle_seconds", info["decide"], stage="decide")
+        metrics.observe("cycle_lag_seconds", info["lag"])
+        payload = snapshot_payload(result, info, sched.stats())
+        payload["graph"] = graph_dot
+        try:
+            await publisher.publish(payload)
+        except Exception as ex:               # дашборд подождёт, торговля — нет
+            logger.warning("state publish failed: %s", ex)
+        await portfolio.maybe_save()
+
+    # циклы по событиям: свеча, движение цены, новость, таймер
+    sched = CycleScheduler(collect, portfolio.decide, on_cycle, refresh=get_last_prices)
+    ticker_stream.subscribe(sched.on_tick)
+    signal_store.subscribe(sched.on_news)
+    metrics.gauges(lambda: {f"scheduler_{k}": v for k, v in sched.counts.items()})
+    metrics.gauges(lambda: {f"journal_{k}": v for k, v in trade_journal.counters.items()})
+    metrics.gauges(lambda: {f"portfolio_{k}": v for k, v in portfolio.stats.items()})
+
+    run  = asyncio.create_task(sched.run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):   # docker stop → штатное завершение
+        loop.add_signal_handler(sig, run.cancel)
+    try:
+        await run
+    except asyncio.CancelledError:
+        logger.info("engine stopping")
+    finally:
+        await ticker_stream.stop()
+        await signal_store.stop()
+        await portfolio.close()
+        await trade_journal.close()       # дописываем очередь сделок
+        await close_exchange()            # закрываем пул соединений к бирже
+        await llm.close()
+        publisher.close()
+        if exporter is not None:
+            await exporter.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""
+Снимки состояния движка для дашборда: engine.py пишет, app.py читает.
+
+Локальный SQLite-файл STATE_DB в режиме WAL — читатели не блокируют
+писателя и наоборот, поэтому сколько бы вкладок ни было открыто, цикл
+торговли их не ждёт.  Две таблицы:
+    state  — одна строка: seq, ts и JSON снимка (кошелёк, цены, события,
+             стратегии, метрики и разбивка времени цикла); перезаписывается
+             каждый цикл;
+    equity_tiers — (strategy, step, ts, equity): уровни ringbuf.TIERS —
+             сырые точки цикла (step 0), последняя точка минуты и часа;
+             каждый уровень обрезается до своей ёмкости, поэтому таблица
+             не растёт с аптаймом.  Дашборд при открытии берёт склейку
+             уровней (equity_view), затем дочитывает только новые сырые.
+Запись — в отдельном потоке (один поток — порядок циклов сохраняется).
+"""
+import asyncio, json, math, os, sqlite3, time
+from concurrent.futures import ThreadPoolExecutor
+
+from ringbuf import TIERS
+
+STATE_DB     = os.getenv("ENGINE_STATE_DB", "engine_state.db")
+HISTORY_TAIL = 25             # строк лога кошелька в снимке
+TRIM_EVERY   = 500            # циклов между обрезками уровней equity
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state  (id INTEGER PRIMARY KEY CHECK (id = 1),
+                                   seq INTEGER, ts REAL, payload TEXT);
+CREATE TABLE IF NOT EXISTS equity_tiers (strategy TEXT, step INTEGER, ts REAL, equity REAL,
+                                         PRIMARY KEY (strategy, step, ts)) WITHOUT ROWID;
+"""
+# ts — начало интервала step; значение — последнее за интервал (как TieredSeries)
+UPSERT = ("INSERT INTO equity_tiers (strategy, step, ts, equity) VALUES (?, ?, ?, ?) "
+          "ON CONFLICT (strategy, step, ts) DO UPDATE SET equity = excluded.equity")
+TRIM = ("DELETE FROM equity_tiers WHERE step = :step AND ts < "
+        "(SELECT e.ts FROM equity_tiers e WHERE e.strategy = equity_tiers.strategy "
+        " AND e.step = :step ORDER BY e.ts DESC LIMIT 1 OFFSET :cap - 1)")
+
+
+def snapshot_payload(result: dict, cycle: dict | None = None, stats: dict | None = None) -> dict:
+    """Результат цикла → компактный JSON-совместимый снимок (без объектов Wallet)."""
+    w, prices = result["wallet"], result["prices"]
+    return {"ts": time.time(), "prices": dict(prices), "equity": result["equity"],
+            "wallet": {"cash": w.cash, "realized": w.realized,
+                       "unrealized": w.unrealized_pnl(prices),
+                       "positions": {s: {"qty": p.qty, "entry_price": p.entry_price}
+                                     for s, p in w.positions.items()},
+                       "history": [list(h) for h in w.history[-HISTORY_TAIL:]]},
+            "events": list(result.get("events") or []),
+            "strategies": list(result.get("strategies") or []),
+            "timings": result.get("timings") or {},
+            "cycle": cycle or {}, "stats": stats or {}}
+
+
+def _connect(path: str, readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")       # снимок можно потерять, базу — нет
+    conn.executescript(SCHEMA)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'equity'").fetchone():
+        _fold_legacy(conn)
+    return conn
+
+
+def _fold_legacy(conn: sqlite3.Connection) -> None:
+    """Плоская equity (ts, strategy, equity) прежних версий → уровни, затем DROP."""
+    conn.execute("BEGIN")
+    for step, _ in TIERS:
+        b = "ts - ts % ?" if step else "ts + 0 * ?"
+        conn.execute(f"INSERT OR REPLACE INTO equity_tiers (strategy, step, ts, equity) "
+                     f"SELECT strategy, ?, b, equity FROM "
+                     f"(SELECT strategy, {b} AS b, equity, max(ts) FROM equity GROUP BY strategy, b)",
+                     (step, step))
+    conn.execute("DROP TABLE equity")
+    for step, cap in TIERS:
+        conn.execute(TRIM, {"step": step, "cap": cap})
+    conn.execute("COMMIT")
+
+
+# ---------- писатель (engine) ---------------------------------------------
+class StatePublisher:
+    def __init__(self, path: str = STATE_DB, tiers=TIERS):
+        self.path, self.tiers = path, tiers
+        self.seq = 0
+        self._conn: sqlite3.Connection | None = None
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="engine-state")
+
+    def _write(self, seq: int, payload: dict) -> None:
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        ts  = payload["ts"]
+        eq  = [(ts, s["strategy"], s["equity"]) for s in payload["strategies"]] \
+              or [(ts, "main", payload["equity"])]
+        doc = json.dumps(payload, default=str)
+        c = self._conn
+        c.execute("BEGIN")
+        c.execute("INSERT OR REPLACE INTO state (id, seq, ts, payload) VALUES (1, ?, ?, ?)",
+                  (seq, ts, doc))
+        c.executemany(UPSERT, [(name, step, t - t % step if step else t, v)
+                               for step, _ in self.tiers for t, name, v in eq])
+        if seq % TRIM_EVERY == 0:
+            for step, cap in self.tiers:
+                c.execute(TRIM, {"step": step, "cap": cap})
+        c.execute("COMMIT")
+
+    async def publish(self, payload: dict) -> None:
+        self.seq += 1
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._pool, self._write, self.seq, payload)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ---------- читатель (дашборд) --------------------------------------------
+class StateReader:
+    def __init__(self, path: str = STATE_DB):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+
+    def _c(self) -> sqlite3.Connection | None:
+        if self._conn is None and os.path.exists(self.path):
+            self._conn = _connect(self.path, readonly=True)
+        return self._conn
+
+    def latest(self) -> tuple[int, dict] | None:
+        """(seq, снимок) или None, пока движок ничего не опубликовал."""
+        c = self._c()
+        if c is None:
+            return None
+        try:
+            row = c.execute("SELECT seq, payload FROM state WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:                # схема ещё не создана
+            return None
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _rows(self, sql: str, args=()) -> list[tuple]:
+        c = self._c()
+        if c is None:
+            return []
+        try:
+            return c.execute(sql, args).fetchall()
+        except sqlite3.OperationalError:
+            return []
+
+    def equity_view(self) -> list[tuple[float, str, float]]:
+        """Склейка уровней по стратегиям, как TieredSeries.view: грубый — только раньше подробного."""
+        out, edge, first = [], {}, {}                   # edge — начало уже взятых подробных
+        for step, ts, name, eq in self._rows(
+                "SELECT step, ts, strategy, equity FROM equity_tiers ORDER BY step, ts"):
+            if first.get(name, (None,))[0] != step:     # новый уровень стратегии
+                if name in first:
+                    edge[name] = min(edge.get(name, math.inf), first[name][1])
+                first[name] = (step, ts)
+            if ts < edge.get(name, math.inf):
+                out.append((ts, name, eq))
+        return sorted(out)
+
+    def equity_since(self, ts: float = 0.0) -> list[tuple[float, str, float]]:
+        """Сырые точки (step 0) новее ts."""
+        return self._rows("SELECT ts, strategy, equity FROM equity_tiers "
+                          "WHERE step = 0 AND ts > ? ORDER BY ts", (ts,))
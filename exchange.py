@@ -0,0 +1,83 @@
+"""
+Единый шлюз к бирже.
+
+Один долгоживущий ccxt-клиент на процесс: общий aiohttp-пул keep-alive
+соединений, общий rate-limiter ccxt и одна загрузка markets, которую
+переиспользуют data_feed, tech_agent и llm_tools.  Создавать ccxt.binance
+напрямую в остальных модулях не нужно — только через get_exchange().
+"""
+import asyncio, logging, ssl, time
+import aiohttp, certifi
+import ccxt.async_support as ccxt
+
+from metrics import timer
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_ID  = "binance"
+TIMEOUT_MS   = 15000
+POOL_LIMIT   = 32          # одновременных TCP-соединений к бирже
+KEEPALIVE_S  = 60          # сколько держим idle-соединение открытым
+MARKETS_TTL  = 900         # секунд между перезагрузками exchangeInfo
+
+_client: ccxt.Exchange | None = None
+_loop:   asyncio.AbstractEventLoop | None = None
+_markets_ts   = 0.0
+_markets_lock: asyncio.Lock | None = None
+
+
+# ---------- client --------------------------------------------------------
+def _build(loop: asyncio.AbstractEventLoop) -> ccxt.Exchange:
+    client = getattr(ccxt, EXCHANGE_ID)({
+        "enableRateLimit": True,
+        "timeout": TIMEOUT_MS,
+        "asyncio_loop": loop,
+        # Если нужны API ключи, их можно передать здесь из переменных окружения
+        # 'apiKey': os.getenv('BINANCE_API_KEY'),
+        # 'secret': os.getenv('BINANCE_SECRET_KEY'),
+    })
+    # собственный пул вместо дефолтного: лимит соединений + keep-alive;
+    # own_session остаётся True, поэтому client.close() закроет и его.
+    # client.ssl_context ccxt заполняет только в open() — здесь он ещё None,
+    # поэтому контекст с CA certifi собираем сами, как это делает ccxt
+    ssl_ctx = ssl.create_default_context(cafile=certifi.where()) if client.verify else False
+    connector = aiohttp.TCPConnector(ssl=ssl_ctx, limit=POOL_LIMIT,
+                                     keepalive_timeout=KEEPALIVE_S,
+                                     ttl_dns_cache=300, enable_cleanup_closed=True)
+    client.session = aiohttp.ClientSession(connector=connector,
+                                           trust_env=client.aiohttp_trust_env)
+    return client
+
+def get_exchange() -> ccxt.Exchange:
+    """Общий клиент для текущего event-loop (вызывать из корутины)."""
+    global _client, _loop, _markets_ts, _markets_lock
+    loop = asyncio.get_running_loop()
+    if _client is None or _loop is not loop:
+        if _client is not None:
+            # прежний loop уже закрыт (повторный asyncio.run) — сессия мертва
+            logger.debug("exchange: event-loop changed, rebuilding client")
+        _client, _loop = _build(loop), loop
+        _markets_ts, _markets_lock = 0.0, asyncio.Lock()
+    return _client
+
+async def markets() -> dict:
+    """markets биржи; грузятся один раз и обновляются раз в MARKETS_TTL."""
+    global _markets_ts
+    client = get_exchange()
+    async with _markets_lock:
+        if not client.markets or time.time() - _markets_ts > MARKETS_TTL:
+            with timer("exchange_seconds", call="load_markets"):
+                await client.load_markets(reload=bool(client.markets))
+            _markets_ts = time.time()
+    return client.markets
+
+async def close_exchange() -> None:
+    """Shutdown-hook: закрывает пул соединений общего клиента."""
+    global _client, _loop
+    if _client is None:
+        return
+    client, _client, _loop = _client, None, None
+    try:
+        await client.close()
+    except Exception as e:
+        logger.debug("exchange close err: %s", e)
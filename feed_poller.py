@@ -0,0 +1,130 @@
+"""
+Асинхронный опрос RSS-лент с условными GET и адаптивным интервалом.
+
+Для каждой ленты храним ETag / Last-Modified и шлём If-None-Match /
+If-Modified-Since: неизменившаяся лента стоит один 304 без тела.  Разбор
+feedparser'ом идёт в executor'е — event-loop не блокируется.
+
+Интервал опроса подстраивается под ленту: появились новые записи —
+интервал делится на 2 (не ниже MIN_INTERVAL), пусто — умножается на
+1.5 (не выше MAX_INTERVAL).  poll_due() опрашивает только ленты, чей
+срок подошёл, поэтому десятки «тихих» лент почти ничего не стоят.
+"""
+import asyncio, logging, time
+from dataclasses import dataclass, field
+
+import aiohttp, feedparser
+
+logger = logging.getLogger(__name__)
+
+BASE_INTERVAL = 300           # старт и интервал после ошибки
+MIN_INTERVAL  = 60
+MAX_INTERVAL  = 1800
+CONCURRENCY   = 8             # одновременных GET
+TIMEOUT       = 20
+SEEN_KEEP     = 500           # id записей на ленту для подсчёта новых
+USER_AGENT    = "Mozilla/5.0 (crypto-multi-agent rss)"
+
+
+@dataclass
+class FeedState:
+    url:      str
+    etag:     str | None = None
+    modified: str | None = None
+    interval: float = BASE_INTERVAL
+    next_at:  float = 0.0
+    primed:   bool  = False       # был ли уже разобранный ответ (первый — не сигнал частоты)
+    seen:     dict = field(default_factory=dict, repr=False)     # id → None (упорядочен)
+    stats:    dict = field(default_factory=lambda: {"fetched": 0, "not_modified": 0,
+                                                    "errors": 0, "new": 0})
+
+
+def _entry_id(e) -> str:
+    return e.get("id") or e.get("link") or e.get("title", "")
+
+
+class FeedPoller:
+    def __init__(self, urls, *, base: float = BASE_INTERVAL,
+                 min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL):
+        self.base, self.min, self.max = base, min_interval, max_interval
+        self.feeds = {u: FeedState(u, interval=base) for u in urls}
+        self._session: aiohttp.ClientSession | None = None
+        self._sem:     asyncio.Semaphore | None = None
+
+    def _ensure(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"User-Agent": USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=CONCURRENCY, keepalive_timeout=60))
+            self._sem = asyncio.Semaphore(CONCURRENCY)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    # ---------- один опрос -----------------------------------------------
+    async def _fetch(self, st: FeedState) -> bytes | None:
+        """Тело ленты или None, если 304."""
+        hdr = {}
+        if st.etag:     hdr["If-None-Match"]     = st.etag
+        if st.modified: hdr["If-Modified-Since"] = st.modified
+        async with self._sem, self._ensure().get(st.url, headers=hdr) as r:
+            if r.status == 304:
+                return None
+            r.raise_for_status()
+            body = await r.read()
+            st.etag     = r.headers.get("ETag", st.etag)
+            st.modified = r.headers.get("Last-Modified", st.modified)
+            return body
+
+    def _reschedule(self, st: FeedState, fresh: int) -> None:
+        if fresh:  st.interval = max(self.min, st.interval / 2)
+        else:      st.interval = min(self.max, st.interval * 1.5)
+        st.next_at = time.monotonic() + st.interval
+
+    async def poll(self, st: FeedState) -> list:
+        """
+        Записи ленты (все, как отдаёт feedparser) или [] — если 304 или в
+        ответе нет ни одной новой записи (сервер без ETag).
+        """
+        self._ensure()
+        try:
+            body = await self._fetch(st)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            st.stats["errors"] += 1
+            st.interval, st.next_at = self.base, time.monotonic() + self.base
+            logger.warning("feed %s: %s", st.url, ex)
+            return []
+        if body is None:
+            st.stats["not_modified"] += 1
+            self._reschedule(st, 0)
+            return []
+        st.stats["fetched"] += 1
+        loop = asyncio.get_running_loop()
+        parsed = await loop.run_in_executor(None, feedparser.parse, body)
+        first, st.primed = not st.primed, True  # пустая лента тоже считается ответом
+        fresh = [i for i in map(_entry_id, parsed.entries) if i not in st.seen]
+        for i in fresh:
+            st.seen[i] = None
+        while len(st.seen) > SEEN_KEEP:
+            st.seen.pop(next(iter(st.seen)))
+        if first:
+            st.next_at = time.monotonic() + st.interval
+        else:
+            st.stats["new"] += len(fresh)
+            self._reschedule(st, len(fresh))
+        return parsed.entries if first or fresh else []
+
+    # ---------- расписание -----------------------------------------------
+    async def poll_due(self) -> dict[str, list]:
+        """Опрашивает ленты, чей срок подошёл; {url: entries} для изменившихся."""
+        now = time.monotonic()
+        due = [st for st in self.feeds.values() if st.next_at <= now]
+        res = await asyncio.gather(*(self.poll(st) for st in due))
+        return {st.url: entries for st, entries in zip(due, res) if entries}
+
+    def sleep_for(self) -> float:
+        """Секунд до ближайшей ленты."""
+        return max(0.0, min(st.next_at for st in self.feeds.values()) - time.monotonic())
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, List, TypedDict
 from datetime import datetime
 
@@ -10,6 +11,7 @@ from data_feed      import get_last_prices
 from news_agent     import news_signals
 from tech_agent     import tech_signals
 from decision_agent_llm import decide_llm
+from metrics import timed, timer, breakdown, cycle_event
 
 # ─────────────── схема состояния ─────────────────────────────────────────
 class GState(TypedDict, total=False):
@@ -19,17 +21,22 @@ class GState(TypedDict, total=False):
     wallet:  Wallet            
     equity:  float
     events:  List[Dict]
+    timings: Dict[str, Dict]   # разбивка времени цикла (metrics.breakdown)
 
 _ev = lambda m, e=None: {"ts": datetime.utcnow().strftime("%H:%M:%S"),
                          "msg": m, "extra": e or {}}
 
 # ─────────────── узлы графа ───────────────────────────────────────────────
+@timed("node_seconds", node="get_prices")
 async def get_prices(_: GState) -> GState:
+    # цены берутся из таблицы ticker-потока; REST только для устаревших пар
     return {"prices": await get_last_prices()}
 
+@timed("node_seconds", node="calc_tech")
 async def calc_tech(_: GState) -> GState:
     return {"tech": await tech_signals()}
 
+@timed("node_seconds", node="parse_news")
 async def parse_news(_: GState) -> GState:
     return {"news": await news_signals()}
 
@@ -39,7 +46,7 @@ g = StateGraph(state_schema=GState)
 g.add_node("get_prices", get_prices)
 g.add_node("calc_tech",  calc_tech)
 g.add_node("parse_news", parse_news)
-g.add_node("decide_llm", decide_llm)
+g.add_node("decide_llm", timed("node_seconds", node="decide_llm")(decide_llm))
 
 g.set_entry_point("get_prices")
 g.add_edge("get_prices", "calc_tech")
@@ -50,6 +57,20 @@ g.add_edge("decide_llm", END)
 
 workflow = g.compile()        # ← экспортируется в app.py
 
+# ─────────────── стадии для scheduler (тот же граф, по частям) ───────────
+async def collect() -> GState:
+    """get_prices → (calc_tech ‖ parse_news): данные для decide_llm."""
+    with breakdown() as bd:
+        state = await get_prices({})
+        tech, news = await asyncio.gather(calc_tech(state), parse_news(state))
+    return {**state, **tech, **news, "timings": bd.timings}
+
+async def decide(state: GState) -> GState:
+    with breakdown() as bd, timer("node_seconds", node="decide_llm"):
+        out = await decide_llm(state)
+    timings = {**state.get("timings", {}), **bd.timings}
+    return {**out, "timings": timings, "events": [*out["events"], cycle_event(timings)]}
+
 # ─────────────── helper для Streamlit-визуализации ───────────────────────
 def display_graph_dot() -> str:
     G = nx.DiGraph()
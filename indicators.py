@@ -0,0 +1,265 @@
+"""
+Инкрементальный движок индикаторов (один объект на символ).
+
+Повторяет формулы pandas_ta, которыми пользуется tech_agent._indicators:
+    sma   — скользящее среднее (rolling mean)
+    ema   — EMA с затравкой SMA(length), adjust=False
+    macd  — ema(fast) − ema(slow)
+    rsi   — RMA (ewm alpha=1/length, adjust=True) плюсов/минусов close.diff()
+    bb    — SMA(20) ± 2·std(ddof=0)
+update(close) — закрытая свеча, O(1); peek(close) — оценка по ещё
+формирующейся свече без изменения состояния.
+
+window — сколько свечей (вместе с формирующейся) видит _indicators
+(tech_agent.CANDLES).  EMA и RSI зависят от начала окна: затравка EMA —
+SMA первых n свечей окна, RMA копит наблюдения с начала окна.  Поэтому
+значение раскладывается на члены, которые сдвигаются за O(1):
+    ema = k^m·(Σ первых n)/n + Σ a·k^возраст·x   (хвост без первых n)
+    rma = Σ k^возраст·d / Σ k^возраст
+Уходящая из окна свеча вычитается со своим весом; раз в окно суммы
+пересчитываются заново — ошибка округления не копится.  window=None —
+вся история.
+"""
+from collections import deque
+import math
+import numpy as np
+
+RSI_OB, RSI_OS = 70, 30
+WEIGHTS = {"sma": .25, "ema": .25, "mac": .20, "rsi": .15, "bb": .15}
+
+SMA_FAST, SMA_SLOW = 36, 80
+EMA_FAST, EMA_SLOW = 16, 42
+MACD_FAST, MACD_SLOW = 24, 52
+RSI_LEN = 28
+BB_LEN, BB_STD = 20, 2.0
+
+
+def combine(sma_d, ema_d, macd, rsi28, bbp, w=WEIGHTS) -> tuple[float, str]:
+    """Сырые значения индикаторов → (score, reason) как в _indicators."""
+    sma = np.sign(sma_d)
+    ema = np.sign(ema_d)
+    mac = np.sign(macd)
+    rsi = 1 if rsi28 > RSI_OB else -1 if rsi28 < RSI_OS else 0
+    bbp = 1 if bbp > .8 else -1 if bbp < .2 else 0
+    score = w["sma"]*sma + w["ema"]*ema + w["mac"]*mac + w["rsi"]*rsi + w["bb"]*bbp
+    reason = f"sma:{sma:+} ema:{ema:+} mac:{mac:+} rsi:{rsi:+} bb:{bbp:+}"
+    return float(score), reason
+
+
+# ---------- примитивы -----------------------------------------------------
+class _SMA:
+    def __init__(self, n):
+        self.n, self.win, self.sum = n, deque(maxlen=n), 0.0
+        self.pushes = 0
+
+    def peek(self, x):
+        if len(self.win) + 1 < self.n:
+            return math.nan
+        drop = self.win[0] if len(self.win) == self.n else 0.0
+        return (self.sum - drop + x) / self.n
+
+    def push(self, x):
+        if len(self.win) == self.n:
+            self.sum -= self.win[0]
+        self.win.append(x)
+        self.sum += x
+        self.pushes += 1
+        if self.pushes % self.n == 0:        # гасим накопленную ошибку округления
+            self.sum = math.fsum(self.win)
+
+
+class _EMA:
+    """ewm(span=n, adjust=False), первое значение — SMA первых n; cap — окно."""
+    def __init__(self, n, cap=None):
+        self.n, self.a, self.cap = n, 2.0 / (n + 1), cap
+        self.k = 1.0 - self.a
+        self.win = deque(maxlen=cap) if cap else None
+        self.count, self.head, self.tail, self.pushes = 0, 0.0, 0.0, 0
+
+    def peek(self, x):
+        if self.count + 1 < self.n:
+            return math.nan
+        if self.count + 1 == self.n:
+            return (self.head + x) / self.n
+        return self.k ** (self.count + 1 - self.n) * self.head / self.n + self.k * self.tail + self.a * x
+
+    def push(self, x):
+        n, w = self.n, self.win
+        if w is not None and self.count == self.cap:       # первая свеча уходит из окна
+            self.head += w[n] - w[0]
+            self.tail -= self.a * self.k ** (self.cap - 1 - n) * w[n]
+            self.count -= 1
+        if self.count < n: self.head += x
+        else:              self.tail = self.k * self.tail + self.a * x
+        self.count += 1
+        if w is not None:
+            w.append(x)
+            self.pushes += 1
+            if self.pushes % self.cap == 0:  # гасим накопленную ошибку округления
+                self.head = math.fsum(list(w)[:n])
+                self.tail = sum(self.a * self.k ** (len(w) - 1 - j) * w[j]
+                                for j in range(n, len(w)))
+
+
+class _RMA:
+    """ewm(alpha=1/n, adjust=True, min_periods=n); cap — окно наблюдений."""
+    def __init__(self, n, cap=None):
+        self.n, self.k, self.cap = n, 1.0 - 1.0 / n, cap
+        self.win = deque(maxlen=cap) if cap else None
+        self.num, self.nobs, self.pushes = 0.0, 0, 0
+
+    def peek(self, x):
+        if self.nobs + 1 < self.n:
+            return math.nan
+        den = (1.0 - self.k ** (self.nobs + 1)) / (1.0 - self.k)
+        return (self.k * self.num + x) / den
+
+    def push(self, x):
+        w = self.win
+        if w is not None and self.nobs == self.cap:
+            self.num -= self.k ** (self.cap - 1) * w[0]
+            self.nobs -= 1
+        self.num = self.k * self.num + x
+        self.nobs += 1
+        if w is not None:
+            w.append(x)
+            self.pushes += 1
+            if self.pushes % self.cap == 0:
+                self.num = sum(self.k ** (len(w) - 1 - j) * v for j, v in enumerate(w))
+
+
+# ---------- движок --------------------------------------------------------
+class IndicatorEngine:
+    def __init__(self, weights=WEIGHTS, window: int | None = None):
+        self.w = weights
+        closed = window - 1 if window else None             # закрытых свечей в окне
+        diffs  = window - 2 if window else None             # и их приращений
+        self.sma_f, self.sma_s = _SMA(SMA_FAST), _SMA(SMA_SLOW)
+        self.ema_f, self.ema_s = _EMA(EMA_FAST, closed), _EMA(EMA_SLOW, closed)
+        self.mac_f, self.mac_s = _EMA(MACD_FAST, closed), _EMA(MACD_SLOW, closed)
+        self.up, self.dn = _RMA(RSI_LEN, diffs), _RMA(RSI_LEN, diffs)
+        self.bb   = deque(maxlen=BB_LEN)
+        self.prev = None          # close предыдущей закрытой свечи
+        self.closed_ts = -1       # ts последней учтённой закрытой свечи
+
+    def _rsi(self, up, dn):
+        den = up + abs(dn)
+        return 100 * up / den if den else math.nan
+
+    def _bbp(self, x):
+        win = list(self.bb)[1:] if len(self.bb) == BB_LEN else list(self.bb)
+        win.append(x)
+        if len(win) < BB_LEN:
+            return math.nan
+        mid = sum(win) / BB_LEN
+        dev = BB_STD * math.sqrt(sum((v - mid) ** 2 for v in win) / BB_LEN)
+        lo, hi = mid - dev, mid + dev
+        return (x - lo) / (hi - lo) if hi != lo else math.nan
+
+    def update(self, close: float, ts: float = -1) -> None:
+        """Свеча закрылась: сдвигаем все индикаторы на один шаг."""
+        for ind in (self.sma_f, self.sma_s, self.ema_f, self.ema_s, self.mac_f, self.mac_s):
+            ind.push(close)
+        if self.prev is not None:
+            d = close - self.prev
+            self.up.push(max(d, 0.0)); self.dn.push(min(d, 0.0))
+        self.bb.append(close)
+        self.prev = close
+        self.closed_ts = ts
+
+    def raw(self, close: float) -> tuple[float, float, float, float, float]:
+        """Сырые (sma_d, ema_d, macd, rsi, bbp) с учётом незакрытой свечи `close`."""
+        if self.prev is not None:
+            d = close - self.prev
+            rsi = self._rsi(self.up.peek(max(d, 0.0)), self.dn.peek(min(d, 0.0)))
+        else:
+            rsi = math.nan
+        return (self.sma_f.peek(close) - self.sma_s.peek(close),
+                self.ema_f.peek(close) - self.ema_s.peek(close),
+                self.mac_f.peek(close) - self.mac_s.peek(close),
+                rsi,
+                self._bbp(close))
+
+    def peek(self, close: float) -> tuple[float, str]:
+        """(score, reason) с учётом незакрытой свечи `close`; состояние не меняется."""
+        return combine(*self.raw(close), self.w)
+
+
+# ---------- пакетный (векторный) расчёт -----------------------------------
+# Те же формулы на матрице close (символы × свечи): рекурсии идут циклом
+# по времени, но каждый шаг — одна numpy-операция сразу по всем символам.
+def _sma_m(x, n):
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= n:
+        c = np.cumsum(x, axis=1)
+        out[:, n-1] = c[:, n-1]
+        out[:, n:]  = c[:, n:] - c[:, :-n]
+        out[:, n-1:] /= n
+    return out
+
+def _ema_m(x, n):
+    out = np.full_like(x, np.nan)
+    if x.shape[1] < n:
+        return out
+    a = 2.0 / (n + 1)
+    v = out[:, n-1] = x[:, :n].mean(axis=1)
+    for t in range(n, x.shape[1]):
+        v = out[:, t] = v + a * (x[:, t] - v)
+    return out
+
+def _rma_m(x, n):
+    """x[:, 0] — NaN (diff), наблюдения начинаются со столбца 1."""
+    out = np.full_like(x, np.nan)
+    k, avg, wt = 1.0 - 1.0 / n, x[:, 1].copy(), 1.0
+    if n <= 1: out[:, 1] = avg
+    for t in range(2, x.shape[1]):
+        w_old = wt * k
+        avg = (w_old * avg + x[:, t]) / (w_old + 1.0)
+        wt  = w_old + 1.0
+        if t >= n: out[:, t] = avg
+    return out
+
+def indicator_matrix(close: np.ndarray) -> dict[str, np.ndarray]:
+    """Сырые значения индикаторов по всей истории, shape (N, T) каждый."""
+    x = np.asarray(close, dtype=np.float64)
+    ref = x[:, :1]                        # центрируем: точнее cumsum/var
+    xc = x - ref
+    d = np.diff(x, axis=1, prepend=np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        up = _rma_m(np.where(np.isnan(d), np.nan, np.maximum(d, 0.0)), RSI_LEN)
+        dn = _rma_m(np.where(np.isnan(d), np.nan, np.minimum(d, 0.0)), RSI_LEN)
+        rsi = 100 * up / (up + np.abs(dn))
+        mid = _sma_m(xc, BB_LEN)
+        var = np.maximum(_sma_m(xc * xc, BB_LEN) - mid * mid, 0.0)
+        dev = BB_STD * np.sqrt(var)
+        bbp = (xc - (mid - dev)) / (2 * dev)
+    return {
+        "sma": _sma_m(xc, SMA_FAST) - _sma_m(xc, SMA_SLOW),
+        "ema": _ema_m(x, EMA_FAST) - _ema_m(x, EMA_SLOW),
+        "mac": _ema_m(x, MACD_FAST) - _ema_m(x, MACD_SLOW),
+        "rsi": rsi,
+        "bb":  bbp,
+    }
+
+def score_matrix(ind: dict[str, np.ndarray], w=WEIGHTS) -> tuple[np.ndarray, dict]:
+    """indicator_matrix → (score, компоненты ±1/0) той же формы, что и вход."""
+    comp = {
+        "sma": np.sign(ind["sma"]),
+        "ema": np.sign(ind["ema"]),
+        "mac": np.sign(ind["mac"]),
+        "rsi": np.where(ind["rsi"] > RSI_OB, 1, np.where(ind["rsi"] < RSI_OS, -1, 0)),
+        "bb":  np.where(ind["bb"] > .8, 1, np.where(ind["bb"] < .2, -1, 0)),
+    }
+    score = sum(w[k] * comp[k] for k in ("sma", "ema", "mac", "rsi", "bb"))
+    return score, comp
+
+def score_batch(close: np.ndarray, w=WEIGHTS) -> list[tuple[float, str]]:
+    """(score, reason) по последней свече каждой строки — как combine()."""
+    ind = {k: v[:, -1:] for k, v in indicator_matrix(close).items()}
+    score, c = score_matrix(ind, w)
+    return [
+        (float(score[i, 0]),
+         f"sma:{c['sma'][i, 0]:+} ema:{c['ema'][i, 0]:+} mac:{c['mac'][i, 0]:+} "
+         f"rsi:{int(c['rsi'][i, 0]):+} bb:{int(c['bb'][i, 0]):+}")
+        for i in range(score.shape[0])
+    ]
@@ -0,0 +1,202 @@
+"""
+Write-behind журнал сделок.
+
+Wallet.buy/sell кладут строку в ограниченную asyncio-очередь и сразу
+возвращаются.  Один фоновый флашер забирает строки пачками (по размеру
+FLUSH_ROWS или по таймеру FLUSH_INTERVAL) и пишет их одним multi-row
+INSERT в отдельном потоке; ошибки БД повторяются с экспоненциальной
+паузой.  Строки не теряются: полная очередь и пачка, не записанная за
+RETRIES попыток, уходят в локальный spill-файл SPILL_DIR/<таблица>.jsonl
+(память ограничена MAX_QUEUE).  Флашер дописывает spill в БД при старте
+и после каждой удачной пачки; уже записанные id пропускаются, поэтому
+обрыв посреди дописывания не даёт дублей.  close() дописывает остаток
+очереди.
+"""
+import asyncio, json, logging, os, uuid
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from database import sync_engine
+from models   import Trade
+from metrics  import timer
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUE      = 10_000     # строк в памяти, дальше — в spill-файл
+FLUSH_ROWS     = 200        # размер пачки
+FLUSH_INTERVAL = 1.0        # секунд ожидания добора пачки
+RETRIES        = 5
+SPILL_DIR      = os.getenv("JOURNAL_SPILL_DIR", "journal_spill")
+
+_STOP = object()            # маркер остановки флашера
+
+
+def _dump(row: dict) -> str:
+    return json.dumps({k: str(v) if isinstance(v, (uuid.UUID, datetime)) else v
+                       for k, v in row.items()})
+
+def _load(line: str) -> dict:
+    row = json.loads(line)
+    if "id" in row: row["id"] = uuid.UUID(row["id"])
+    if "ts" in row: row["ts"] = datetime.fromisoformat(row["ts"])
+    return row
+
+
+class TradeJournal:
+    def __init__(self, table=Trade.__table__, engine=sync_engine, *,
+                 max_queue: int = MAX_QUEUE, flush_rows: int = FLUSH_ROWS,
+                 flush_interval: float = FLUSH_INTERVAL, retries: int = RETRIES,
+                 spill_dir: str = SPILL_DIR):
+        self.table, self.engine = table, engine
+        self.max_queue, self.flush_rows = max_queue, flush_rows
+        self.flush_interval, self.retries = flush_interval, retries
+        self.spill_path = os.path.join(spill_dir, f"{table.name}.jsonl")
+        self.counters = {"queued": 0, "flushed": 0, "spilled": 0, "replayed": 0, "dropped": 0}
+        self._q:    asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    # ---------- producer side -------------------------------------------
+    def _ensure(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._q, self._loop = asyncio.Queue(self.max_queue), loop
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return self._q
+
+    def submit(self, row: dict) -> bool:
+        """Неблокирующая постановка (из кода event-loop); False — очередь полна, строка в spill."""
+        try:
+            self._ensure().put_nowait(row)
+        except asyncio.QueueFull:
+            if self._spill([row]):
+                logger.warning("trade journal full (%d), row spilled to %s",
+                               self.max_queue, self.spill_path)
+            return False
+        self.counters["queued"] += 1
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._q.qsize() if self._q is not None else 0
+
+    # ---------- spill-файл ----------------------------------------------
+    def _spill(self, rows: list[dict]) -> bool:
+        """Дописывает строки в spill (только из потока event-loop — см. _replay)."""
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a") as f:
+                f.writelines(_dump(r) + "\n" for r in rows)
+        except OSError as ex:
+            self.counters["dropped"] += len(rows)
+            logger.error("trade journal: cannot spill %d rows (%s): %s", len(rows), ex, rows)
+            return False
+        self.counters["spilled"] += len(rows)
+        return True
+
+    def _replay_file(self, path: str) -> int:
+        """В потоке: строки файла → БД пачками, уже записанные id пропускаются; затем unlink."""
+        with open(path) as f:
+            rows = [_load(line) for line in f if line.strip()]
+        n = 0
+        for i in range(0, len(rows), self.flush_rows):
+            chunk = rows[i:i + self.flush_rows]
+            with self.engine.begin() as conn:
+                have = set(conn.scalars(select(self.table.c.id)
+                                        .where(self.table.c.id.in_([r["id"] for r in chunk]))))
+                fresh = [r for r in chunk if r["id"] not in have]
+                if fresh:
+                    conn.execute(insert(self.table), fresh)
+            n += len(fresh)
+        os.unlink(path)
+        return n
+
+    async def _replay(self) -> None:
+        """
+        Spill → БД.  Файл переименовывается в .replay в потоке event-loop
+        (там же, где _spill дописывает), дальше его читает только поток
+        вставки; недописанный .replay остаётся до следующей попытки.
+        """
+        work = self.spill_path + ".replay"
+        while True:
+            if not os.path.exists(work):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, work)
+            try:
+                n = await asyncio.get_running_loop().run_in_executor(None, self._replay_file, work)
+            except Exception as ex:
+                logger.warning("trade journal: spill replay failed: %s", str(ex).splitlines()[0])
+                return
+            self.counters["replayed"] += n
+            logger.info("trade journal: %d spilled rows written from %s", n, work)
+
+    # ---------- flusher -------------------------------------------------
+    def _insert(self, rows: list[dict]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(insert(self.table), rows)    # insertmanyvalues → multi-row
+
+    async def _flush(self, rows: list[dict]) -> bool:
+        loop, delay = asyncio.get_running_loop(), 0.5
+        for attempt in range(1, self.retries + 1):
+            try:
+                with timer("db_seconds", query=f"{self.table.name}_insert"):
+                    await loop.run_in_executor(None, self._insert, rows)
+                self.counters["flushed"] += len(rows)
+                return True
+            except Exception as ex:
+                logger.warning("trade journal flush #%d (%d rows) failed: %s",
+                               attempt, len(rows), str(ex).splitlines()[0])
+                if attempt < self.retries:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 10)
+        if self._spill(rows):
+            logger.error("trade journal: %d rows spilled to %s after %d attempts",
+                         len(rows), self.spill_path, self.retries)
+        return False
+
+    async def _run(self) -> None:
+        q, loop = self._q, asyncio.get_running_loop()
+        stop = False
+        await self._replay()                        # хвост прошлого запуска
+        while not stop:
+            item = await q.get()
+            rows, stop = ([] if item is _STOP else [item]), item is _STOP
+            deadline = loop.time() + self.flush_interval
+            while not stop and len(rows) < self.flush_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(q.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP: stop = True
+                else:             rows.append(item)
+            if rows and await self._flush(rows):
+                await self._replay()
+
+    async def close(self) -> None:
+        """Shutdown: дописывает всё, что стоит в очереди, и гасит флашер."""
+        if self._q is None:
+            return
+        if self._task is not None and not self._task.done():
+            await self._q.put(_STOP)
+            await self._task
+        else:                                       # флашер не жив — пишем сами
+            rows = []
+            while not self._q.empty():
+                item = self._q.get_nowait()
+                if item is not _STOP:
+                    rows.append(item)
+            for i in range(0, len(rows), self.flush_rows):
+                if await self._flush(rows[i:i + self.flush_rows]):
+                    await self._replay()
+        self._task = None
+
+
+# ───────── singleton ───────────────────────────────────────────────────────
+trade_journal = TradeJournal()
@@ -0,0 +1,155 @@
+"""
+Общий async-клиент OpenRouter-совместимого chat/completions.
+
+Один aiohttp-пул keep-alive соединений на event-loop для decide_llm и
+rss_listener.  На каждую модель — свой семафор (MODEL_CONCURRENCY), чтобы
+одна медленная модель не съедала весь пул.  429 повторяется с
+экспоненциальной паузой и jitter'ом (учитывается Retry-After) через
+asyncio.sleep — остальные корутины в это время работают.  deadline
+ограничивает вызов целиком: очередь за семафором + попытки + паузы.
+
+Метрики по каждому вызову (latency, ожидание семафора, попытки, токены)
+копятся в llm.calls, агрегаты — llm.stats().
+"""
+import asyncio, logging, os, random, time
+from collections import deque
+
+import aiohttp
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+POOL_LIMIT        = 16
+KEEPALIVE_S       = 60
+TIMEOUT           = 45          # сек на вызов, если deadline не задан
+RETRIES_429       = 5
+BACKOFF_BASE      = 2.0
+BACKOFF_MAX       = 30.0
+MODEL_CONCURRENCY = {}          # model → одновременных запросов
+DEFAULT_CONCURRENCY = 4
+METRICS_KEEP      = 1000
+
+
+class LLMError(RuntimeError):
+    pass
+
+class LLMRateLimited(LLMError):
+    """429 не прошёл за все попытки."""
+
+class LLMDeadline(LLMError, TimeoutError):
+    """Вызов не уложился в deadline."""
+
+
+class LLMClient:
+    def __init__(self, url: str = BASE_URL, api_key: str | None = None):
+        self.url, self.api_key = url, api_key
+        self.calls: deque[dict] = deque(maxlen=METRICS_KEEP)
+        self._session: aiohttp.ClientSession | None = None
+        self._loop:    asyncio.AbstractEventLoop | None = None
+        self._sems:    dict[str, asyncio.Semaphore] = {}
+
+    # ---------- pool ------------------------------------------------------
+    def _ensure(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=POOL_LIMIT, keepalive_timeout=KEEPALIVE_S,
+                                             ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers={
+                "Authorization": f"Bearer {self.api_key or os.getenv('OPENROUTER_API_KEY')}",
+                "HTTP-Referer":  "http://localhost",
+                "X-Title":       "crypto-multi-agent-mvp",
+            })
+            self._loop, self._sems = loop, {}
+        return self._session
+
+    def _sem(self, model: str) -> asyncio.Semaphore:
+        if model not in self._sems:
+            self._sems[model] = asyncio.Semaphore(MODEL_CONCURRENCY.get(model, DEFAULT_CONCURRENCY))
+        return self._sems[model]
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = self._loop = None
+
+    # ---------- call ------------------------------------------------------
+    async def chat(self, messages: list[dict], *, model: str, temperature: float = 0.2,
+                   deadline: float | None = None, retries: int = RETRIES_429, **extra) -> str:
+        """
+        Возвращает content первого choice.  deadline — секунды на весь
+        вызов (по умолчанию TIMEOUT).
+        """
+        session = self._ensure()
+        loop    = asyncio.get_running_loop()
+        t0      = loop.time()
+        end     = t0 + (deadline or TIMEOUT)
+        payload = {"model": model, "temperature": temperature, "messages": messages, **extra}
+        m = {"model": model, "ts": time.time(), "attempts": 0, "status": None,
+             "wait": 0.0, "latency": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        try:
+            async with asyncio.timeout_at(end):
+                async with self._sem(model):
+                    m["wait"] = loop.time() - t0
+                    delay = BACKOFF_BASE
+                    for attempt in range(1, retries + 1):
+                        m["attempts"] = attempt
+                        async with session.post(self.url, json=payload) as r:
+                            m["status"] = r.status
+                            if r.status == 429:
+                                pause = _retry_after(r) or delay * random.uniform(0.8, 1.2)
+                                logger.info("LLM %s: 429, retry #%d in %.1fs", model, attempt, pause)
+                                if attempt == retries:
+                                    break
+                                await asyncio.sleep(min(pause, BACKOFF_MAX))
+                                delay = min(delay * 2, BACKOFF_MAX)
+                                continue
+                            r.raise_for_status()
+                            data = await r.json()
+                        usage = data.get("usage") or {}
+                        m["prompt_tokens"]     = usage.get("prompt_tokens", 0)
+                        m["completion_tokens"] = usage.get("completion_tokens", 0)
+                        return data["choices"][0]["message"]["content"]
+                    raise LLMRateLimited(f"{model}: rate limited after {retries} attempts")
+        except TimeoutError:
+            if loop.time() < end:               # таймаут сокета, не наш deadline
+                raise
+            m["status"] = "deadline"
+            raise LLMDeadline(f"{model}: no answer in {end - t0:.1f}s") from None
+        finally:
+            m["latency"] = loop.time() - t0
+            self.calls.append(m)
+            metrics.observe("llm_seconds", m["latency"], model=model, status=m["status"] or "error")
+
+    # ---------- metrics ---------------------------------------------------
+    def stats(self) -> dict:
+        """Агрегаты по моделям: вызовы, ошибки, 429, токены, p50/p95 latency."""
+        out: dict[str, dict] = {}
+        for c in self.calls:
+            s = out.setdefault(c["model"], {"calls": 0, "errors": 0, "retries": 0,
+                                            "prompt_tokens": 0, "completion_tokens": 0,
+                                            "_lat": []})
+            s["calls"]   += 1
+            s["errors"]  += c["status"] != 200
+            s["retries"] += max(0, c["attempts"] - 1)
+            s["prompt_tokens"]     += c["prompt_tokens"]
+            s["completion_tokens"] += c["completion_tokens"]
+            s["_lat"].append(c["latency"])
+        for s in out.values():
+            lat = sorted(s.pop("_lat"))
+            s["p50"] = lat[len(lat) // 2]
+            s["p95"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+        return out
+
+
+def _retry_after(r: aiohttp.ClientResponse) -> float | None:
+    try:
+        return float(r.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+# ───────── singleton ───────────────────────────────────────────────────────
+llm = LLMClient()
@@ -1,14 +1,20 @@
 import asyncio, json
 from datetime import datetime, timedelta
 from sqlalchemy import select
-from database import AsyncSession
+from database import AsyncSession, async_engine
 from models    import NewsLLMCache
+import news_agg
 from tech_agent import tech_signals           
 from data_feed  import get_last_prices, ensure_pairs
 
 # — news -------------------------------------------------------------------
 async def _sql_latest_news(asset: str, n=5) -> list[dict]:
     dt_from = datetime.utcnow() - timedelta(hours=6)
+    if async_engine.dialect.name == "postgresql":      # лучший сигнал интервала из news_agg
+        async with AsyncSession() as s:
+            rows = (await s.execute(news_agg.top_query(asset, dt_from, n))).all()
+        return [dict(asset=a, sentiment=sent, confidence=conf, reason=reason)
+                for a, sent, conf, reason in rows]
     async with AsyncSession() as s:
         rows = (await s.execute(
             select(NewsLLMCache)
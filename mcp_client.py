@@ -1,9 +1,25 @@
 """
-Мини-клиент MCP Alchemy (HTTP → FastAPI)
+Async-клиент MCP Alchemy (HTTP → FastAPI)
+
+Один aiohttp-пул keep-alive соединений на event-loop.  Адрес сервера
+ищется параллельным опросом кандидатов (MCP_SERVER_URL — в приоритете),
+результат кэшируется; после FAIL_LIMIT сетевых ошибок подряд — повторный
+поиск.  Параметры запросов (:name) подставляются SQLAlchemy-литералами с
+экранированием Postgres — никаких f-строк в SQL.  batch() отправляет
+несколько запросов одним round-trip на /mcp/v1/batch; если сервер его не
+умеет — параллельные одиночные вызовы.
+
+    rows = await query("SELECT symbol, ts FROM trades WHERE ts >= :since",
+                       {"since": since})
 """
 from __future__ import annotations
-import os, requests, typing as _t
-from functools import lru_cache
+import asyncio, logging, os, typing as _t
+
+import aiohttp
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects import postgresql
+
+logger = logging.getLogger(__name__)
 
 # ─── источники адреса ─────────────────────────────────────────────────────
 _ENV_VAR      = os.getenv("MCP_SERVER_URL")          # приоритет №1
@@ -12,38 +28,150 @@ _CANDIDATES   = (
     "http://localhost:8081",
     "http://localhost:3333",
 )
+PROBE_TIMEOUT = 2
+TIMEOUT       = 10
+POOL_LIMIT    = 16
+KEEPALIVE_S   = 60
+FAIL_LIMIT    = 3           # сетевых ошибок подряд до повторного discovery
+
+
+# ─── параметры → литералы ─────────────────────────────────────────────────
+def bind(sql: str, params: dict | None = None) -> str:
+    """:name → экранированный литерал Postgres; list/tuple → IN (...)."""
+    if not params:
+        return sql
+    stmt = text(sql).bindparams(*(
+        bindparam(k, v, expanding=isinstance(v, (list, tuple, set)))
+        for k, v in params.items()
+    ))
+    return str(stmt.compile(dialect=postgresql.dialect(),
+                            compile_kwargs={"literal_binds": True}))
+
+Stmt = _t.Union[str, tuple[str, dict]]
+
+def _sql(stmt: Stmt) -> str:
+    return bind(*stmt) if isinstance(stmt, tuple) else stmt
+
+def _endpoint(sql: str) -> str:
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    return "/mcp/v1/query" if head in ("SELECT", "WITH", "SHOW", "EXPLAIN") else "/mcp/v1/execute"
+
+
+# ─── клиент ───────────────────────────────────────────────────────────────
+class MCPClient:
+    def __init__(self, candidates: _t.Sequence[str] | None = None):
+        self.candidates = tuple(c.rstrip("/") for c in (
+            candidates if candidates is not None
+            else ((_ENV_VAR,) if _ENV_VAR else ()) + _CANDIDATES))
+        self.base: str | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._loop:    asyncio.AbstractEventLoop | None = None
+        self._lock:    asyncio.Lock | None = None
+        self._fails    = 0
+        self._batch_ok = True
+        self.stats = {"calls": 0, "batches": 0, "discoveries": 0}
+
+    # ---------- pool ------------------------------------------------------
+    def _ensure(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=POOL_LIMIT, keepalive_timeout=KEEPALIVE_S)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=TIMEOUT))
+            self._loop, self._lock = loop, asyncio.Lock()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = self._loop = None
+
+    # ---------- discovery -------------------------------------------------
+    async def _alive(self, base: str) -> bool:
+        try:
+            async with self._ensure().options(
+                    base + "/mcp", timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT)) as r:
+                return r.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def discover(self) -> str:
+        """Все кандидаты опрашиваются разом; берётся первый живой по приоритету."""
+        self._ensure()
+        async with self._lock:
+            if self.base:
+                return self.base
+            probes = [asyncio.ensure_future(self._alive(c)) for c in self.candidates]
+            try:
+                for url, probe in zip(self.candidates, probes):
+                    if await probe:             # все более приоритетные уже ответили
+                        self.base, self._fails, self._batch_ok = url, 0, True
+                        self.stats["discoveries"] += 1
+                        logger.info("MCP-Alchemy: %s", url)
+                        return url
+            finally:
+                for p in probes:
+                    p.cancel()
+            raise RuntimeError(
+                "MCP-Alchemy не доступен. "
+                f"Пробовали: {', '.join(self.candidates)}")
+
+    # ---------- transport -------------------------------------------------
+    async def _post(self, endpoint: str, payload: dict) -> dict:
+        base = self.base or await self.discover()
+        try:
+            async with self._ensure().post(base + endpoint, json=payload) as r:
+                r.raise_for_status()
+                data = await r.json()
+        except aiohttp.ClientResponseError:
+            self._fails = 0                 # сервер ответил — адрес рабочий
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._fails += 1
+            if self._fails >= FAIL_LIMIT:
+                logger.warning("MCP-Alchemy %s: %d failures, re-discovering", base, self._fails)
+                self.base = None
+            raise
+        self._fails = 0
+        self.stats["calls"] += 1
+        return data
+
+    # ---------- API -------------------------------------------------------
+    async def query(self, sql: str, params: dict | None = None) -> list[dict]:
+        """SELECT-запрос, возвращает list[dict]."""
+        return (await self._post("/mcp/v1/query", {"query": bind(sql, params)})).get("rows", [])
+
+    async def execute(self, sql: str, params: dict | None = None) -> int:
+        """INSERT/UPDATE/DELETE, возвращает изменённые строки."""
+        return (await self._post("/mcp/v1/execute", {"query": bind(sql, params)})).get("rowcount", 0)
+
+    async def batch(self, stmts: _t.Sequence[Stmt]) -> list[dict]:
+        """
+        Несколько запросов за один round-trip.  stmts — SQL или (SQL, params);
+        результат по каждому — {"rows": [...]} или {"rowcount": n}.
+        """
+        sqls = [_sql(s) for s in stmts]
+        if self._batch_ok:
+            try:
+                data = await self._post("/mcp/v1/batch", {"queries": sqls})
+                self.stats["batches"] += 1
+                return data["results"]
+            except aiohttp.ClientResponseError as ex:
+                if ex.status not in (404, 405):
+                    raise
+                logger.info("MCP-Alchemy: no /mcp/v1/batch, falling back to single calls")
+                self._batch_ok = False
+        return await asyncio.gather(*(self._post(_endpoint(s), {"query": s}) for s in sqls))
+
+
+# ─── singleton + module-level wrappers ───────────────────────────────────
+mcp = MCPClient()
+
+async def query(sql: str, params: dict | None = None) -> list[dict]:
+    return await mcp.query(sql, params)
+
+async def execute(sql: str, params: dict | None = None) -> int:
+    return await mcp.execute(sql, params)
 
-# ─── ping helper ──────────────────────────────────────────────────────────
-def _is_alive(base: str) -> bool:
-    try:
-        r = requests.options(base.rstrip("/") + "/mcp", timeout=2)
-        return r.status_code < 500          
-    except requests.RequestException:
-        return False
-
-@lru_cache
-def _discover_url() -> str:
-    if _ENV_VAR and _is_alive(_ENV_VAR):
-        return _ENV_VAR.rstrip("/")
-    for url in _CANDIDATES:
-        if _is_alive(url):
-            return url.rstrip("/")
-    raise RuntimeError(
-        "MCP-Alchemy не доступен. "
-        f"Пробовали: {', '.join((_ENV_VAR,) if _ENV_VAR else () + _CANDIDATES)}"
-    )
-
-# ─── публичные wrappers ───────────────────────────────────────────────────
-def _post(endpoint: str, payload: dict) -> dict:
-    url = f"{_discover_url()}{endpoint}"
-    r   = requests.post(url, json=payload, timeout=10)
-    r.raise_for_status()
-    return r.json()
-
-def query(sql: str) -> list[dict]:
-    """SELECT-запрос, возвращает list[dict]."""
-    return _post("/mcp/v1/query", {"query": sql}).get("rows", [])
-
-def execute(sql: str) -> int:
-    """INSERT/UPDATE/DELETE, возвращает изменённые строки."""
-    return _post("/mcp/v1/execute", {"query": sql}).get("rowcount", 0)
+async def batch(stmts: _t.Sequence[Stmt]) -> list[dict]:
+    return await mcp.batch(stmts)
@@ -0,0 +1,182 @@
+"""
+Задержки узлов графа и внешних вызовов: гистограммы, Prometheus, разбивка цикла.
+
+    with metrics.timer("exchange_seconds", call="fetch_ohlcv"):
+        ohlcv = await ex.fetch_ohlcv(...)
+
+    @metrics.timed("node_seconds", node="calc_tech")
+    async def calc_tech(...): ...
+
+Гистограмма — фиксированные BUCKETS и счётчики в списке: observe() —
+bisect + три сложения, без блокировок (всё в event-loop).  render()
+отдаёт текстовый формат Prometheus, serve() — GET /metrics на
+METRICS_PORT (engine.py).
+
+Разбивка цикла: breakdown() кладёт накопитель в contextvar; задачи,
+созданные внутри (gather, prefetch), его наследуют, и каждое observe()
+добавляет время к ключу «<метрика>:<первая метка>».  Параллельные вызовы
+суммируются, поэтому сумма может быть больше длительности цикла.
+Фоновые задачи (журнал, ticker-поток) пишут только в гистограммы:
+закрытый накопитель observe() пропускает.
+"""
+import bisect, contextvars, functools, os, time
+from datetime import datetime
+from typing import Callable
+
+from aiohttp import web
+
+PREFIX       = "trademind_"
+BUCKETS      = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+HELP = {
+    "node_seconds":      "LangGraph node latency",
+    "exchange_seconds":  "ccxt call latency",
+    "db_seconds":        "database query latency (as seen by the event loop)",
+    "llm_seconds":       "LLM chat/completions call latency incl. queue and retries",
+    "cycle_seconds":     "trading cycle stage duration",
+    "cycle_lag_seconds": "event to decide start",
+}
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)      # последний — +Inf
+        self.sum, self.count = 0.0, 0
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, v)] += 1
+        self.sum   += v
+        self.count += 1
+
+
+_hist:   dict[tuple[str, tuple], Histogram] = {}
+_gauges: list[Callable[[], dict[str, float]]] = []
+_cycle:  contextvars.ContextVar["breakdown | None"] = contextvars.ContextVar("metrics_cycle",
+                                                                            default=None)
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    key = (name, tuple(labels.items()))
+    h = _hist.get(key)
+    if h is None:
+        h = _hist[key] = Histogram()
+    h.observe(seconds)
+    bd = _cycle.get()
+    if bd is not None and not bd.closed:
+        bd.add(f"{name.removesuffix('_seconds')}:{next(iter(labels.values()), '')}", seconds)
+
+
+class timer:
+    """with timer(name, **labels): — и вокруг await, время — wall-clock."""
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name: str, **labels):
+        self.name, self.labels = name, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0, **self.labels)
+
+
+def timed(name: str, **labels):
+    """Декоратор корутины: timer вокруг каждого вызова."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def run(*a, **kw):
+            with timer(name, **labels):
+                return await fn(*a, **kw)
+        return run
+    return wrap
+
+
+def gauges(fn: Callable[[], dict[str, float]]) -> None:
+    """Источник мгновенных значений (счётчики scheduler, журнала…) для /metrics."""
+    _gauges.append(fn)
+
+
+# ---------- разбивка цикла ------------------------------------------------
+class breakdown:
+    """with breakdown() as bd: … bd.timings — {ключ: {"n": вызовов, "s": секунд}}."""
+
+    def __init__(self):
+        self.acc: dict[str, list] = {}
+        self.closed = False
+
+    def add(self, key: str, seconds: float) -> None:
+        a = self.acc.setdefault(key, [0, 0.0])
+        a[0] += 1
+        a[1] += seconds
+
+    def __enter__(self):
+        self._token = _cycle.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+        _cycle.reset(self._token)
+
+    @property
+    def timings(self) -> dict[str, dict]:
+        return {k: {"n": n, "s": round(s, 4)} for k, (n, s) in self.acc.items()}
+
+
+def cycle_event(timings: dict[str, dict]) -> dict:
+    """Событие для events: узлы по убыванию времени, внешние вызовы — в extra."""
+    nodes = sorted(((k.split(":", 1)[1], v["s"]) for k, v in timings.items()
+                    if k.startswith("node:")), key=lambda x: -x[1])
+    msg = "⏱ " + " · ".join(f"{n} {s:.2f}s" for n, s in nodes) if nodes else "⏱ цикл"
+    return {"ts": datetime.utcnow().strftime("%H:%M:%S"), "msg": msg,
+            "extra": dict(sorted(timings.items(), key=lambda kv: -kv[1]["s"]))}
+
+
+# ---------- экспорт -------------------------------------------------------
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    return ",".join(f'{k}="{_esc(v)}"' for k, v in pairs)
+
+
+def render() -> str:
+    """Текстовый формат Prometheus 0.0.4."""
+    out, seen = [], set()
+    for (name, labels), h in sorted(_hist.items()):
+        full = PREFIX + name
+        if name not in seen:
+            seen.add(name)
+            out.append(f"# HELP {full} {HELP.get(name, name)}")
+            out.append(f"# TYPE {full} histogram")
+        lb, cum = _labels(labels), 0
+        sep = "," if lb else ""
+        for le, c in zip((*BUCKETS, "+Inf"), h.counts):
+            cum += c
+            out.append(f'{full}_bucket{{{lb}{sep}le="{le}"}} {cum}')
+        out.append(f"{full}_sum{{{lb}}} {h.sum:.6f}")
+        out.append(f"{full}_count{{{lb}}} {h.count}")
+    for fn in _gauges:
+        for k, v in fn().items():
+            out.append(f"# TYPE {PREFIX}{k} gauge")
+            out.append(f"{PREFIX}{k} {v}")
+    return "\n".join(out) + "\n"
+
+
+async def _handle(_req: web.Request) -> web.Response:
+    return web.Response(body=render().encode(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def serve(port: int = METRICS_PORT, host: str = "0.0.0.0") -> web.AppRunner:
+    """GET /metrics в текущем event-loop; остановка — runner.cleanup()."""
+    app = web.Application()
+    app.router.add_get("/metrics", _handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -1,33 +1,57 @@
 import uuid, datetime as dt
-from sqlalchemy import String, Text, JSON, DateTime, Float, ForeignKey
+from sqlalchemy import String, Text, JSON, DateTime, Float, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import mapped_column, Mapped, relationship
+from sqlalchemy.orm import mapped_column, Mapped
 from database import Base
 
 # ─── RSS + LLM-кэш ────────────────────────────────────────────────────────
+# На Postgres обе таблицы секционированы по created_at (посуточно, см.
+# retention.py), поэтому created_at входит в первичный ключ, а связь
+# кэш → пост — по post_id без FK (секции удаляются целиком, по времени).
 class RssPost(Base):
     __tablename__ = "rss_posts"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     post_id:   Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     feed_url:  Mapped[str]       = mapped_column(String)
     title:     Mapped[str]       = mapped_column(Text)
     link:      Mapped[str]       = mapped_column(Text)
     content:   Mapped[str]       = mapped_column(Text)
     published: Mapped[dt.datetime] = mapped_column(DateTime)
-    created_at:Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
-    llm_cache: Mapped["NewsLLMCache"] = relationship(back_populates="post", uselist=False, cascade="all, delete")
+    created_at:Mapped[dt.datetime] = mapped_column(DateTime, primary_key=True, default=dt.datetime.utcnow)
 
 class NewsLLMCache(Base):
     __tablename__ = "news_llm_cache"
+    __table_args__ = (
+        Index("ix_news_llm_cache_window", "created_at", "asset", "confidence"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     id:        Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    post_id:   Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("rss_posts.post_id", ondelete="CASCADE"), unique=True)
+    post_id:   Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True)
     asset:     Mapped[str]       = mapped_column(String(16), index=True)
     sentiment: Mapped[str]       = mapped_column(String(8))
     confidence:Mapped[float]     = mapped_column(Float)
     reason:    Mapped[str]       = mapped_column(Text)
     summary_md:Mapped[str]       = mapped_column(Text)
     llm_raw:   Mapped[dict]      = mapped_column(JSON)
-    created_at:Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
-    post:      Mapped[RssPost]   = relationship(back_populates="llm_cache")
+    created_at:Mapped[dt.datetime] = mapped_column(DateTime, primary_key=True, default=dt.datetime.utcnow)
+
+# ─── Агрегат новостей (ведёт триггер, см. news_agg.py) ───────────────────
+class NewsAgg(Base):
+    __tablename__ = "news_agg"
+    __table_args__ = (
+        # покрывающий индекс: окно по bucket (+ asset) читается index-only scan'ом
+        Index("ix_news_agg_bucket", "bucket", "asset",
+              postgresql_include=["stories", "score", "weight", "best_conf",
+                                  "best_sentiment", "best_reason"]),
+    )
+    asset:     Mapped[str]         = mapped_column(String(16), primary_key=True)
+    bucket:    Mapped[dt.datetime] = mapped_column(DateTime, primary_key=True)   # начало BUCKET-интервала
+    stories:   Mapped[int]         = mapped_column(Integer, default=0)
+    score:     Mapped[float]       = mapped_column(Float, default=0.0)  # Σ ±conf·exp((t−bucket)/τ)
+    weight:    Mapped[float]       = mapped_column(Float, default=0.0)  # Σ conf·exp((t−bucket)/τ)
+    best_conf: Mapped[float]       = mapped_column(Float)
+    best_sentiment: Mapped[str]    = mapped_column(String(8))
+    best_reason:    Mapped[str]    = mapped_column(Text)
 
 # ─── Trades (добавлена) ──────────────────────────────────────────────────
 class Trade(Base):
@@ -40,3 +64,20 @@ class Trade(Base):
     price:    Mapped[float] = mapped_column(Float)
     fee:      Mapped[float] = mapped_column(Float)
     realized_pnl: Mapped[float] = mapped_column(Float)
+
+def trades_table(strategy: str = "main"):
+    """Журнал сделок стратегии: main — trades, остальные — trades_<name> той же схемы."""
+    if strategy == "main":
+        return Trade.__table__
+    name = f"trades_{strategy}"
+    if name in Base.metadata.tables:
+        return Base.metadata.tables[name]
+    return Trade.__table__.to_metadata(Base.metadata, name=name)
+
+# ─── Снапшоты кошелька ───────────────────────────────────────────────────
+class WalletSnapshot(Base):
+    __tablename__ = "wallet_snapshots"
+    name:      Mapped[str]         = mapped_column(String(32), primary_key=True)
+    ts:        Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    watermark: Mapped[dt.datetime] = mapped_column(DateTime, nullable=True)  # ts последней учтённой сделки
+    state:     Mapped[dict]        = mapped_column(JSON)
@@ -0,0 +1,113 @@
+"""
+Поиск почти-дубликатов новостей (перепечатки одной истории в разных лентах).
+
+MinHash по словесным 2-шинглам заголовка и начала текста (NUM_PERM
+перестановок), LSH: BANDS полос по ROWS строк — кандидаты из общих
+корзин, затем проверка оценки Jaccard ≥ THRESHOLD.  Индекс живёт в
+памяти, держит статьи за WINDOW_HOURS и пересобирается из rss_posts /
+news_llm_cache при старте rss_listener.
+
+Кластер — post_id первой статьи истории (str).  Для кластера хранится
+результат классификации (или Future, пока LLM ещё считает), чтобы копия
+переиспользовала его без вызова LLM.
+"""
+import asyncio, re, time, zlib
+from collections import defaultdict
+
+import numpy as np
+
+NUM_PERM     = 64
+BANDS, ROWS  = 32, 2           # BANDS*ROWS == NUM_PERM; порог LSH ≈ (1/32)^(1/2) ≈ 0.18
+THRESHOLD    = 0.4             # оценка Jaccard для «той же истории»
+SHINGLE      = 2
+MAX_WORDS    = 300
+WINDOW_HOURS = 48
+
+_P   = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240601)
+_A   = _rng.integers(1, (1 << 31) - 1, NUM_PERM, dtype=np.uint64)
+_B   = _rng.integers(0, (1 << 31) - 1, NUM_PERM, dtype=np.uint64)
+_WORD = re.compile(r"\w+", re.U)
+
+
+def shingles(text: str) -> set[int]:
+    words = _WORD.findall(text.lower())[:MAX_WORDS]
+    if len(words) < SHINGLE:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {zlib.crc32(" ".join(words[i:i + SHINGLE]).encode())
+            for i in range(len(words) - SHINGLE + 1)}
+
+
+def signature(text: str) -> np.ndarray:
+    x = np.fromiter(shingles(text), dtype=np.uint64)
+    return ((np.outer(_A, x) + _B[:, None]) % _P).min(axis=1)    # (NUM_PERM,)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float((a == b).mean())
+
+
+class NearDupIndex:
+    def __init__(self, window_hours: float = WINDOW_HOURS, threshold: float = THRESHOLD):
+        self.window, self.threshold = window_hours * 3600, threshold
+        self._sig:     dict[str, np.ndarray] = {}
+        self._ts:      dict[str, float] = {}
+        self._cluster: dict[str, str] = {}                      # post → кластер
+        self._buckets: dict[tuple[int, bytes], set[str]] = defaultdict(set)
+        self.results:  dict[str, dict | asyncio.Future] = {}   # кластер → классификация
+        self.stats = {"added": 0, "duplicates": 0}
+
+    def __len__(self) -> int:
+        return len(self._sig)
+
+    def _bands(self, sig: np.ndarray):
+        for b in range(BANDS):
+            yield b, sig[b * ROWS:(b + 1) * ROWS].tobytes()
+
+    def match(self, sig: np.ndarray) -> tuple[str, float] | None:
+        """(кластер, сходство) лучшего кандидата выше порога."""
+        cands = set().union(*(self._buckets.get(k, ()) for k in self._bands(sig)))
+        best = max(((similarity(sig, self._sig[p]), p) for p in cands), default=None)
+        if best and best[0] >= self.threshold:
+            return self._cluster[best[1]], best[0]
+        return None
+
+    def add(self, post_id: str, text: str, ts: float | None = None,
+            cluster: str | None = None) -> tuple[str, bool]:
+        """Кладёт статью в индекс; (кластер, это дубль?)."""
+        sig = signature(text)
+        hit = None if cluster else self.match(sig)
+        cluster = cluster or (hit[0] if hit else post_id)
+        self._sig[post_id], self._cluster[post_id] = sig, cluster
+        self._ts[post_id] = ts or time.time()
+        for k in self._bands(sig):
+            self._buckets[k].add(post_id)
+        self.stats["added"] += 1
+        self.stats["duplicates"] += cluster != post_id
+        return cluster, cluster != post_id
+
+    def expire(self, now: float | None = None) -> int:
+        cutoff = (now or time.time()) - self.window
+        old = [p for p, ts in self._ts.items() if ts < cutoff]
+        for p in old:
+            sig = self._sig.pop(p)
+            for k in self._bands(sig):
+                self._buckets[k].discard(p)
+                if not self._buckets[k]:
+                    del self._buckets[k]
+            del self._ts[p]
+            self._cluster.pop(p)
+        live = set(self._cluster.values())
+        for c in [c for c in self.results if c not in live]:
+            del self.results[c]
+        return len(old)
+
+    def clusters(self) -> dict[str, list[str]]:
+        out: dict[str, list[str]] = defaultdict(list)
+        for p, c in self._cluster.items():
+            out[c].append(p)
+        return dict(out)
+
+
+# ───────── singleton ───────────────────────────────────────────────────────
+index = NearDupIndex()
@@ -4,6 +4,10 @@
    возвращаем [] — граф продолжает работу.
 2) Вся работа с БД остаётся синхронной через sync_engine
    (thread-pool executor), поэтому конфликтов event-loop нет.
+3) Когда news_signal слушает LISTEN/NOTIFY, сигналы берутся из его
+   окна в памяти, а SELECT остаётся запасным путём.
+4) Запасной SELECT на Postgres читает агрегат news_agg (index-only
+   scan, +затухшая тональность score), а не сырой news_llm_cache.
 """
 from __future__ import annotations
 
@@ -16,8 +20,9 @@ from sqlalchemy.exc import ProgrammingError, OperationalError
 
 from database import sync_engine, Base            
 from models    import NewsLLMCache
-
-WINDOW_HOURS = 6  # берём новости «не старше» 6 ч
+import news_agg
+from metrics import timer
+from news_signal import signal_store, WINDOW_HOURS   # новости «не старше» 6 ч
 
 
 # ───────────────────────── helpers ────────────────────────────────────────
@@ -41,16 +46,37 @@ def _read_db(dt_from):
         Base.metadata.create_all(sync_engine)
         return []
 
+def _read_agg(dt_from) -> list[dict]:
+    """Postgres: готовые сигналы по активу из news_agg (index-only scan)."""
+    try:
+        with sync_engine.connect() as conn:
+            return news_agg.reduce(conn.execute(news_agg.window_query(dt_from)).all())
+    except (ProgrammingError, OperationalError):
+        Base.metadata.create_all(sync_engine)
+        return []
+
 
 # ───────────────────────── публичный API ─────────────────────────────────
 async def _fetch_latest() -> list[dict]:
     dt_from = datetime.utcnow() - timedelta(hours=WINDOW_HOURS)
     loop = asyncio.get_running_loop()
-    rows = await loop.run_in_executor(None, _read_db, dt_from)
+    if sync_engine.dialect.name == "postgresql":
+        with timer("db_seconds", query="news_agg"):
+            return await loop.run_in_executor(None, _read_agg, dt_from)
+    with timer("db_seconds", query="news_llm_cache"):
+        rows = await loop.run_in_executor(None, _read_db, dt_from)
+
+    # перепечатки одной истории (near_dup-кластер в llm_raw) считаем один раз:
+    # берём первую запись кластера
+    story: dict[str, NewsLLMCache] = {}
+    for r in sorted(rows, key=lambda r: r.created_at):
+        story.setdefault((r.llm_raw or {}).get("cluster") or str(r.post_id), r)
 
     # оставляем запись с max(confidence) для каждого asset
     best: dict[str, NewsLLMCache] = {}
-    for r in rows:
+    stories: dict[str, int] = {}
+    for r in story.values():
+        stories[r.asset] = stories.get(r.asset, 0) + 1
         if r.asset not in best or r.confidence > best[r.asset].confidence:
             best[r.asset] = r
 
@@ -60,6 +86,7 @@ async def _fetch_latest() -> list[dict]:
             sentiment=r.sentiment,
             confidence=r.confidence,
             reason=r.reason,
+            stories=stories[r.asset],
         )
         for r in best.values()
     ]
@@ -67,4 +94,6 @@ async def _fetch_latest() -> list[dict]:
 
 async def news_signals() -> list[dict]:
     """Асинхронный источник новостей для графа (thread-safe)."""
+    if signal_store.live:
+        return signal_store.signals()
     return await _fetch_latest()
@@ -0,0 +1,118 @@
+"""
+Агрегат news_agg: по активу и BUCKET-интервалу — число историй,
+взвешенная тональность и лучший сигнал интервала.
+
+Строку ведёт триггер AFTER INSERT на news_llm_cache (Postgres): перепечатки
+(llm_raw.dup_of) не считаются, тональность ±1 (bullish / bearish, neutral
+— 0) умножается на confidence и на exp((t − bucket)/τ).  Поскольку
+exp(−(now − t)/τ) = exp(−(now − bucket)/τ) · exp((t − bucket)/τ), затухание
+«на сейчас» досчитывается при чтении одним множителем на интервал:
+
+    score = Σ score_b·d_b / Σ weight_b·d_b ∈ [−1, 1],  d_b = exp(−(now − bucket_b)/τ)
+
+Окно в 6 ч — ≈ 72 строки на актив из покрывающего индекса
+ix_news_agg_bucket (index-only scan), без чтения сырых таблиц.
+"""
+import math
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from models import NewsAgg
+
+BUCKET      = 300                            # сек
+HALF_LIFE_H = 2.0                            # период полураспада тональности
+TAU         = HALF_LIFE_H * 3600 / math.log(2)
+
+_SIGN = "CASE {s} WHEN 'bullish' THEN 1 WHEN 'bearish' THEN -1 ELSE 0 END"
+_BIN  = f"date_bin('{BUCKET} seconds', {{t}}, TIMESTAMP '2000-01-01')"
+
+FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION news_agg_upsert() RETURNS trigger AS $$
+DECLARE
+    b timestamp        := {_BIN.format(t="NEW.created_at")};
+    w double precision := NEW.confidence * exp(extract(epoch FROM NEW.created_at - b) / {TAU});
+BEGIN
+    IF NEW.llm_raw ->> 'dup_of' IS NOT NULL THEN       -- перепечатка истории
+        RETURN NULL;
+    END IF;
+    INSERT INTO news_agg AS a (asset, bucket, stories, score, weight,
+                               best_conf, best_sentiment, best_reason)
+    VALUES (NEW.asset, b, 1, {_SIGN.format(s="NEW.sentiment")} * w, w,
+            NEW.confidence, NEW.sentiment, NEW.reason)
+    ON CONFLICT (asset, bucket) DO UPDATE SET
+        stories        = a.stories + 1,
+        score          = a.score  + EXCLUDED.score,
+        weight         = a.weight + EXCLUDED.weight,
+        best_conf      = GREATEST(a.best_conf, EXCLUDED.best_conf),
+        best_sentiment = CASE WHEN EXCLUDED.best_conf > a.best_conf
+                              THEN EXCLUDED.best_sentiment ELSE a.best_sentiment END,
+        best_reason    = CASE WHEN EXCLUDED.best_conf > a.best_conf
+                              THEN EXCLUDED.best_reason ELSE a.best_reason END;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql
+"""
+
+TRIGGER_SQL = """
+CREATE OR REPLACE TRIGGER news_agg_upsert AFTER INSERT ON news_llm_cache
+    FOR EACH ROW EXECUTE FUNCTION news_agg_upsert()
+"""
+
+# пустой агрегат при существующем кэше (первый запуск после обновления)
+BACKFILL_SQL = f"""
+INSERT INTO news_agg (asset, bucket, stories, score, weight,
+                      best_conf, best_sentiment, best_reason)
+SELECT asset, b, count(*), sum(sgn * w), sum(w),
+       (array_agg(confidence ORDER BY confidence DESC, created_at))[1],
+       (array_agg(sentiment  ORDER BY confidence DESC, created_at))[1],
+       (array_agg(reason     ORDER BY confidence DESC, created_at))[1]
+FROM (SELECT asset, confidence, sentiment, reason, created_at, b,
+             {_SIGN.format(s="sentiment")} AS sgn,
+             confidence * exp(extract(epoch FROM created_at - b) / {TAU}) AS w
+      FROM (SELECT *, {_BIN.format(t="created_at")} AS b FROM news_llm_cache
+            WHERE llm_raw ->> 'dup_of' IS NULL) r) x
+GROUP BY asset, b
+ON CONFLICT DO NOTHING
+"""
+
+
+def install(conn) -> None:
+    """Функция + триггер (идемпотентно) и backfill пустого агрегата; sync-соединение."""
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(text(FUNCTION_SQL))
+    conn.execute(text(TRIGGER_SQL))
+    if conn.execute(select(NewsAgg.asset).limit(1)).first() is None:
+        conn.execute(text(BACKFILL_SQL))
+
+
+# ---------- чтение ---------------------------------------------------------
+def window_query(dt_from: datetime, asset: str | None = None):
+    """Интервалы, пересекающие окно [dt_from, now); только колонки индекса."""
+    q = (select(NewsAgg.asset, NewsAgg.bucket, NewsAgg.stories, NewsAgg.score,
+                NewsAgg.weight, NewsAgg.best_conf, NewsAgg.best_sentiment, NewsAgg.best_reason)
+         .where(NewsAgg.bucket > dt_from - timedelta(seconds=BUCKET)))
+    return q if asset is None else q.where(NewsAgg.asset == asset)
+
+
+def top_query(asset: str, dt_from: datetime, n: int):
+    """Лучшие сигналы актива в окне — по одному на интервал."""
+    return (select(NewsAgg.asset, NewsAgg.best_sentiment, NewsAgg.best_conf, NewsAgg.best_reason)
+            .where(NewsAgg.bucket > dt_from - timedelta(seconds=BUCKET))
+            .where(NewsAgg.asset == asset)
+            .order_by(NewsAgg.best_conf.desc()).limit(n))
+
+
+def reduce(rows, now: datetime | None = None) -> list[dict]:
+    """Строки window_query → сигнал на актив (как news_agent) + затухшая тональность."""
+    now = now or datetime.utcnow()
+    acc: dict[str, list] = {}
+    for r in sorted(rows, key=lambda r: r.bucket):
+        d = math.exp(-(now - r.bucket).total_seconds() / TAU)
+        a = acc.setdefault(r.asset, [0, 0.0, 0.0, r])
+        a[0] += r.stories; a[1] += r.score * d; a[2] += r.weight * d
+        if r.best_conf > a[3].best_conf:            # при равенстве — более ранний
+            a[3] = r
+    return [dict(asset=asset, sentiment=b.best_sentiment, confidence=b.best_conf,
+                 reason=b.best_reason, stories=n, score=round(s / w, 4) if w else 0.0)
+            for asset, (n, s, w, b) in acc.items()]
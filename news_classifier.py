@@ -0,0 +1,211 @@
+"""
+Пакетная LLM-классификация новостей.
+
+Статьи копятся BATCH_WINDOW секунд (или пока не наберётся бюджет) и
+упаковываются в запросы, укладывающиеся в TOKEN_BUDGET: один
+system-промпт на пачку, каждая статья под коротким id (a1, a2, …).
+Модель возвращает JSON-объект {id: [{asset, sentiment, confidence,
+reason}, …]}; результат разбирается по id — битый или пропущенный элемент
+(не та тональность, asset длиннее колонки, reason не строка) валит только
+свою статью (parse_error), а если не разобрался весь ответ, пачка делится
+пополам и повторяется.
+
+on_batch(пары (payload, items)) вызывается один раз на пачку — там
+вызывающий пишет всё в БД одной транзакцией; если запись пачки упала,
+статьи пишутся по одной, и ошибка достаётся только своей статье.
+"""
+import asyncio, json, logging, re, time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from llm_client import llm, LLMError, LLMRateLimited
+
+logger = logging.getLogger(__name__)
+
+MODEL          = "google/gemini-2.5-flash-preview-05-20"
+DEADLINE       = 120        # сек на пачку, включая 429-паузы
+BATCH_WINDOW   = 2.0        # сек ожидания добора пачки
+TOKEN_BUDGET   = 6000       # входных токенов на запрос (без system)
+MAX_ITEMS      = 12         # статей в запросе
+OUT_TOKENS_PER = 80         # ответных токенов на статью (для max_tokens)
+SENTIMENTS     = {"bullish", "bearish", "neutral", "positive", "negative"}
+ASSET_MAX      = 16         # news_llm_cache.asset — String(16)
+
+SYSTEM = (
+    "Ты крипто-аналитик. На вход даётся несколько новостей, каждая "
+    "начинается строкой «### <id>». Верни *ТОЛЬКО* JSON-объект вида "
+    '{"<id>": [{"asset":"BTC|ETH|SOL|DOGE|...|general",'
+    '"sentiment":"bullish|bearish|neutral",'
+    '"confidence":0.0-1.0,'
+    '"reason":"краткое пояснение"}, …], …} '
+    "с ключом для КАЖДОГО id. Если новость никак не влияет — пустой массив."
+)
+
+
+def tokens(text: str) -> int:
+    """Оценка как в utils.text.squeeze_text: 1 токен ≈ 0.75 слова."""
+    return int(len(text.split()) / 0.75) + 4
+
+
+def pack(items: list, budget: int = TOKEN_BUDGET, max_items: int = MAX_ITEMS) -> list[list]:
+    """Жадная упаковка по порядку поступления; items — (…, text, …) с .text."""
+    batches, cur, used = [], [], 0
+    for it in items:
+        t = tokens(it.text)
+        if cur and (used + t > budget or len(cur) >= max_items):
+            batches.append(cur); cur, used = [], 0
+        cur.append(it); used += t
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def _valid(x) -> bool:
+    if not isinstance(x, dict):
+        return False
+    asset, sent = x.get("asset", "general"), x.get("sentiment", "neutral")
+    return (isinstance(asset, str) and 0 < len(asset) <= ASSET_MAX
+            and isinstance(sent, str) and sent.lower() in SENTIMENTS
+            and isinstance(x.get("confidence", 0.5), (int, float))
+            and isinstance(x.get("reason", ""), str))
+
+def parse_batch(raw: str, ids: list[str]) -> dict[str, list[dict] | None] | None:
+    """{id: items | None (битый элемент)}; None — не разобран весь ответ."""
+    m = re.search(r"\{.*\}", raw or "", re.S)
+    try:
+        obj = json.loads(m.group(0))
+    except (AttributeError, json.JSONDecodeError):
+        return None
+    if not isinstance(obj, dict):
+        return None
+    out = {}
+    for i in ids:
+        v = obj.get(i)
+        out[i] = v if isinstance(v, list) and all(_valid(x) for x in v) else None
+    return out
+
+
+def _fallback(reason: str) -> list[dict]:
+    return [{"asset": "general", "sentiment": "neutral", "confidence": 0.0, "reason": reason}]
+
+
+@dataclass
+class _Item:
+    text:    str
+    payload: Any
+    fut:     asyncio.Future = field(repr=False)
+
+
+class BatchClassifier:
+    def __init__(self, on_batch: Callable[[list[tuple[Any, list[dict]]]], Awaitable[None]], *,
+                 window: float = BATCH_WINDOW, budget: int = TOKEN_BUDGET,
+                 max_items: int = MAX_ITEMS, model: str = MODEL):
+        self.on_batch, self.window, self.budget = on_batch, window, budget
+        self.max_items, self.model = max_items, model
+        self.stats = {"items": 0, "requests": 0, "item_errors": 0, "splits": 0,
+                      "write_errors": 0}
+        self._pending: list[_Item] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    # ---------- приём ------------------------------------------------------
+    async def submit(self, text: str, payload: Any) -> list[dict]:
+        """Ставит статью в пачку; возвращается после on_batch её пачки."""
+        loop = asyncio.get_running_loop()
+        it = _Item(text, payload, loop.create_future())
+        self._pending.append(it)
+        if sum(tokens(p.text) for p in self._pending) >= self.budget \
+                or len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await it.fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel(); self._timer = None
+        items, self._pending = self._pending, []
+        for batch in pack(items, self.budget, self.max_items):
+            t = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(t); t.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        """Отправляет то, что ждёт окна, и дожидается всех пачек."""
+        if self._pending:
+            self._flush()
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ---------- LLM ---------------------------------------------------------
+    async def _ask(self, batch: list[_Item]) -> dict[str, list[dict] | None] | None:
+        ids  = [f"a{i}" for i in range(1, len(batch) + 1)]
+        user = "\n\n".join(f"### {i}\n{it.text}" for i, it in zip(ids, batch))
+        self.stats["requests"] += 1
+        raw = await llm.chat([{"role": "system", "content": SYSTEM},
+                              {"role": "user",   "content": user}],
+                             model=self.model, temperature=0.2, deadline=DEADLINE,
+                             max_tokens=OUT_TOKENS_PER * len(batch) + 200)
+        res = parse_batch(raw, ids)
+        return None if res is None else {i: res[i] for i in ids}
+
+    async def _classify(self, batch: list[_Item]) -> list[list[dict]]:
+        try:
+            res = await self._ask(batch)
+        except LLMError as ex:
+            why = "rate_limited" if isinstance(ex, LLMRateLimited) else "deadline"
+            return [_fallback(why) for _ in batch]
+        if res is None:
+            if len(batch) == 1:
+                self.stats["item_errors"] += 1
+                return [_fallback("parse_error")]
+            self.stats["splits"] += 1                   # весь ответ битый — делим пачку
+            mid = len(batch) // 2
+            a, b = await asyncio.gather(self._classify(batch[:mid]), self._classify(batch[mid:]))
+            return a + b
+        out = []
+        for v in res.values():
+            if v is None:
+                self.stats["item_errors"] += 1
+            out.append(v if v is not None else _fallback("parse_error"))
+        return out
+
+    async def _store(self, batch: list[_Item], results: list[list[dict]]) -> list:
+        """on_batch пачкой; упала — по одной статье.  Ошибка записи или None по статьям."""
+        pairs = [(it.payload, r) for it, r in zip(batch, results)]
+        try:
+            await self.on_batch(pairs)
+            return [None] * len(batch)
+        except Exception as ex:
+            if len(batch) == 1:
+                return [ex]
+            logger.warning("batch write failed (%d articles), retrying one by one: %s",
+                           len(batch), ex)
+        errors = []
+        for pair in pairs:
+            try:
+                await self.on_batch([pair])
+                errors.append(None)
+            except Exception as ex:
+                errors.append(ex)
+        return errors
+
+    async def _run(self, batch: list[_Item]) -> None:
+        t0 = time.perf_counter()
+        try:
+            results = await self._classify(batch)
+        except Exception as ex:
+            for it in batch:
+                if not it.fut.done():
+                    it.fut.set_exception(ex)
+            return
+        errors = await self._store(batch, results)
+        self.stats["items"] += len(batch)
+        self.stats["write_errors"] += sum(e is not None for e in errors)
+        logger.info("LLM batch: %d articles in %.1fs", len(batch), time.perf_counter() - t0)
+        for it, r, err in zip(batch, results, errors):
+            if it.fut.done():
+                continue
+            if err is not None:
+                it.fut.set_exception(err)
+            else:
+                it.fut.set_result(r)
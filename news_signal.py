@@ -0,0 +1,260 @@
+"""
+Push-хранилище новостных сигналов для движка.
+
+rss_listener на каждую новую строку news_llm_cache шлёт NOTIFY в канал
+news_store.CHANNEL; здесь отдельное asyncpg-соединение слушает канал и
+инкрементально обновляет окно WINDOW_HOURS по каждому активу:
+
+    items — истории актива по времени (перепечатки near_dup-кластера
+            считаются один раз: в окне стоит самая ранняя живая копия);
+    top   — монотонная очередь по confidence: top[0] — лучший сигнал окна.
+
+Устаревшие записи снимаются с головы очередей, поэтому лучший сигнал
+берётся за O(1) на актив, и в БД signals() не ходит (затухшая тональность
+score — проход по историям окна актива, как в news_agg).  После (пере)подключения — догоняющий
+SELECT узких колонок с created_at ≥ watermark; дубли по post_id
+отбрасываются.  Пока соединения нет, news_agent читает БД как раньше.
+"""
+import asyncio, bisect, json, logging, time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import asyncpg, math
+from sqlalchemy import select
+
+from database import engine, DB_DSN
+from models import NewsLLMCache
+from news_store import CHANNEL
+from news_agg import TAU
+
+logger = logging.getLogger(__name__)
+
+WINDOW_HOURS   = 6            # новости «не старше» 6 ч (news_agent)
+CATCHUP_SKEW   = 5            # сек: догоняем с запасом — created_at ставят клиенты
+KEEPALIVE      = 30           # сек: проверка LISTEN-соединения
+RECONNECT_MIN  = 1
+RECONNECT_MAX  = 60
+
+_EPOCH = datetime(1970, 1, 1)
+_SIGN  = {"bullish": 1, "bearish": -1}
+
+
+def _ts(dt: datetime) -> float:
+    return (dt - _EPOCH).total_seconds()
+
+
+@dataclass(slots=True, eq=False)
+class Signal:
+    post_id:    str
+    cluster:    str
+    asset:      str
+    sentiment:  str
+    confidence: float
+    reason:     str
+    ts:         float            # created_at, сек UTC
+
+    @classmethod
+    def from_payload(cls, p: dict) -> "Signal":
+        return cls(p["post_id"], p.get("cluster") or p["post_id"], p["asset"],
+                   p["sentiment"], float(p["confidence"]), p.get("reason") or "",
+                   _ts(datetime.fromisoformat(p["ts"])))
+
+
+class _AssetWindow:
+    """Истории одного актива в окне + монотонный максимум confidence."""
+    __slots__ = ("items", "top")
+
+    def __init__(self):
+        self.items: deque[Signal] = deque()
+        self.top:   deque[Signal] = deque()
+
+    def _push_top(self, s: Signal) -> None:
+        # равные не выталкиваем: при равенстве лучший — более ранний
+        while self.top and self.top[-1].confidence < s.confidence:
+            self.top.pop()
+        self.top.append(s)
+
+    def _rebuild(self) -> None:
+        self.top.clear()
+        for s in self.items:
+            self._push_top(s)
+
+    def add(self, s: Signal) -> None:
+        if self.items and s.ts < self.items[-1].ts:      # пришёл не по порядку — редко
+            items = list(self.items)
+            bisect.insort(items, s, key=lambda x: x.ts)
+            self.items = deque(items)
+            self._rebuild()
+        else:
+            self.items.append(s)
+            self._push_top(s)
+
+    def remove(self, s: Signal) -> None:
+        self.items.remove(s)
+        self._rebuild()
+
+    def score(self, now: float) -> float:
+        """Затухшая тональность окна, как news_agg: Σ ±conf·d / Σ conf·d."""
+        num = den = 0.0
+        for s in self.items:
+            w = s.confidence * math.exp(-(now - s.ts) / TAU)
+            num += _SIGN.get(s.sentiment, 0) * w; den += w
+        return round(num / den, 4) if den else 0.0
+
+    def expire(self, cutoff: float) -> list[Signal]:
+        out = []
+        while self.items and self.items[0].ts < cutoff:
+            s = self.items.popleft()
+            if self.top and self.top[0] is s:
+                self.top.popleft()
+            out.append(s)
+        return out
+
+
+class SignalStore:
+    def __init__(self, window_hours: float = WINDOW_HOURS, dsn: str = DB_DSN):
+        self.window = window_hours * 3600
+        self.dsn    = dsn.replace("postgresql+asyncpg", "postgresql")
+        self.live   = False                               # слушаем канал и догнали БД
+        self.watermark: datetime | None = None            # max created_at из принятых
+        self.stats  = {"notified": 0, "caught_up": 0, "duplicates": 0,
+                       "expired": 0, "bad_payload": 0, "reconnects": 0}
+        self._assets:   dict[str, _AssetWindow] = {}
+        self._clusters: dict[str, list[Signal]] = {}      # кластер → копии по времени
+        self._seen:     set[str] = set()                  # post_id в окне
+        self._listeners: list = []                        # fn(signal) на новый сигнал
+        self._task: asyncio.Task | None = None
+
+    # ---------- окно -----------------------------------------------------
+    def add(self, s: Signal) -> bool:
+        """Кладёт сигнал в окно; False — такой post_id уже есть."""
+        if s.post_id in self._seen:
+            self.stats["duplicates"] += 1
+            return False
+        self._seen.add(s.post_id)
+        copies = self._clusters.setdefault(s.cluster, [])
+        bisect.insort(copies, s, key=lambda x: x.ts)
+        if copies[0] is s:                                 # новая (или более ранняя) история
+            if len(copies) > 1:
+                self._assets[copies[1].asset].remove(copies[1])
+            self._assets.setdefault(s.asset, _AssetWindow()).add(s)
+        return True
+
+    def expire(self, now: float | None = None) -> int:
+        """Снимает истории старше окна; вместо них — следующая живая копия кластера."""
+        cutoff = (now or time.time()) - self.window
+        promote, n = [], 0
+        for w in self._assets.values():
+            for s in w.expire(cutoff):
+                copies = self._clusters[s.cluster]
+                while copies and copies[0].ts < cutoff:
+                    self._seen.discard(copies.pop(0).post_id)
+                    n += 1
+                if copies:
+                    promote.append(copies[0])
+                else:
+                    del self._clusters[s.cluster]
+        for s in promote:
+            self._assets.setdefault(s.asset, _AssetWindow()).add(s)
+        for a in [a for a, w in self._assets.items() if not w.items]:
+            del self._assets[a]
+        self.stats["expired"] += n
+        return n
+
+    def signals(self, now: float | None = None) -> list[dict]:
+        """Лучший сигнал по каждому активу в окне — без обращения к БД."""
+        now = now or time.time()
+        self.expire(now)
+        return [dict(asset=a, sentiment=w.top[0].sentiment, confidence=w.top[0].confidence,
+                     reason=w.top[0].reason, stories=len(w.items), score=w.score(now))
+                for a, w in self._assets.items()]
+
+    def subscribe(self, fn) -> None:
+        """fn(signal) — на каждый новый (не дубль) сигнал из канала или догонки."""
+        self._listeners.append(fn)
+
+    def _accept(self, s: Signal, dt: datetime, src: str) -> None:
+        if self.add(s):
+            self.stats[src] += 1
+            for fn in self._listeners:
+                fn(s)
+        if self.watermark is None or dt > self.watermark:
+            self.watermark = dt
+
+    # ---------- Postgres ---------------------------------------------------
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            p = json.loads(payload)
+            self._accept(Signal.from_payload(p), datetime.fromisoformat(p["ts"]), "notified")
+        except (ValueError, KeyError, TypeError) as ex:
+            self.stats["bad_payload"] += 1
+            logger.warning("news_signal: bad payload %.80r: %s", payload, ex)
+
+    async def catch_up(self) -> int:
+        """Строки news_llm_cache после watermark (на старте — за всё окно)."""
+        since = (self.watermark - timedelta(seconds=CATCHUP_SKEW) if self.watermark
+                 else datetime.utcnow() - timedelta(seconds=self.window))
+        c = NewsLLMCache
+        q = (select(c.post_id, c.llm_raw["cluster"].as_string(), c.asset, c.sentiment,
+                    c.confidence, c.reason, c.created_at)
+             .where(c.created_at >= since).order_by(c.created_at))
+        async with engine.connect() as conn:
+            rows = (await conn.execute(q)).all()
+        before = self.stats["caught_up"]
+        for pid, cluster, asset, sent, conf, reason, created in rows:
+            self._accept(Signal(str(pid), cluster or str(pid), asset, sent, conf,
+                                reason or "", _ts(created)), created, "caught_up")
+        return self.stats["caught_up"] - before
+
+    async def _listen_once(self) -> None:
+        conn = await asyncpg.connect(self.dsn)
+        try:
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _c: closed.set())
+            await conn.add_listener(CHANNEL, self._on_notify)   # сначала LISTEN, потом догоняем
+            n = await self.catch_up()
+            self.live = True
+            logger.info("news_signal: listening, caught up %d rows, %d assets",
+                        n, len(self._assets))
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    await conn.execute("SELECT 1")           # мёртвое соединение → исключение
+        finally:
+            self.live = False
+            if not conn.is_closed():
+                await conn.close(timeout=5)
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while True:
+            t0 = time.monotonic()
+            try:
+                await self._listen_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.warning("news_signal: %s: %s", type(ex).__name__, (str(ex).splitlines() or [""])[0])
+            self.stats["reconnects"] += 1
+            if time.monotonic() - t0 > RECONNECT_MAX:        # долго жили — начинаем заново
+                delay = RECONNECT_MIN
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def start(self) -> None:
+        """Только для Postgres; на других БД news_agent остаётся на SELECT'ах."""
+        if engine.dialect.name != "postgresql" or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# ───────── singleton ───────────────────────────────────────────────────────
+signal_store = SignalStore()
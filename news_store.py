@@ -0,0 +1,114 @@
+"""
+Set-based запись новостей: один запрос на дедупликацию за проход и
+multi-row INSERT … ON CONFLICT DO NOTHING для rss_posts / news_llm_cache.
+
+Функции только строят выражения под диалект (Postgres — основной,
+SQLite — офлайн-бенчмарк); выполняет их вызывающий на своём соединении
+(async в rss_listener, sync в bench.bench_ingest).
+
+Новые строки news_llm_cache на Postgres дополнительно уходят в канал
+CHANNEL (NOTIFY в той же транзакции — доставка только после COMMIT);
+формат payload — signal_payload(), читает его news_signal.
+"""
+import json, uuid
+from datetime import datetime
+
+from sqlalchemy import any_, bindparam, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.types import Text
+
+from models import RssPost, NewsLLMCache
+
+_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+CHANNEL = "news_signal"
+
+
+def post_uid(link: str) -> uuid.UUID:
+    return uuid.uuid5(uuid.NAMESPACE_URL, link)
+
+
+def select_known(ids: list[uuid.UUID], dialect: str):
+    """post_id из ids, которые уже есть в rss_posts: = ANY(:ids) на Postgres."""
+    if dialect == "postgresql":
+        arr = bindparam("ids", list(ids), type_=ARRAY(UUID(as_uuid=True)))
+        return select(RssPost.post_id).where(RssPost.post_id == any_(arr))
+    return select(RssPost.post_id).where(RssPost.post_id.in_(list(ids)))
+
+
+def lock_posts(ids: list[uuid.UUID]):
+    """
+    Транзакционные advisory-локи на post_id (только Postgres), по порядку
+    ключей — без взаимоблокировок.  Ключ секционированной rss_posts —
+    (post_id, created_at), уникальность post_id таблица не держит: пишущий
+    берёт локи, затем select_known() в той же транзакции видит всё, что
+    закоммитили конкуренты, и вставляет только новые post_id.
+    """
+    return (text("SELECT pg_advisory_xact_lock(k) FROM "
+                 "(SELECT DISTINCT hashtextextended(CAST(x AS text), 0) AS k "
+                 " FROM unnest(:ids) AS x ORDER BY k) s")
+            .bindparams(bindparam("ids", list(ids), type_=ARRAY(UUID(as_uuid=True)))))
+
+
+def insert_posts(dialect: str):
+    """
+    executemany по строкам-словарям; RETURNING — реально вставленные post_id.
+    Дубли post_id отсекают lock_posts() + select_known() в транзакции записи:
+    created_at у каждой строки свой, так что ON CONFLICT (ключ post_id,
+    created_at) здесь дубль не поймает.
+    """
+    return (_INSERT[dialect](RssPost.__table__)
+            .on_conflict_do_nothing()
+            .returning(RssPost.post_id))
+
+
+def insert_cache(dialect: str):
+    return _INSERT[dialect](NewsLLMCache.__table__).on_conflict_do_nothing()
+
+
+def post_row(feed_url: str, entry, text: str) -> dict:
+    return dict(
+        post_id   = post_uid(entry.link),
+        feed_url  = feed_url,
+        title     = entry.title,
+        link      = entry.link,
+        content   = text,
+        published = datetime(*entry.published_parsed[:6])
+                    if entry.get("published_parsed") else datetime.utcnow(),
+        created_at = datetime.utcnow(),
+    )
+
+
+def cache_row(post: dict, user_text: str, best: dict) -> dict:
+    return dict(
+        id         = uuid.uuid4(),
+        post_id    = post["post_id"],
+        asset      = str(best.get("asset") or "general")[:16],
+        sentiment  = str(best.get("sentiment") or "neutral")[:8],
+        confidence = float(best.get("confidence", 0.5)),
+        reason     = str(best.get("reason") or "")[:300],
+        summary_md = user_text,
+        llm_raw    = best,
+        created_at = datetime.utcnow(),
+    )
+
+
+def signal_payload(row: dict) -> dict:
+    """Сигнал из строки news_llm_cache — только то, что нужно news_signal."""
+    return dict(
+        post_id    = str(row["post_id"]),
+        cluster    = (row.get("llm_raw") or {}).get("cluster") or str(row["post_id"]),
+        asset      = row["asset"],
+        sentiment  = row["sentiment"],
+        confidence = row["confidence"],
+        reason     = row["reason"],
+        ts         = row["created_at"].isoformat(),
+    )
+
+
+def notify_signals(rows: list[dict]):
+    """Один SELECT pg_notify(CHANNEL, json) на всю пачку (только Postgres)."""
+    payloads = [json.dumps(signal_payload(r), ensure_ascii=False) for r in rows]
+    return (text("SELECT pg_notify(:ch, p) FROM unnest(CAST(:ps AS text[])) AS p")
+            .bindparams(bindparam("ch", CHANNEL),
+                        bindparam("ps", payloads, type_=ARRAY(Text))))
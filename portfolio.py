@@ -0,0 +1,179 @@
+"""
+Несколько стратегий (кошельков) на одном рыночном снимке за цикл.
+
+Цикл собирает данные один раз (graph.collect: цены, техника, новости) →
+MarketSnapshot — неизменяемый (MappingProxyType / tuple), его читают все
+стратегии одновременно.  Каждая Strategy — свой StrategyConfig, Wallet,
+журнал сделок (main — trades, остальные — trades_<name>), снапшот
+кошелька (wallet_snapshots.name) и кэш решений; equity-кривую по
+строкам стратегий хранит engine_state.  Нагрузка на биржу и БД от числа
+стратегий не зависит; одинаковые промпты к одной модели за цикл — один
+вызов LLM (промпт не содержит состояния кошелька).
+
+Стратегии — JSON-список в STRATEGIES_FILE (нет файла — одна "main"):
+    [{"name": "main"},
+     {"name": "rules", "llm": false, "threshold": 0.5, "risk": {"tp": 0.02}},
+     {"name": "flash", "model": "google/gemini-2.5-flash-preview-05-20", "cash": 5000}]
+"""
+import asyncio, json, logging, os, time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping
+
+from wallet import Wallet, RiskParams, wallet as main_wallet
+from journal import TradeJournal, trade_journal
+from models import trades_table
+from metrics import breakdown, cycle_event, timer
+from snapshot import WalletSnapshotter, restore_wallet
+from decision_agent import W_TECH, W_NEWS, THRESHOLD
+from decision_agent_llm import DecisionCache, MODEL, decide_for, _call_llm, _out
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES_FILE = os.getenv("STRATEGIES_FILE", "strategies.json")
+
+
+def _freeze(d) -> Mapping:
+    return MappingProxyType(dict(d))
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    ts:     float
+    prices: Mapping[str, float]
+    tech:   tuple
+    news:   tuple
+
+    @classmethod
+    def build(cls, state: dict) -> "MarketSnapshot":
+        return cls(time.time(), _freeze(state["prices"]),
+                   tuple(_freeze(t) for t in state["tech"]),
+                   tuple(_freeze(n) for n in state["news"]))
+
+    def state(self) -> dict:
+        """Вход decide_for: те же read-only объекты для всех стратегий."""
+        return {"prices": self.prices, "tech": self.tech, "news": self.news}
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    name:        str = "main"
+    llm:         bool = True            # False — только rule-based fuse_and_trade
+    model:       str = MODEL
+    temperature: float = 0.15
+    w_tech:      float = W_TECH
+    w_news:      float = W_NEWS
+    threshold:   float = THRESHOLD
+    cash:        float = 10_000.0       # стартовый кэш (без снапшота)
+    risk:        RiskParams = field(default_factory=RiskParams)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "StrategyConfig":
+        d = dict(d)
+        risk = RiskParams(**d.pop("risk", {}))
+        return cls(**d, risk=risk)
+
+
+def load_configs(path: str = STRATEGIES_FILE) -> list[StrategyConfig]:
+    if not os.path.exists(path):
+        return [StrategyConfig()]
+    with open(path) as f:
+        cfgs = [StrategyConfig.from_dict(d) for d in json.load(f)]
+    names = [c.name for c in cfgs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate strategy names in {path}: {names}")
+    return cfgs
+
+
+class Strategy:
+    def __init__(self, cfg: StrategyConfig):
+        self.cfg = cfg
+        if cfg.name == "main":                          # граф и дашборд видят тот же wallet
+            self.wallet = main_wallet
+            self.wallet.risk = cfg.risk
+        else:
+            self.wallet = Wallet(cash=cfg.cash, risk=cfg.risk,
+                                 journal=TradeJournal(trades_table(cfg.name)))
+        self.cache  = DecisionCache()
+        self.snap:   WalletSnapshotter | None = None
+        self.last:   dict = {}
+
+    async def step(self, snap: MarketSnapshot, ask) -> dict:
+        st, c = snap.state(), self.cfg
+        with timer("node_seconds", node="decide_llm", strategy=c.name):
+            reasons, tag = await decide_for(st, self.wallet, cache=self.cache, ask=ask,
+                                            use_llm=c.llm, w_tech=c.w_tech, w_news=c.w_news,
+                                            threshold=c.threshold)
+        self.last = _out(st, reasons, tag=tag, w=self.wallet)
+        return self.last
+
+    def row(self, prices) -> dict:
+        w = self.wallet
+        return {"strategy": self.cfg.name, "mode": self.cfg.model if self.cfg.llm else "rules",
+                "equity": round(w.total_equity(prices), 2), "cash": round(w.cash, 2),
+                "realized": round(w.realized, 2), "positions": len(w.positions)}
+
+
+def _shared_ask(memo: dict, cfg: StrategyConfig):
+    """Один вызов LLM на (модель, температура, промпт) за цикл; ретрай — заново."""
+    async def ask(prompt: str) -> str:
+        key = (cfg.model, cfg.temperature, prompt)
+        t = memo.get(key)
+        if t is None or (t.done() and (t.cancelled() or t.exception() is not None)):
+            t = memo[key] = asyncio.ensure_future(_call_llm(prompt, cfg.model, cfg.temperature))
+        return await asyncio.shield(t)
+    return ask
+
+
+class Portfolio:
+    def __init__(self, configs: list[StrategyConfig] | None = None):
+        configs = configs or load_configs()
+        self.strategies = {c.name: Strategy(c) for c in configs}
+        self.main = next(iter(self.strategies.values()))
+        self.stats = {"cycles": 0, "llm_calls": 0, "errors": 0}
+
+    async def restore(self) -> None:
+        """По очереди: _load создаёт wallet_snapshots / trades_<name> (checkfirst)."""
+        for s in self.strategies.values():
+            s.snap = await restore_wallet(s.wallet, name=s.cfg.name)
+
+    async def step(self, snap: MarketSnapshot) -> dict[str, dict]:
+        """Все стратегии на одном снимке, параллельно; упавшая не мешает остальным."""
+        memo: dict = {}
+        ss  = list(self.strategies.values())
+        res = await asyncio.gather(*(s.step(snap, _shared_ask(memo, s.cfg)) for s in ss),
+                                   return_exceptions=True)
+        out = {}
+        for s, r in zip(ss, res):
+            if isinstance(r, Exception):
+                self.stats["errors"] += 1
+                logger.warning("strategy %s failed: %s", s.cfg.name, r)
+            else:
+                out[s.cfg.name] = r
+        self.stats["cycles"] += 1
+        self.stats["llm_calls"] += len(memo)
+        return out
+
+    async def decide(self, state: dict) -> dict:
+        """Для scheduler: результат main-стратегии + сводка по всем + разбивка времени."""
+        snap = MarketSnapshot.build(state)
+        with breakdown() as bd:
+            res = await self.step(snap)
+        main = res.get(self.main.cfg.name) or _out(snap.state(), [], tag="strategy failed",
+                                                   w=self.main.wallet)
+        timings = {**state.get("timings", {}), **bd.timings}
+        return {**main, "strategies": [s.row(snap.prices) for s in self.strategies.values()],
+                "timings": timings, "events": [*main["events"], cycle_event(timings)]}
+
+    async def maybe_save(self) -> None:
+        for s in self.strategies.values():
+            if s.snap is not None:
+                await s.snap.maybe_save()
+
+    async def close(self) -> None:
+        """Снапшоты и журналы стратегий (trade_journal main закрывает app)."""
+        for s in self.strategies.values():
+            if s.snap is not None:
+                await s.snap.flush()
+            if s.wallet.journal is not None and s.wallet.journal is not trade_journal:
+                await s.wallet.journal.close()
@@ -0,0 +1,133 @@
+"""
+Стриминговая таблица последних цен.
+
+Подписка на mini-ticker потоки Binance (<sym>@miniTicker) для текущего
+набора пар из ensure_pairs().  Цены складываются в память вместе с
+временем получения; при обрыве соединения поток переподключается и
+заново подписывается на все пары.  Если по паре давно не было тиков,
+data_feed берёт её цену через REST (fetch_tickers).
+"""
+import asyncio, json, logging, os, time
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+STREAM_ENABLED = os.getenv("PRICE_STREAM", "1") == "1"
+STREAM_URL     = os.getenv("PRICE_STREAM_URL", "wss://stream.binance.com:9443/ws")
+STALE_S        = 15          # тик старше — цена считается устаревшей
+BACKOFF_MAX    = 30          # секунд между попытками переподключения
+HEARTBEAT_S    = 20
+
+
+def _stream_id(pair: str) -> str:
+    """"BTC/USDT" → "BTCUSDT" (поле "s" в сообщениях биржи)."""
+    return pair.replace("/", "").upper()
+
+
+class TickerStream:
+    def __init__(self, url: str = STREAM_URL, stale_s: float = STALE_S):
+        self.url, self.stale_s = url, stale_s
+        self._last:  dict[str, tuple[float, float]] = {}   # base → (price, ts)
+        self._want:  dict[str, str] = {}                   # "BTCUSDT" → "BTC"
+        self._ws:    aiohttp.ClientWebSocketResponse | None = None
+        self._task:  asyncio.Task | None = None
+        self._req_id = 0
+        self._listeners: list = []                         # fn(base, price) на каждый тик
+        self.reconnects = 0
+
+    # ---------- подписки ------------------------------------------------
+    async def ensure(self, pairs: list[str]) -> None:
+        """Запускает поток (если ещё не запущен) и синхронизирует подписки."""
+        want = {_stream_id(p): p.split("/")[0] for p in pairs}
+        added   = [s for s in want if s not in self._want]
+        removed = [s for s in self._want if s not in want]
+        for s in removed:
+            self._last.pop(self._want[s], None)
+        self._want = want
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            return
+        if self._ws is not None and not self._ws.closed:
+            try:
+                if removed: await self._send("UNSUBSCRIBE", removed)
+                if added:   await self._send("SUBSCRIBE", added)
+            except Exception as e:               # _run переподключится сам
+                logger.debug("ticker stream resubscribe err: %s", e)
+
+    async def _send(self, method: str, syms: list[str]) -> None:
+        self._req_id += 1
+        await self._ws.send_str(json.dumps({
+            "method": method,
+            "params": [f"{s.lower()}@miniTicker" for s in syms],
+            "id": self._req_id,
+        }))
+
+    # ---------- чтение --------------------------------------------------
+    def _on_msg(self, msg: dict) -> None:
+        if msg.get("e") != "24hrMiniTicker":
+            return                                      # ответы на SUBSCRIBE и т.п.
+        base = self._want.get(msg.get("s"))
+        if base is not None:
+            px = float(msg["c"])
+            self._last[base] = (px, time.time())
+            for fn in self._listeners:
+                fn(base, px)
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=HEARTBEAT_S) as ws:
+                        self._ws = ws
+                        if self._want:
+                            await self._send("SUBSCRIBE", list(self._want))
+                        logger.info("ticker stream connected (%d pairs)", len(self._want))
+                        backoff = 1.0
+                        async for m in ws:
+                            if m.type == aiohttp.WSMsgType.TEXT:
+                                self._on_msg(json.loads(m.data))
+                            elif m.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("ticker stream err: %s", e)
+                finally:
+                    self._ws = None
+                self.reconnects += 1
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+
+    # ---------- публичный API -------------------------------------------
+    def split(self, pairs: list[str]) -> tuple[dict[str, float], list[str]]:
+        """Свежие цены {base: price} и список пар, по которым тик устарел."""
+        now, fresh, stale = time.time(), {}, []
+        for p in pairs:
+            rec = self._last.get(p.split("/")[0])
+            if rec and now - rec[1] <= self.stale_s:
+                fresh[p.split("/")[0]] = rec[0]
+            else:
+                stale.append(p)
+        return fresh, stale
+
+    def subscribe(self, fn) -> None:
+        """fn(base, price) — синхронно в event-loop на каждый тик."""
+        self._listeners.append(fn)
+
+    def table(self) -> dict[str, tuple[float, float]]:
+        """Копия таблицы {base: (price, ts)}."""
+        return dict(self._last)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task, self._ws = None, None
+
+
+# ───────── singleton ───────────────────────────────────────────────────────
+ticker_stream = TickerStream()
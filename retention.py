@@ -0,0 +1,172 @@
+"""
+Посуточные секции rss_posts / news_llm_cache и их удаление по сроку.
+
+Обе таблицы на Postgres — PARTITION BY RANGE (created_at), секция
+<table>_pYYYYMMDD на сутки UTC.  maintain():
+  * заранее создаёт секции на AHEAD_DAYS вперёд (вставка не должна
+    упереться в отсутствующую секцию);
+  * секции старше RETENTION_DAYS отцепляет (DETACH) и либо удаляет
+    (NEWS_ARCHIVE=drop), либо переносит в схему ARCHIVE_SCHEMA
+    (NEWS_ARCHIVE=detach) — под pg_dump / холодное хранение.  Это
+    операция над каталогом, а не DELETE по миллионам строк;
+  * чистит news_agg старше того же срока (таблица маленькая — DELETE).
+
+install() при старте rss_listener только обслуживает секции; база до
+секционирования (обычные таблицы) остаётся как есть — пока её не
+перевести явно, одной транзакцией:
+
+    python retention.py --migrate     # однократно, с остановленным rss_listener
+    python retention.py               # обслуживание секций (cron)
+
+migrate() ничего не теряет молча: строки за RETENTION_DAYS уходят в
+секции, более старые — в ARCHIVE_SCHEMA (NEWS_ARCHIVE=detach) либо
+удаляются (NEWS_ARCHIVE=drop) — с числом строк в логе.
+"""
+import argparse, logging, os, re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, text
+
+from database import Base
+from models import RssPost, NewsLLMCache, NewsAgg
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = int(os.getenv("NEWS_RETENTION_DAYS", "30"))
+ARCHIVE        = os.getenv("NEWS_ARCHIVE", "drop")          # drop | detach
+ARCHIVE_SCHEMA = "news_archive"
+AHEAD_DAYS     = 3
+MAINTAIN_EVERY = 3600        # сек, из цикла rss_listener
+
+TABLES = {t.name: [c.name for c in t.columns]
+          for t in (RssPost.__table__, NewsLLMCache.__table__)}
+_PART  = re.compile(r"_p(\d{8})$")
+
+
+def _relkind(conn, table: str) -> str | None:
+    """'p' — секционирована, 'r' — обычная, None — нет таблицы."""
+    return conn.execute(text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:t)"),
+                        {"t": table}).scalar()
+
+
+def partitions(conn, table: str) -> dict[date, str]:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t)"), {"t": table}).scalars()
+    return {datetime.strptime(m.group(1), "%Y%m%d").date(): name
+            for name in rows if (m := _PART.search(name))}
+
+
+def ensure_partitions(conn, start: date, end: date) -> int:
+    """Секции на дни [start, end] обеих таблиц; число созданных."""
+    n = 0
+    for table in TABLES:
+        have = partitions(conn, table)
+        d = start
+        while d <= end:
+            if d not in have:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_p{d:%Y%m%d} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{d}') TO ('{d + timedelta(days=1)}')"))
+                n += 1
+            d += timedelta(days=1)
+    return n
+
+
+def expire_partitions(conn, cutoff: date, mode: str | None = None) -> int:
+    """Секции целиком до cutoff: DETACH, затем DROP или перенос в архивную схему."""
+    mode, n = mode or ARCHIVE, 0
+    if mode == "detach":
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    for table in TABLES:
+        for d, name in sorted(partitions(conn, table).items()):
+            if d >= cutoff:
+                break
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if mode == "detach":
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            else:
+                conn.execute(text(f"DROP TABLE {name}"))
+            n += 1
+    return n
+
+
+def _partitioned(conn) -> bool:
+    return all(_relkind(conn, t) == "p" for t in TABLES)
+
+
+def maintain(conn, today: date | None = None) -> dict:
+    """Секции вперёд + срок хранения; sync-соединение внутри транзакции."""
+    if conn.dialect.name != "postgresql" or not _partitioned(conn):
+        return {}
+    today  = today or datetime.utcnow().date()
+    cutoff = today - timedelta(days=RETENTION_DAYS)
+    st = {"created": ensure_partitions(conn, today, today + timedelta(days=AHEAD_DAYS)),
+          "expired": expire_partitions(conn, cutoff),
+          "agg_deleted": conn.execute(delete(NewsAgg.__table__)
+                                      .where(NewsAgg.bucket < datetime(*cutoff.timetuple()[:3])))
+                             .rowcount}
+    if st["created"] or st["expired"]:
+        logger.info("news retention (%s, %d days): %s", ARCHIVE, RETENTION_DAYS, st)
+    return st
+
+
+def migrate(conn, today: date | None = None, mode: str | None = None) -> dict:
+    """
+    Обычные rss_posts / news_llm_cache → секционированные (одна транзакция).
+    Строки за срок хранения переносятся в секции; более старые — в
+    ARCHIVE_SCHEMA.<table>_unpartitioned (detach) или удаляются (drop).
+    """
+    mode   = mode or ARCHIVE
+    today  = today or datetime.utcnow().date()
+    cutoff = today - timedelta(days=RETENTION_DAYS)
+    if mode == "detach":
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    st = {"kept": 0, "archived": 0, "dropped": 0}
+    for table in TABLES:
+        conn.execute(text(f"CREATE TEMP TABLE _keep_{table} ON COMMIT DROP AS "
+                          f"SELECT * FROM {table} WHERE created_at >= :c"), {"c": cutoff})
+        if mode == "detach":
+            st["archived"] += conn.execute(text(
+                f"CREATE TABLE {ARCHIVE_SCHEMA}.{table}_unpartitioned AS "
+                f"SELECT * FROM {table} WHERE created_at < :c"), {"c": cutoff}).rowcount
+        else:
+            st["dropped"] += conn.execute(text(
+                f"SELECT count(*) FROM {table} WHERE created_at < :c"), {"c": cutoff}).scalar()
+    conn.execute(text(f"DROP TABLE {', '.join(TABLES)} CASCADE"))
+    Base.metadata.create_all(conn, tables=[RssPost.__table__, NewsLLMCache.__table__])
+    ensure_partitions(conn, cutoff, today + timedelta(days=AHEAD_DAYS))
+    for table, cols in TABLES.items():
+        cols = ", ".join(cols)
+        st["kept"] += conn.execute(text(f"INSERT INTO {table} ({cols}) "
+                                        f"SELECT {cols} FROM _keep_{table}")).rowcount
+    logger.warning("news tables migrated to daily partitions (%s, cutoff %s): %s",
+                   mode, cutoff, st)
+    return st
+
+
+def install(conn) -> dict:
+    """После create_all: обслуживание секций; старую схему не трогает (см. --migrate)."""
+    if conn.dialect.name != "postgresql":
+        return {}
+    if not _partitioned(conn):
+        logger.warning("news tables are not partitioned — retention is off until "
+                       "`python retention.py --migrate` (NEWS_ARCHIVE=%s)", ARCHIVE)
+        return {}
+    return maintain(conn)
+
+
+if __name__ == "__main__":
+    from database import sync_engine
+    from news_agg import install as install_agg
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--migrate", action="store_true",
+                    help="перевести обычные таблицы в секционированные (однократно)")
+    a = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    with sync_engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        if a.migrate and sync_engine.dialect.name == "postgresql" and not _partitioned(conn):
+            print(migrate(conn))
+        print(install(conn))
+        install_agg(conn)
@@ -0,0 +1,141 @@
+"""
+Кольцевые буферы фиксированной ёмкости на numpy.
+
+Память выделяется один раз; append/replace_last — O(1), view() отдаёт
+строки в хронологическом порядке (копия длины len()).
+
+RingBuffer  — строки фиксированной ширины (свечи, точки equity);
+LogBuffer   — (ts, текст) для лога кошелька, срезы как у списка;
+TieredSeries — ряд (ts, value) в нескольких разрешениях: сырые точки,
+               затем последняя точка минуты, затем часа.  Каждый уровень
+               — свой RingBuffer, поэтому память постоянна при любом
+               аптайме, а view() — не длиннее суммы ёмкостей;
+lttb()      — прореживание ряда до n точек с сохранением формы
+               (Largest-Triangle-Three-Buckets) для графиков.
+"""
+import numpy as np
+
+# (шаг, сек — 0 значит сырые точки; ёмкость): ~1 сут циклов по 45 с, 7 сут минут, год часов
+TIERS = ((0, 2_000), (60, 10_080), (3600, 8_760))
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, width: int, dtype=np.float64):
+        self.capacity = capacity
+        self._buf  = np.zeros((capacity, width), dtype=dtype)
+        self._head = 0          # индекс следующей записи
+        self._n    = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, row) -> None:
+        self._buf[self._head] = row
+        self._head = (self._head + 1) % self.capacity
+        self._n = min(self._n + 1, self.capacity)
+
+    def extend(self, rows) -> None:
+        for r in rows:
+            self.append(r)
+
+    def replace_last(self, row) -> None:
+        self._buf[(self._head - 1) % self.capacity] = row
+
+    def last(self) -> np.ndarray:
+        return self._buf[(self._head - 1) % self.capacity]
+
+    def clear(self) -> None:
+        self._head = self._n = 0
+
+    def view(self) -> np.ndarray:
+        if self._n < self.capacity:
+            return self._buf[:self._n].copy()
+        return np.roll(self._buf, -self._head, axis=0)
+
+
+class LogBuffer:
+    """Последние capacity записей (ts, msg): ts — в numpy, текст — в списке-кольце."""
+    def __init__(self, capacity: int, rows=()):
+        self.capacity = capacity
+        self._ts   = np.zeros(capacity, dtype=np.float64)
+        self._msg: list[str | None] = [None] * capacity
+        self._head = 0
+        self._n    = 0
+        for r in rows:
+            self.append(r)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, row) -> None:
+        self._ts[self._head], self._msg[self._head] = row
+        self._head = (self._head + 1) % self.capacity
+        self._n = min(self._n + 1, self.capacity)
+
+    def _at(self, i: int) -> tuple[float, str]:
+        j = (self._head - self._n + i) % self.capacity
+        return float(self._ts[j]), self._msg[j]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._at(i) for i in range(self._n)[key]]
+        return self._at(range(self._n)[key])
+
+    def __iter__(self):
+        return (self._at(i) for i in range(self._n))
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+
+class TieredSeries:
+    def __init__(self, tiers=TIERS):
+        self.tiers = [(step, RingBuffer(cap, 2)) for step, cap in tiers]
+
+    def __len__(self) -> int:
+        return len(self.tiers[0][1])
+
+    def append(self, ts: float, value: float) -> None:
+        for step, buf in self.tiers:
+            if not step:
+                buf.append((ts, value))
+                continue
+            b = ts - ts % step                      # начало интервала; значение — последнее
+            if len(buf) and buf.last()[0] == b:
+                buf.replace_last((b, value))
+            elif not len(buf) or b > buf.last()[0]:
+                buf.append((b, value))
+
+    def last(self) -> tuple[float, float] | None:
+        buf = self.tiers[0][1]
+        return tuple(buf.last()) if len(buf) else None
+
+    def view(self) -> np.ndarray:
+        """Грубые уровни — только раньше начала более подробного; (n, 2) по возрастанию ts."""
+        parts, cut = [], np.inf
+        for _, buf in self.tiers:                   # от подробного к грубому
+            v = buf.view()
+            v = v[v[:, 0] < cut]
+            if len(v):
+                parts.append(v)
+                cut = v[0, 0]
+        return np.concatenate(parts[::-1]) if parts else np.zeros((0, 2))
+
+
+def lttb(data: np.ndarray, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: n точек из (m, 2), первая и последняя сохраняются."""
+    m = len(data)
+    if n >= m or n < 3:
+        return data
+    out = np.empty((n, 2))
+    out[0], out[-1] = data[0], data[-1]
+    edges = np.linspace(1, m - 1, n - 1).astype(int)    # n-2 корзины внутри ряда
+    a = data[0]
+    for i in range(n - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nxt = data[hi:edges[i + 2]] if i + 2 < n - 1 else data[-1:]
+        c = nxt.mean(axis=0) if len(nxt) else data[-1]
+        b = data[lo:hi]
+        area = np.abs((a[0] - c[0]) * (b[:, 1] - a[1]) - (a[0] - b[:, 0]) * (c[1] - a[1]))
+        a = out[i + 1] = b[area.argmax()]
+    return out
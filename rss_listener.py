@@ -1,17 +1,24 @@
 # rss_listener.py
 # ──────────────────────────────────────────────────────────────────────────
 # Служба-слушатель: 1) читает RSS-ленты, 2) сохраняет статьи в Postgres,
-# 3) вызывает LLM ровно ОДИН раз на каждую новую статью и кладёт результат
-#    (asset/sentiment/confidence) в news_llm_cache.
+# 3) классифицирует каждую новую статью ровно ОДИН раз (LLM, пачками
+#    по нескольку статей) и кладёт результат (asset/sentiment/confidence)
+#    в news_llm_cache; перепечатка уже известной истории (near_dup)
+#    получает классификацию своего кластера без вызова LLM.
 #
-import asyncio, uuid, json, re, logging, time, random, feedparser, requests, os
-from datetime import datetime
-from bs4 import BeautifulSoup
-from readability import Document
+import asyncio, logging, time
+from datetime import datetime, timedelta
 from sqlalchemy import select
-from database import AsyncSession, engine, Base
-from models    import RssPost, NewsLLMCache
+from database import engine, Base
+from models   import RssPost, NewsLLMCache
 from utils.text import squeeze_text
+from feed_poller import FeedPoller
+from article_pipeline import Article, Pipeline
+from news_classifier import BatchClassifier, MAX_ITEMS
+from news_store import (post_uid, post_row, cache_row, select_known, lock_posts,
+                        insert_posts, insert_cache, notify_signals)
+from near_dup import index as dup_index, WINDOW_HOURS as DUP_WINDOW_HOURS
+import news_agg, retention
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,57 +26,6 @@ logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
-# ─────────────────────── LLM ВЫЗОВ ──────────────────────────────
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-MODEL   = "google/gemini-2.5-flash-preview-05-20"
-BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
-
-def _call_llm(text: str, retries: int = 5) -> str:
-    SYSTEM = (
-        "Ты крипто-аналитик. На вход тебе даётся новость. "
-        "Верни JSON-массив вида "
-        "[{"
-        '"asset":"BTC|ETH|SOL|DOGE|...|general",'
-        '"sentiment":"bullish|bearish|neutral",'
-        '"confidence":0.0-1.0,'
-        '"reason":"краткое пояснение"'
-        "}, …]. "
-        "Если новость никак не влияет, верни пустой массив."
-    )
-
-    payload = {
-        "model": MODEL,
-        "temperature": 0.2,
-        "messages": [
-            {"role": "system", "content": SYSTEM},
-            {"role": "user",   "content": text},
-        ],
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost",
-        "X-Title": "crypto-multi-agent-mvp",
-    }
-    logging.debug("LLM REQUEST PAYLOAD: %s",
-                  json.dumps(payload, ensure_ascii=False))
-
-    delay = 2.0
-    for _ in range(retries):
-        try:
-            r = requests.post(BASE_URL, headers=headers,
-                              json=payload, timeout=30)
-            if r.status_code == 429:
-                raise requests.HTTPError("429", response=r)
-            r.raise_for_status()
-            return r.json()["choices"][0]["message"]["content"]
-        except requests.HTTPError as exc:
-            if not (exc.response and exc.response.status_code == 429):
-                raise
-            time.sleep(delay * random.uniform(0.8, 1.2))
-            delay *= 2
-    return '[{"asset":"general","sentiment":"neutral","confidence":0.0,"reason":"rate_limited"}]'
-
 # ─────────────────────── ПАРАМЕТРЫ СЛУШАТЕЛЯ ──────────────────────────────
 RSS_URLS        = [
     "https://decrypt.co/feed",
@@ -78,110 +34,175 @@ RSS_URLS        = [
     "https://bitcoinmagazine.com/.rss/full",
 ]
 MAX_FEED_ITEMS  = 20          # статей из каждой ленты за проход
-FETCH_INTERVAL  = 300         # секунд между проходами (5 мин)
+FETCH_INTERVAL  = 300         # стартовый интервал опроса ленты (дальше — адаптивный)
 MAX_TOKENS_LLM  = 800         # squeeze_text режет до этого предела
 
 
 # ─────────────────────── ФУНКЦИИ РАБОТЫ С БД ──────────────────────────────
 async def init_db() -> None:
-    """Создаём таблицы, если их ещё нет (один раз при старте)."""
+    """
+    Создаём таблицы, если их ещё нет (один раз при старте); на Postgres —
+    обслуживание посуточных секций (перевод старой схемы — только
+    явно, python retention.py --migrate), триггер news_agg.
+    """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(retention.install)
+        await conn.run_sync(news_agg.install)
+
+async def maintain_db() -> None:
+    """Секции вперёд и удаление старых (retention.MAINTAIN_EVERY)."""
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(retention.maintain)
+    except Exception as ex:                           # не роняем слушатель
+        logger.warning("retention failed: %s", ex)
 
 # ─────────────────────── ГЛАВНЫЙ ЦИКЛ СЛУШАТЕЛЯ ───────────────────────────
 async def listener_loop() -> None:
     await init_db()
-    while True:
-        await fetch_all_feeds()
-        await asyncio.sleep(FETCH_INTERVAL)
-
-async def fetch_all_feeds():
-    tasks = [process_feed(url) for url in RSS_URLS]
-    await asyncio.gather(*tasks)
-
-async def process_feed(feed_url: str):
-    async with AsyncSession() as session:
-        parsed = feedparser.parse(feed_url)
-
-        for entry in parsed.entries[:MAX_FEED_ITEMS]:
-            uid = uuid.uuid5(uuid.NAMESPACE_URL, entry.link)
-
-            async with session.begin():                 # одна транзакция / статья
-                if await session.get(RssPost, uid):
-                    continue
-
-                post = await save_post(uid, feed_url, entry, session)
-                await classify_and_cache(post, session)
+    await rebuild_dup_index()
+    poller   = FeedPoller(RSS_URLS, base=FETCH_INTERVAL)
+    pipeline = Pipeline(store_article, sink_concurrency=MAX_ITEMS * 2)   # хватит на полную пачку
+    maintained = time.monotonic()
+    try:
+        while True:
+            await fetch_all_feeds(poller, pipeline)
+            if time.monotonic() - maintained > retention.MAINTAIN_EVERY:
+                await maintain_db(); maintained = time.monotonic()
+            await asyncio.sleep(max(1.0, poller.sleep_for()))
+    finally:
+        await poller.close()
+        await pipeline.close()
+
+async def fetch_all_feeds(poller: FeedPoller, pipeline: Pipeline):
+    """Только ленты, у которых подошёл срок и которые изменились (не 304)."""
+    changed = await poller.poll_due()
+    items = await new_entries(changed)
+    dup_index.expire()
+    if items:
+        await pipeline.run(items)
+        logger.info("Articles pipeline (%d new, LLM %s, near-dup %s):\n%s",
+                    len(items), classifier.stats, dup_index.stats, pipeline.report())
+
+async def new_entries(changed: dict[str, list]) -> list[tuple[str, object]]:
+    """Записи всех лент прохода, которых ещё нет в rss_posts, — одним SELECT."""
+    by_uid = {}
+    for feed_url, entries in changed.items():
+        for e in entries[:MAX_FEED_ITEMS]:
+            by_uid.setdefault(post_uid(e.link), (feed_url, e))
+    if not by_uid:
+        return []
+    async with engine.connect() as conn:
+        known = set((await conn.execute(
+            select_known(list(by_uid), engine.dialect.name))).scalars())
+    return [item for uid, item in by_uid.items() if uid not in known]
 
 # ─────────────────────── СОХРАНЯЕМ СТАТЬЮ В РSS_POSTS ─────────────────────
-async def save_post(uid, feed_url, entry, session) -> RssPost:
-
-    title = entry.title
-    raw_summary = entry.get("summary", "")
-    clean_summary = BeautifulSoup(raw_summary, "html.parser").get_text(strip=True)
-
-    # Пытаемся достать полный текст статьи
-    full_text = clean_summary
+async def store_article(a: Article) -> None:
+    """
+    sink конвейера.  Перепечатка известной истории берёт классификацию
+    кластера (дожидаясь её, если LLM ещё считает); новая история уходит
+    в пачку классификатора (LLM вне транзакций).
+    """
+    post      = post_row(a.feed_url, a.entry, a.text)
+    user_text = f"{post['title']}\n\n" + squeeze_text(post["content"], MAX_TOKENS_LLM)
+    cluster, dup = dup_index.add(str(post["post_id"]), f"{post['title']} {post['content']}")
+
+    known = dup_index.results.get(cluster) if dup else None
+    if isinstance(known, asyncio.Future):
+        await asyncio.wait([known])
+        known = None if known.cancelled() else known.result()
+    if known is not None:
+        await write_batch([((post, user_text, cluster), [dict(known)])])
+        return
+
+    fut = None
+    if cluster not in dup_index.results:
+        fut = dup_index.results[cluster] = asyncio.get_running_loop().create_future()
     try:
-        resp = requests.get(entry.link, headers={"User-Agent": "Mozilla/5.0"},
-                            timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(Document(resp.text).summary(), "html.parser")
-        paras = [p.get_text(strip=True) for p in soup.find_all("p")
-                 if len(p.get_text(strip=True)) > 50]
-        if paras:
-            full_text = "\n".join(paras)
-    except Exception as ex:
-        logger.debug("Fetch article failed %s: %s", entry.link, ex)
-
-    post = RssPost(
-        post_id   = uid,
-        feed_url  = feed_url,
-        title     = title,
-        link      = entry.link,
-        content   = full_text,
-        published = datetime(*entry.published_parsed[:6])
-                   if entry.get("published_parsed") else datetime.utcnow()
-    )
-    session.add(post)
-    await session.flush()
-    return post
+        items = await classifier.submit(user_text, (post, user_text, cluster))
+    except BaseException:
+        if fut is not None:
+            fut.cancel(); dup_index.results.pop(cluster, None)
+        raise
+    if fut is not None:
+        fut.set_result(_best(items))
+        dup_index.results[cluster] = fut.result()
 
 
 # ─────────────────────── КЛАССИФИКАЦИЯ LLM + КЭШ ──────────────────────────
-async def classify_and_cache(post: RssPost, session) -> None:
-    user_text = f"{post.title}\n\n" + squeeze_text(post.content, MAX_TOKENS_LLM)
-    raw = _call_llm(user_text)
-
-    try:
-        parsed = json.loads(re.search(r"\[.*\]", raw, re.S).group(0))
-    except Exception:
-        parsed = [{"asset": "general", "sentiment": "neutral",
-                   "confidence": 0.0, "reason": "parse_error"}]
-    
-    for item in parsed:
+def _best(items: list[dict]) -> dict:
+    for item in items:
         s = item.get("sentiment", "").lower()
         if s == "positive":
             item["sentiment"] = "bullish"
         elif s == "negative":
             item["sentiment"] = "bearish"
+    if not items:                                   # новость ни на что не влияет
+        return {"asset": "general", "sentiment": "neutral",
+                "confidence": 0.0, "reason": "no_impact"}
+    return max(items, key=lambda x: x.get("confidence", 0.5))
+
+def _cluster_raw(best: dict, post: dict, cluster: str) -> dict:
+    """llm_raw несёт кластер истории (и оригинал для перепечатки)."""
+    raw = {k: v for k, v in best.items() if k not in ("cluster", "dup_of")}
+    raw["cluster"] = cluster
+    if cluster != str(post["post_id"]):
+        raw["dup_of"] = cluster
+    return raw
+
+async def write_batch(results: list[tuple[tuple[dict, str, str], list[dict]]]) -> None:
+    """
+    Пачка статей одной транзакцией: локи на post_id и повторная проверка
+    (rss_posts не держит уникальность post_id), multi-row INSERT в
+    rss_posts, затем news_llm_cache только для реально новых и (Postgres)
+    NOTIFY о них для news_signal — уйдёт вместе с COMMIT.
+    """
+    posts = {post["post_id"]: post for (post, _, _), _ in results}
+    cache = {post["post_id"]: cache_row(post, text, _cluster_raw(_best(items), post, cluster))
+             for (post, text, cluster), items in results}
+    d, rows = engine.dialect.name, []
+    async with engine.begin() as conn:
+        if d == "postgresql":
+            await conn.execute(lock_posts(list(posts)))
+        known = set((await conn.execute(select_known(list(posts), d))).scalars())
+        fresh = [p for pid, p in posts.items() if pid not in known]
+        if not fresh:
+            return
+        new = set((await conn.execute(insert_posts(d), fresh)).scalars())
+        rows = [r for pid, r in cache.items() if pid in new]
+        if rows:
+            await conn.execute(insert_cache(d), rows)
+            if d == "postgresql":
+                await conn.execute(notify_signals(rows))
+    for r in rows:
+        logger.info("LLM cached: %s → %s %.2f", r["asset"], r["sentiment"], r["confidence"])
+
+classifier = BatchClassifier(write_batch)
+
+
+# ─────────────────────── ИНДЕКС ПОЧТИ-ДУБЛИКАТОВ ─────────────────────────
+async def rebuild_dup_index() -> None:
+    """Старт: статьи за окно near_dup из rss_posts + их кластеры/классификации."""
+    since = datetime.utcnow() - timedelta(hours=DUP_WINDOW_HOURS)
+    q = (select(RssPost.post_id, RssPost.title, RssPost.content, RssPost.created_at,
+                NewsLLMCache.llm_raw)
+         .outerjoin(NewsLLMCache, NewsLLMCache.post_id == RssPost.post_id)
+         .where(RssPost.created_at >= since).order_by(RssPost.created_at))
+    t0 = time.perf_counter()
+    async with engine.connect() as conn:
+        rows = (await conn.execute(q)).all()
+    for pid, title, content, created, raw in rows:
+        pid, raw = str(pid), raw or {}
+        ts = (created - datetime(1970, 1, 1)).total_seconds()
+        cluster, _ = dup_index.add(pid, f"{title} {content}", ts, cluster=raw.get("cluster") or pid)
+        if cluster == pid and raw:
+            dup_index.results[cluster] = {k: v for k, v in raw.items()
+                                          if k not in ("cluster", "dup_of")}
+    logger.info("Near-dup index: %d posts, %d clusters in %.2fs",
+                len(dup_index), len(dup_index.clusters()), time.perf_counter() - t0)
 
-    best = max(parsed, key=lambda x: x.get("confidence", 0.5))
-
-    cache_row = NewsLLMCache(
-        post_id    = post.post_id,
-        asset      = best.get("asset", "general"),
-        sentiment  = best.get("sentiment", "neutral"),
-        confidence = float(best.get("confidence", 0.5)),
-        reason     = best.get("reason", "")[:300],
-        summary_md = user_text,
-        llm_raw    = best,
-    )
-
-    session.add(cache_row)
-    await session.flush()      
-    logger.info("LLM cached: %s → %s %.2f",
-                cache_row.asset, cache_row.sentiment, cache_row.confidence)
 # ─────────────────────── ТОЧКА ВХОДА ───────────────────────────────────────
 if __name__ == "__main__":
     asyncio.run(listener_loop())
@@ -0,0 +1,182 @@
+"""
+Событийный планировщик торговых циклов (вместо «цикл + sleep 45 с»).
+
+Цикл запускают события:
+    candle      — закрылась 5-минутная свеча (граница TF + CANDLE_GRACE);
+    move:<BASE> — цена из ticker_stream ушла от цены прошлого цикла ≥ MOVE_PCT;
+    news:<BASE> — новый сигнал в news_signal (LISTEN/NOTIFY);
+    timer       — MAX_INTERVAL без циклов.
+
+Цикл = collect (цены, техника, новости) → decide (decide_llm, кошелёк).
+Пока идёт decide, пришедшее событие сразу запускает collect следующего
+цикла — данные готовы к моменту, когда освободится кошелёк; decide
+строго последователен.  События, пришедшие во время цикла, сливаются в
+один следующий цикл; событие новее начала collect в текущий цикл не
+засчитывается и остаётся в очереди.
+
+lag — от самого раннего события цикла до старта decide; stats() — p50/p95.
+"""
+import asyncio, logging, time
+from collections import deque
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+CANDLE_S      = 300          # 5m, как tech_agent.TF
+CANDLE_GRACE  = 2.0          # сек после границы: биржа успевает закрыть свечу
+MOVE_PCT      = 0.004        # движение цены от прошлого цикла
+MAX_INTERVAL  = 45           # сек без событий → цикл по таймеру
+MIN_GAP       = 3.0          # сек между стартами decide
+REFRESH_AFTER = 5.0          # сек: снимок старше — цены перечитываем перед decide
+METRICS_KEEP  = 500
+
+
+def _pct(xs, q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * q))] if xs else 0.0
+
+
+class CycleScheduler:
+    def __init__(self, collect: Callable[[], Awaitable[dict]],
+                 decide: Callable[[dict], Awaitable[dict]],
+                 on_cycle: Callable[[dict, dict], Awaitable[None]], *,
+                 refresh: Callable[[], Awaitable[dict]] | None = None,
+                 candle: float = CANDLE_S, move_pct: float = MOVE_PCT,
+                 max_interval: float = MAX_INTERVAL, min_gap: float = MIN_GAP):
+        self.collect, self.decide, self.on_cycle, self.refresh = collect, decide, on_cycle, refresh
+        self.candle, self.move_pct = candle, move_pct
+        self.max_interval, self.min_gap = max_interval, min_gap
+        self._pending: dict[str, list[float]] = {}    # событие → [первый, последний приход]
+        self._wake   = asyncio.Event()
+        self._ref:   dict[str, float] = {}            # цены прошлого цикла
+        self._tasks: list[asyncio.Task] = []
+        self.lags:   deque = deque(maxlen=METRICS_KEEP)
+        self.cycles: deque = deque(maxlen=METRICS_KEEP)
+        self.counts = {"cycles": 0, "triggers": 0, "coalesced": 0, "prefetched": 0, "errors": 0}
+        self.last: dict = {}
+
+    # ---------- события ---------------------------------------------------
+    def trigger(self, reason: str) -> None:
+        self.counts["triggers"] += 1
+        now = time.monotonic()
+        self._pending.setdefault(reason, [now, now])[1] = now
+        self._wake.set()
+
+    def on_tick(self, base: str, price: float) -> None:
+        """Колбэк ticker_stream: резкое движение от цены прошлого цикла."""
+        ref = self._ref.get(base)
+        if ref and abs(price / ref - 1) >= self.move_pct:
+            self._ref[base] = price                   # не дёргаем на каждом тике
+            self.trigger(f"move:{base}")
+
+    def on_news(self, signal) -> None:
+        """Колбэк news_signal: новый сигнал по активу."""
+        self.trigger(f"news:{signal.asset}")
+
+    async def _candles(self) -> None:
+        while True:
+            now = time.time()
+            await asyncio.sleep(self.candle - now % self.candle + CANDLE_GRACE)
+            self.trigger("candle")
+
+    def _take(self, since: float) -> tuple[list[str], float | None]:
+        """
+        События до начала collect: причины цикла и время самого раннего.
+        Повтор того же события после начала collect остаётся в очереди.
+        """
+        taken = {r: first for r, (first, _) in self._pending.items() if first <= since}
+        for r in taken:
+            last = self._pending[r][1]
+            if last > since:
+                self._pending[r] = [last, last]
+            else:
+                del self._pending[r]
+        if not self._pending:
+            self._wake.clear()
+        return sorted(taken), min(taken.values(), default=None)
+
+    # ---------- цикл ------------------------------------------------------
+    async def _wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), max(0.0, timeout))
+        except asyncio.TimeoutError:
+            self.trigger("timer")
+
+    async def _collect(self) -> tuple[float, dict]:
+        t0 = time.monotonic()
+        return t0, await self.collect()
+
+    async def run(self) -> None:
+        self._tasks.append(asyncio.create_task(self._candles()))
+        prefetch: asyncio.Task | None = None
+        decide:   asyncio.Task | None = None
+        wake:     asyncio.Task | None = None
+        last_end = last_decide = -1e9
+        self.trigger("start")
+        try:
+            while True:
+                if prefetch is None:
+                    await self._wait(self.max_interval - (time.monotonic() - last_end))
+                    prefetch = asyncio.create_task(self._collect())
+                else:
+                    self.counts["prefetched"] += 1
+                try:
+                    started, state = await prefetch
+                except Exception as ex:               # события остаются в очереди
+                    logger.warning("cycle collect failed: %s", ex)
+                    self.counts["errors"] += 1
+                    prefetch = None
+                    await asyncio.sleep(self.min_gap)
+                    continue
+                prefetch = None
+                reasons, first = self._take(started)
+                if not reasons:                       # всё пришло после collect — заново
+                    continue
+                if self.refresh and time.monotonic() - started > REFRESH_AFTER:
+                    state["prices"] = await self.refresh()
+                await asyncio.sleep(max(0.0, last_decide + self.min_gap - time.monotonic()))
+
+                t_dec = last_decide = time.monotonic()
+                lag = t_dec - first
+                self.lags.append(lag)
+                self.counts["cycles"] += 1
+                self.counts["coalesced"] += len(reasons) - 1
+                decide = asyncio.create_task(self.decide(state))
+                # пока решает LLM — событие сразу запускает collect следующего цикла;
+                # _wake остаётся поднятым до _take(), поэтому ждём его только сброшенным
+                while not decide.done():
+                    if prefetch is not None:
+                        await asyncio.wait({decide})
+                        break
+                    if self._wake.is_set():
+                        prefetch = asyncio.create_task(self._collect())
+                        continue
+                    wake = asyncio.create_task(self._wake.wait())
+                    await asyncio.wait({decide, wake}, return_when=asyncio.FIRST_COMPLETED)
+                    wake.cancel()
+                last_end = time.monotonic()
+                if decide.exception() is not None:
+                    logger.warning("cycle decide failed: %s", decide.exception())
+                    self.counts["errors"] += 1
+                    continue
+                result = {**state, **decide.result()}
+                self.cycles.append(last_end - t_dec)
+                self._ref = dict(result.get("prices") or {})
+                self.last = {"reasons": reasons, "lag": lag, "decide": last_end - t_dec,
+                             "age": t_dec - started}          # возраст данных к decide
+                await self.on_cycle(result, self.last)
+        finally:
+            # decide тоже снимаем и дожидаемся: после run() (SIGTERM → engine
+            # закрывает журнал, биржу, LLM) сделок из этого цикла быть не должно
+            live = [t for t in [*self._tasks, prefetch, decide, wake] if t is not None]
+            for t in live:
+                t.cancel()
+            await asyncio.gather(*live, return_exceptions=True)
+            self._tasks.clear()
+
+    def stats(self) -> dict:
+        return {**self.counts,
+                "lag_p50": round(_pct(self.lags, 0.5), 3),
+                "lag_p95": round(_pct(self.lags, 0.95), 3),
+                "cycle_p50": round(_pct(self.cycles, 0.5), 3),
+                "cycle_p95": round(_pct(self.cycles, 0.95), 3)}
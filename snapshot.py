@@ -0,0 +1,116 @@
+"""
+Снапшоты состояния Wallet и быстрый рестарт.
+
+save()  — одна строка wallet_snapshots на кошелёк (delete+insert в одной
+          транзакции): кэш, позиции, P&L, cooldown'ы, хвост лога и
+          watermark — ts последней учтённой сделки.
+restore_wallet() — читает снапшот и доигрывает только сделки из trades
+          с ts > watermark (индекс по trades.ts), поэтому время старта не
+          зависит от длины истории.  Без снапшота — однократный полный
+          replay, после которого снапшот сразу записывается.
+
+Снапшот может опережать trades (журнал пишет с задержкой) — это не
+страшно: сделки до watermark берутся из снапшота, а не из таблицы.
+"""
+import asyncio, logging, time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+
+from database import sync_engine
+from models   import Trade, WalletSnapshot
+from wallet   import Wallet
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EVERY = 60          # сек между снапшотами; без новых сделок не пишем
+HISTORY_KEEP   = 200         # строк лога в снапшоте
+
+
+# ---------- sync-часть (выполняется в executor) ---------------------------
+def _watermark(w: Wallet):
+    return datetime.utcfromtimestamp(w.last_trade_ts) if w.last_trade_ts else None
+
+def _save(name: str, state: dict, watermark, engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(WalletSnapshot.__table__).where(WalletSnapshot.name == name))
+        conn.execute(insert(WalletSnapshot.__table__),
+                     {"name": name, "ts": datetime.utcnow(),
+                      "watermark": watermark, "state": state})
+
+def _load(name: str, engine, table=Trade.__table__) -> tuple[dict | None, list[dict]]:
+    WalletSnapshot.__table__.create(engine, checkfirst=True)
+    table.create(engine, checkfirst=True)
+    t = table.c
+    with engine.connect() as conn:
+        snap = conn.execute(select(WalletSnapshot.state, WalletSnapshot.watermark)
+                            .where(WalletSnapshot.name == name)).first()
+        q = select(t.ts, t.symbol, t.side, t.qty, t.price, t.fee, t.realized_pnl).order_by(t.ts)
+        if snap and snap.watermark is not None:
+            q = q.where(t.ts > snap.watermark)
+        rows = [dict(r._mapping) for r in conn.execute(q)]
+    return (snap.state if snap else None), rows
+
+
+# ---------- async API ----------------------------------------------------
+class WalletSnapshotter:
+    def __init__(self, wallet: Wallet, name: str = "main", engine=sync_engine,
+                 every: float = SNAPSHOT_EVERY, table=None):
+        self.wallet, self.name, self.engine, self.every = wallet, name, engine, every
+        self.table = table if table is not None else (
+            wallet.journal.table if wallet.journal is not None else Trade.__table__)
+        self._saved_wm: float | None = None
+        self._saved_at = 0.0
+
+    async def save(self) -> None:
+        w = self.wallet
+        state, wm = w.state(HISTORY_KEEP), w.last_trade_ts   # копия на момент вызова
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _save, self.name, state, _watermark(w), self.engine)
+        self._saved_wm, self._saved_at = wm, time.monotonic()
+
+    async def maybe_save(self) -> bool:
+        """Пишет снапшот, если были сделки и прошло ≥ every секунд."""
+        if self.wallet.last_trade_ts == self._saved_wm:
+            return False
+        if time.monotonic() - self._saved_at < self.every:
+            return False
+        try:
+            await self.save()
+        except Exception as ex:
+            logger.warning("wallet snapshot failed: %s", str(ex).splitlines()[0])
+            return False
+        return True
+
+    async def flush(self) -> None:
+        """Shutdown: финальный снапшот, если есть несохранённые сделки."""
+        if self.wallet.last_trade_ts != self._saved_wm:
+            await self.save()
+
+    async def restore(self) -> int:
+        """Снапшот + доигрывание сделок после watermark; возвращает их число."""
+        t0 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        state, rows = await loop.run_in_executor(None, _load, self.name, self.engine, self.table)
+        w = self.wallet
+        if state:
+            w.load_state(state)
+        skipped = sum(not w.apply_trade(r) for r in rows)
+        if skipped:
+            logger.warning("wallet replay: %d SELL without open position skipped", skipped)
+        self._saved_wm = w.last_trade_ts if state and not rows else None
+        if self._saved_wm is None:
+            await self.save()
+        logger.info("wallet restored (%s snapshot, %d trades replayed) in %.3fs",
+                    "from" if state else "no", len(rows), time.perf_counter() - t0)
+        return len(rows)
+
+
+async def restore_wallet(wallet: Wallet, **kw) -> WalletSnapshotter:
+    """Старт движка: восстанавливает wallet; ошибки БД не блокируют запуск."""
+    snap = WalletSnapshotter(wallet, **kw)
+    try:
+        await snap.restore()
+    except Exception as ex:
+        logger.warning("Could not restore wallet from DB: %s", str(ex).splitlines()[0])
+    return snap
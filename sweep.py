@@ -0,0 +1,235 @@
+"""
+Перебор параметров стратегии поверх backtest.run.
+
+Спека (JSON):
+    {"mode": "grid" | "random" | "lhs", "n": 200, "seed": 1,
+     "params": {"threshold":   [0.45, 0.55, 0.65],        # grid — список
+                "w_tech":      {"low": 0.4, "high": 0.8},  # random/lhs — диапазон
+                "weights.rsi": {"low": 0.0, "high": 0.3},
+                "risk.tp":     {"low": 0.008, "high": 0.03}}}
+Ключи — поля BacktestConfig, "weights.<sma|ema|mac|rsi|bb>" или
+"risk.<поле RiskParams>".
+
+Рыночные матрицы (close, индикаторы, новости) один раз кладутся в
+shared memory; воркеры ProcessPoolExecutor подключаются к ним без
+копирования.  Каждый завершённый прогон сразу дописывается строкой в
+JSONL; повторный запуск с тем же файлом пропускает уже посчитанные id.
+
+rank — многокритериальный: сначала Парето-фронт по (доходность,
+просадка), внутри фронта — доходность на единицу просадки, затем
+меньше сделок.
+
+    python sweep.py run  --data data/market_5m.npz --spec spec.json --out sweep.jsonl
+    python sweep.py rank --out sweep.jsonl --top 20
+"""
+from __future__ import annotations
+
+import argparse, bisect, hashlib, itertools, json, logging, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+import backtest as bt
+
+logger = logging.getLogger(__name__)
+
+DD_FLOOR = 1e-3          # просадка для score: прогон без просадки не уходит в бесконечность
+
+# ───────────────────────── спека → конфиги ────────────────────────────────
+def _grid(params: dict) -> list[dict]:
+    keys = list(params)
+    return [dict(zip(keys, vals)) for vals in itertools.product(*params.values())]
+
+def _random(params: dict, n: int, rng) -> list[dict]:
+    return [{k: float(rng.uniform(v["low"], v["high"])) for k, v in params.items()}
+            for _ in range(n)]
+
+def _lhs(params: dict, n: int, rng) -> list[dict]:
+    """Latin hypercube: в каждой размерности ровно одна точка на страту."""
+    cols = {}
+    for k, v in params.items():
+        u = (rng.permutation(n) + rng.random(n)) / n
+        cols[k] = v["low"] + u * (v["high"] - v["low"])
+    return [{k: float(cols[k][i]) for k in params} for i in range(n)]
+
+def expand(spec: dict) -> list[dict]:
+    mode, params = spec.get("mode", "grid"), spec["params"]
+    rng = np.random.default_rng(spec.get("seed", 0))
+    if mode == "grid":   return _grid(params)
+    if mode == "random": return _random(params, spec["n"], rng)
+    if mode == "lhs":    return _lhs(params, spec["n"], rng)
+    raise ValueError(f"unknown sweep mode: {mode}")
+
+def run_id(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+def make_config(params: dict) -> bt.BacktestConfig:
+    cfg = bt.BacktestConfig()
+    weights, risk, top = dict(cfg.weights), {}, {}
+    for k, v in params.items():
+        grp, _, name = k.partition(".")
+        if grp == "weights": weights[name] = v
+        elif grp == "risk":  risk[name] = v
+        else:                top[k] = v
+    return replace(cfg, weights=weights, risk=replace(cfg.risk, **risk), **top)
+
+
+# ───────────────────────── shared memory ──────────────────────────────────
+_SHM: list[shared_memory.SharedMemory] = []     # держим ссылки в воркере
+_PREP: bt.Prepared | None = None
+
+def _share(arrays: dict[str, np.ndarray]) -> tuple[dict, list]:
+    meta, blocks = {}, []
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+        meta[name] = (shm.name, arr.shape, arr.dtype.str)
+        blocks.append(shm)
+    return meta, blocks
+
+def _attach(meta: dict, assets: list[str]) -> None:
+    """initializer воркера: собирает Prepared из view на общие буферы."""
+    global _PREP
+    arr = {}
+    for name, (shm_name, shape, dtype) in meta.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _SHM.append(shm)
+        arr[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    ind = {k[4:]: v for k, v in arr.items() if k.startswith("ind.")}
+    md = bt.MarketData(arr["ts"], assets, arr["close"])
+    _PREP = bt.Prepared(md, ind, arr["news_has"], arr["news_val"])
+
+def _work(params: dict) -> dict:
+    t0 = time.perf_counter()
+    res = bt.run(_PREP, make_config(params))
+    return {"id": run_id(params), "params": params, **res.summary(),
+            "elapsed": round(time.perf_counter() - t0, 3)}
+
+
+# ───────────────────────── запуск / ранжирование ──────────────────────────
+def _read_rows(path: str) -> list[dict]:
+    """Строки JSONL; недописанные (прерванный прогон) пропускаются с предупреждением."""
+    if not os.path.exists(path):
+        return []
+    rows = []
+    with open(path) as f:
+        for no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning("%s:%d: skipping unparseable line", path, no)
+    return rows
+
+def _torn(path: str) -> bool:
+    """Последняя строка оборвана — новая запись должна начаться с новой строки."""
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+def _done_ids(path: str) -> set[str]:
+    return {r["id"] for r in _read_rows(path)}
+
+def sweep(prep: bt.Prepared, configs: list[dict], out: str,
+          workers: int | None = None) -> int:
+    """Прогоняет configs (кроме уже записанных в out); возвращает число новых."""
+    done = _done_ids(out)
+    todo = [c for c in configs if run_id(c) not in done]
+    if not todo:
+        return 0
+    arrays = {"ts": prep.market.ts, "close": prep.market.close,
+              "news_has": prep.news_has, "news_val": prep.news_val,
+              **{f"ind.{k}": v for k, v in prep.ind.items()}}
+    meta, blocks = _share(arrays)
+    try:
+        with ProcessPoolExecutor(workers or os.cpu_count(), mp_context=get_context("spawn"),
+                                 initializer=_attach,
+                                 initargs=(meta, prep.market.assets)) as pool, \
+             open(out, "a") as f:
+            if _torn(out):
+                f.write("\n")
+            futs = [pool.submit(_work, c) for c in todo]
+            for i, fut in enumerate(as_completed(futs), 1):
+                f.write(json.dumps(fut.result()) + "\n")
+                f.flush()                               # переживаем обрыв
+                print(f"\r{i}/{len(todo)}", end="", flush=True)
+        print()
+    finally:
+        for shm in blocks:
+            shm.close(); shm.unlink()
+    return len(todo)
+
+def fronts(rows: list[dict]) -> list[int]:
+    """
+    Номер Парето-фронта по (доходность ↑, просадка ↓): 0 — никем не
+    доминируемые, 1 — доминируемые только фронтом 0, … .  После сортировки
+    по доходности минимальные просадки фронтов возрастают с номером —
+    фронт ищется бисекцией, O(n log n).
+    """
+    order = sorted(range(len(rows)), key=lambda i: (-rows[i]["return"], rows[i]["max_dd"]))
+    mins, out, prev, k = [], [0] * len(rows), None, 0   # mins — мин. просадка фронта
+    for i in order:
+        pt = (rows[i]["return"], rows[i]["max_dd"])
+        if pt != prev:                              # дубли идут подряд и не доминируют
+            k = bisect.bisect_right(mins, pt[1])
+            if k == len(mins):
+                mins.append(pt[1])
+            mins[k], prev = pt[1], pt
+        out[i] = k
+    return out
+
+def score(row: dict) -> float:
+    """Доходность на единицу просадки (Calmar за период)."""
+    return row["return"] / max(row["max_dd"], DD_FLOOR)
+
+def rank(path: str, top: int = 20) -> list[dict]:
+    """Фронт ↑, внутри фронта score ↓, затем число сделок ↑; поля front и score."""
+    rows = _read_rows(path)
+    for r, f in zip(rows, fronts(rows)):
+        r["front"], r["score"] = f, score(r)
+    rows.sort(key=lambda r: (r["front"], -r["score"], r["trades"]))
+    return rows[:top]
+
+
+def _main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("--data", required=True)
+    r.add_argument("--spec", required=True)
+    r.add_argument("--out", default="sweep.jsonl")
+    r.add_argument("--workers", type=int)
+    r.add_argument("--news", action="store_true")
+    k = sub.add_parser("rank")
+    k.add_argument("--out", default="sweep.jsonl")
+    k.add_argument("--top", type=int, default=20)
+    a = ap.parse_args()
+
+    if a.cmd == "run":
+        md = bt.MarketData.load(a.data)
+        rows = []
+        if a.news:
+            from datetime import datetime
+            rows = bt.load_news_rows(datetime.utcfromtimestamp(md.ts[0] / 1000),
+                                     datetime.utcfromtimestamp(md.ts[-1] / 1000))
+        with open(a.spec) as f:
+            configs = expand(json.load(f))
+        t0 = time.perf_counter()
+        n = sweep(bt.prepare(md, rows), configs, a.out, a.workers)
+        print(f"{n} new runs ({len(configs) - n} resumed) in {time.perf_counter() - t0:.1f}s")
+        a.top = 10
+
+    print(f"{'front':>5} {'score':>8} {'return':>9} {'max_dd':>8} {'trades':>7}  params")
+    for row in rank(a.out, a.top):
+        print(f"{row['front']:5d} {row['score']:+8.2f} {row['return']:+9.4f} "
+              f"{row['max_dd']:8.4f} {row['trades']:7d}  {row['params']}")
+
+
+if __name__ == "__main__":
+    _main()
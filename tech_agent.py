@@ -1,50 +1,71 @@
 import asyncio, logging, numpy as np, pandas as pd, pandas_ta as ta
 from datetime import datetime, timezone
 
-from data_feed import ensure_pairs, _make_client          
+from data_feed import ensure_pairs
+from exchange  import get_exchange
+from ringbuf   import RingBuffer
+from metrics  import timer
+from indicators import IndicatorEngine, combine, score_batch
 
 logger   = logging.getLogger(__name__)
 TF       = "5m"
 CANDLES  = 120
-RSI_OB, RSI_OS = 70, 30
 
 def _sent(val: float, thr: float = 0.0):
     if val >  thr: return "bullish",  1
     if val < -thr: return "bearish", -1
     return "neutral", 0
 
-def _indicators(df: pd.DataFrame) -> tuple[float,str]:
+def _indicator_values(df: pd.DataFrame) -> tuple[float, ...]:
+    """Сырые (sma_d, ema_d, macd, rsi, bbp) через pandas_ta — как IndicatorEngine.raw."""
     close, last = df["close"], df.iloc[-1]
-    sma = np.sign(ta.sma(close, 36).iloc[-1] - ta.sma(close, 80).iloc[-1])
-    ema = np.sign(ta.ema(close, 16).iloc[-1] - ta.ema(close, 42).iloc[-1])
-    mac = np.sign(ta.macd(close, 24, 52, 18)["MACD_24_52_18"].iloc[-1])
+    sma = ta.sma(close, 36).iloc[-1] - ta.sma(close, 80).iloc[-1]
+    ema = ta.ema(close, 16).iloc[-1] - ta.ema(close, 42).iloc[-1]
+    mac = ta.macd(close, 24, 52, 18)["MACD_24_52_18"].iloc[-1]
     rsi28 = ta.rsi(close, 28).iloc[-1]
-    rsi = 1 if rsi28 > RSI_OB else -1 if rsi28 < RSI_OS else 0
     bb    = ta.bbands(close, 20)
     bbp   = (last.close - bb["BBL_20_2.0"].iloc[-1]) /\
             (bb["BBU_20_2.0"].iloc[-1] - bb["BBL_20_2.0"].iloc[-1])
-    bbp = 1 if bbp > .8 else -1 if bbp < .2 else 0
+    return sma, ema, mac, rsi28, bbp
 
-    w = {"sma":.25,"ema":.25,"mac":.20,"rsi":.15,"bb":.15}
-    score = w["sma"]*sma + w["ema"]*ema + w["mac"]*mac + w["rsi"]*rsi + w["bb"]*bbp
-    reason = f"sma:{sma:+} ema:{ema:+} mac:{mac:+} rsi:{rsi:+} bb:{bbp:+}"
-    return float(score), reason
+def _indicators(df: pd.DataFrame) -> tuple[float,str]:
+    """Полный пересчёт через pandas_ta — эталон для IndicatorEngine."""
+    return combine(*_indicator_values(df))
 
-async def _fetch(pair: str) -> dict | None:
-    base = pair.split("/")[0]
-    client = _make_client()
-    try:
-        ohlcv = await client.fetch_ohlcv(pair, timeframe=TF, limit=CANDLES)
-    except Exception as e:
-        logger.warning("ohlcv %s err: %s", pair, e)
-        return None
-    finally:
-        await client.close()
+# ---------- rolling OHLCV ------------------------------------------------
+_candles: dict[str, RingBuffer] = {}     # pair → последние CANDLES свечей
+_engines: dict[str, IndicatorEngine] = {} # pair → индикаторы по окну CANDLES
 
-    if not ohlcv:
-        return None
-    df = pd.DataFrame(ohlcv, columns="ts open high low close vol".split())
-    score, reason = _indicators(df)
+def _merge(buf: RingBuffer, ohlcv: list) -> None:
+    """Доливает свежие свечи: та же ts → замена (свеча ещё формируется)."""
+    for row in ohlcv:
+        last_ts = buf.last()[0] if len(buf) else -1
+        if row[0] == last_ts:   buf.replace_last(row)
+        elif row[0] > last_ts:  buf.append(row)
+
+async def _update_candles(pair: str) -> RingBuffer:
+    ex  = get_exchange()
+    buf, eng = _candles.get(pair), _engines.get(pair)
+    step_ms = ex.parse_timeframe(TF) * 1000
+    if buf is not None and len(buf) and \
+            ex.milliseconds() - buf.last()[0] < CANDLES * step_ms:
+        # дельта: с последней (возможно незакрытой) свечи и дальше
+        with timer("exchange_seconds", call="fetch_ohlcv"):
+            ohlcv = await ex.fetch_ohlcv(pair, timeframe=TF,
+                                         since=int(buf.last()[0]), limit=CANDLES)
+    else:                                   # первый запуск или долгий простой
+        with timer("exchange_seconds", call="fetch_ohlcv"):
+            ohlcv = await ex.fetch_ohlcv(pair, timeframe=TF, limit=CANDLES)
+        buf = _candles[pair] = RingBuffer(CANDLES, 6)
+        eng = _engines[pair] = IndicatorEngine(window=CANDLES)   # окно — как у _indicators
+    _merge(buf, ohlcv)
+    # все свечи ответа, кроме последней, закрыты — прогоняем их через движок
+    for row in ohlcv[:-1]:
+        if row[0] > eng.closed_ts:
+            eng.update(row[4], row[0])
+    return buf
+
+def _signal(base: str, score: float, reason: str) -> dict:
     sentiment, _  = _sent(score, 0.1)
     return {
         "asset": base,
@@ -55,8 +76,41 @@ async def _fetch(pair: str) -> dict | None:
         "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
 
+async def _candles_safe(pair: str) -> RingBuffer | None:
+    try:
+        buf = await _update_candles(pair)
+    except Exception as e:
+        logger.warning("ohlcv %s err: %s", pair, e)
+        return None
+    return buf if len(buf) else None
+
+async def _fetch(pair: str) -> dict | None:
+    buf = await _candles_safe(pair)
+    if buf is None:
+        return None
+    score, reason = _engines[pair].peek(buf.last()[4])   # O(1), без DataFrame
+    return _signal(pair.split("/")[0], score, reason)
+
+async def tech_signals_batch(pairs: list[str] | None = None) -> list[dict]:
+    """То же, что tech_signals(), но все символы считаются одной матрицей."""
+    pairs = pairs if pairs is not None else await ensure_pairs()
+    bufs  = await asyncio.gather(*[_candles_safe(p) for p in pairs])
+    groups: dict[int, list[tuple[str, np.ndarray]]] = {}   # длина истории → ряды
+    for p, buf in zip(pairs, bufs):
+        if buf is not None:
+            groups.setdefault(len(buf), []).append((p, buf.view()[:, 4]))
+    scored: dict[str, dict] = {}
+    for rows in groups.values():
+        closes = np.vstack([c for _, c in rows])
+        for (p, _), (score, reason) in zip(rows, score_batch(closes)):
+            scored[p] = _signal(p.split("/")[0], score, reason)
+    return [scored[p] for p in pairs if p in scored]
+
 async def tech_signals() -> list[dict]:
     pairs  = await ensure_pairs()
+    for p in set(_candles) - set(pairs):    # пара выпала из TOP — буфер не нужен
+        del _candles[p]
+        _engines.pop(p, None)
     tasks  = [asyncio.create_task(_fetch(p)) for p in pairs]
     res    = await asyncio.gather(*tasks)
     return [r for r in res if r]
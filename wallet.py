@@ -1,12 +1,10 @@
-import time, uuid, asyncio, logging
+import time, uuid, logging
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+from typing import Callable, Dict
 from datetime import datetime, timezone
 
-from sqlalchemy.orm import Session
-from database import sync_engine         
-from models    import Trade
-from mcp_client import query             
+from journal import TradeJournal, trade_journal
+from ringbuf  import LogBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +22,23 @@ COOLDOWN_MIN = 15
 DD_TRIGGER   = 0.005
 DD_STOP      = 0.003
 
+LOG_KEEP     = 1_000          # строк лога кошелька в памяти
+
+
+@dataclass(frozen=True)
+class RiskParams:
+    """Риск-параметры кошелька (по умолчанию — константы модуля)."""
+    slippage:       float = SLIPPAGE
+    size_pct_limit: float = SIZE_PCT_LIMIT
+    max_pos_share:  float = MAX_POS_SHARE
+    min_ticket:     float = MIN_TICKET
+    tp:             float = TP
+    sl:             float = SL
+    max_hold_min:   float = MAX_HOLD_MIN
+    cooldown_min:   float = COOLDOWN_MIN
+    dd_trigger:     float = DD_TRIGGER
+    dd_stop:        float = DD_STOP
+
 
 @dataclass
 class Position:
@@ -36,17 +51,21 @@ class Position:
 class Wallet:
     cash: float = 10_000.0
     positions: Dict[str, Position] = field(default_factory=dict)
-    history:   List[Tuple[float, str]] = field(default_factory=list)
+    history:   LogBuffer = field(default_factory=lambda: LogBuffer(LOG_KEEP))
     realized:  float = 0.0
     last_op:   Dict[str, float] = field(default_factory=dict)
+    last_trade_ts: float = 0.0          # время последней сделки (watermark снапшота)
+    risk:      RiskParams = field(default_factory=RiskParams, repr=False)
+    clock:     Callable[[], float] = field(default=time.time, repr=False, compare=False)
+    journal:   TradeJournal | None = field(default=None, repr=False, compare=False)
 
     # ---------- helpers ---------------------------------------------------
     def _fee_pct(self, sym): return FEE_MAP.get(sym, 0.001)
-    def _log(self, msg):      self.history.append((time.time(), msg))
+    def _log(self, msg):      self.history.append((self.clock(), msg))
 
     def in_cooldown(self, sym: str) -> bool:
         ts = self.last_op.get(sym, 0)
-        return (time.time() - ts) < COOLDOWN_MIN * 60
+        return (self.clock() - ts) < self.risk.cooldown_min * 60
 
     def total_equity(self, prices: Dict[str, float]) -> float:
         return self.cash + sum(
@@ -59,27 +78,26 @@ class Wallet:
             for sym, pos in self.positions.items()
         )
 
-    # ---------- postgres write (non-blocking) -----------------------------
+    # ---------- postgres write (write-behind, non-blocking) ----------------
     def _store(self, **kw):
-        def _w():
-            with Session(sync_engine) as s:
-                s.add(Trade(**kw)); s.commit()
-        asyncio.get_running_loop().run_in_executor(None, _w)
+        if self.journal is not None:
+            self.journal.submit(kw)
 
     # ---------- BUY -------------------------------------------------------
     def buy(self, sym: str, price: float, pct: float, *, prices):
         if self.in_cooldown(sym): return
-        pct = min(pct, SIZE_PCT_LIMIT)
+        r = self.risk
+        pct = min(pct, r.size_pct_limit)
         fee_pct = self._fee_pct(sym)
-        alloc   = max(self.cash * pct, MIN_TICKET)
+        alloc   = max(self.cash * pct, r.min_ticket)
         if alloc > self.cash or price <= 0: return
-        qty = alloc / (price * (1 + fee_pct + SLIPPAGE))
+        qty = alloc / (price * (1 + fee_pct + r.slippage))
 
         equity  = self.total_equity(prices)
         cur_val = self.positions.get(sym, Position(0, 0, 0)).qty * price
-        if (cur_val + qty*price) > equity * MAX_POS_SHARE: return
+        if (cur_val + qty*price) > equity * r.max_pos_share: return
 
-        cost = qty * price * (1 + fee_pct + SLIPPAGE)
+        cost = qty * price * (1 + fee_pct + r.slippage)
         self.cash -= cost
 
         if sym in self.positions:
@@ -88,11 +106,11 @@ class Wallet:
             new_price = (p.qty*p.entry_price + qty*price) / new_qty
             self.positions[sym] = Position(new_qty, new_price, p.opened_ts)
         else:
-            self.positions[sym] = Position(qty, price, time.time())
+            self.positions[sym] = Position(qty, price, self.clock())
 
-        self.last_op[sym] = time.time()
+        self.last_op[sym] = self.last_trade_ts = now = self.clock()
         self._log(f"BUY  {sym} {qty:.4f} @ {price:.2f}")
-        self._store(id=uuid.uuid4(), ts=datetime.utcnow(),
+        self._store(id=uuid.uuid4(), ts=datetime.utcfromtimestamp(now),
                     symbol=sym, side="BUY", qty=qty, price=price,
                     fee=cost - qty*price, realized_pnl=0.0)
 
@@ -102,7 +120,7 @@ class Wallet:
         pos = self.positions.get(sym);  fee_pct = self._fee_pct(sym)
         if not pos: return
         qty = pos.qty * pct
-        proceeds = qty * price * (1 - fee_pct - SLIPPAGE)
+        proceeds = qty * price * (1 - fee_pct - self.risk.slippage)
         pnl      = proceeds - qty * pos.entry_price
 
         self.realized += pnl
@@ -110,9 +128,9 @@ class Wallet:
         if pct >= 0.999: self.positions.pop(sym)
         else:            pos.qty -= qty
 
-        self.last_op[sym] = time.time()
+        self.last_op[sym] = self.last_trade_ts = now = self.clock()
         self._log(f"SELL {sym} {qty:.4f} @ {price:.2f}  P&L {pnl:.2f}")
-        self._store(id=uuid.uuid4(), ts=datetime.utcnow(),
+        self._store(id=uuid.uuid4(), ts=datetime.utcfromtimestamp(now),
                     symbol=sym, side="SELL", qty=qty, price=price,
                     fee=qty*price*fee_pct, realized_pnl=pnl)
 
@@ -123,26 +141,59 @@ class Wallet:
         pos = self.positions.get(sym)
         if not pos: return False
         delta = (price_now - pos.entry_price) / pos.entry_price
-        if delta >= TP or delta <= -SL:
+        if delta >= self.risk.tp or delta <= -self.risk.sl:
             return True
-        return (time.time() - pos.opened_ts) >= MAX_HOLD_MIN * 60
+        return (self.clock() - pos.opened_ts) >= self.risk.max_hold_min * 60
+
+
+    # ---------- snapshot / replay ------------------------------------------
+    def state(self, history: int = 200) -> dict:
+        """Компактное JSON-состояние (без risk/clock/journal)."""
+        return {"cash": self.cash, "realized": self.realized,
+                "positions": {s: [p.qty, p.entry_price, p.opened_ts]
+                              for s, p in self.positions.items()},
+                "last_op": dict(self.last_op), "last_trade_ts": self.last_trade_ts,
+                "history": [list(h) for h in self.history[-history:]]}
+
+    def load_state(self, st: dict) -> None:
+        self.cash, self.realized = st["cash"], st["realized"]
+        self.positions = {s: Position(*v) for s, v in st["positions"].items()}
+        self.last_op   = dict(st["last_op"])
+        self.last_trade_ts = st["last_trade_ts"]
+        self.history   = LogBuffer(LOG_KEEP, (tuple(h) for h in st["history"]))
+
+    def apply_trade(self, row: dict) -> bool:
+        """
+        Применяет уже записанную сделку из trades (без риск-проверок и без
+        журнала): BUY списывает qty*price+fee, SELL зачисляет
+        realized_pnl + qty*entry_price.  False — SELL без открытой позиции.
+        """
+        sym, qty, px = row["symbol"], row["qty"], row["price"]
+        now = row["ts"].replace(tzinfo=timezone.utc).timestamp()
+        if row["side"] == "BUY":
+            self.cash -= qty * px + row["fee"]
+            p = self.positions.get(sym)
+            if p:
+                new_qty = p.qty + qty
+                self.positions[sym] = Position(new_qty, (p.qty*p.entry_price + qty*px) / new_qty,
+                                               p.opened_ts)
+            else:
+                self.positions[sym] = Position(qty, px, now)
+            self.history.append((now, f"BUY  {sym} {qty:.4f} @ {px:.2f}"))
+        else:
+            pos = self.positions.get(sym)
+            if not pos:
+                return False
+            self.cash     += row["realized_pnl"] + qty * pos.entry_price
+            self.realized += row["realized_pnl"]
+            if qty >= pos.qty * 0.999: self.positions.pop(sym)
+            else:                      pos.qty -= qty
+            self.history.append((now, f"SELL {sym} {qty:.4f} @ {px:.2f}  "
+                                      f"P&L {row['realized_pnl']:.2f}"))
+        self.last_op[sym] = self.last_trade_ts = now
+        return True
 
 
 # ───────── singleton wallet ───────────────────────────────────────────────
-wallet = Wallet()
-
-# ───────── подгружаем «последние операции» из trades ─────────────────────
-try:
-    rows = query(f"""
-        SELECT symbol, ts
-        FROM trades
-        WHERE ts >= now() - interval '{COOLDOWN_MIN} minutes';
-    """)
-    for r in rows:
-        ts = datetime.fromisoformat(str(r["ts"])).replace(tzinfo=timezone.utc).timestamp()
-        wallet.last_op[r["symbol"]] = ts
-    if rows:
-        logger.info("Wallet cooldown restored for: %s",
-                    ", ".join(wallet.last_op.keys()))
-except Exception as ex:                    # не блокируем старт
-    logger.warning("Could not restore cooldown from DB: %s", ex)
+wallet = Wallet(journal=trade_journal)
+# состояние восстанавливается snapshot.restore_wallet() при старте движка